@@ -0,0 +1,84 @@
+"""
+Raw Ingest Benchmark
+Times one-file-at-a-time pd.read_csv + concat against 02's parallel pyarrow loader
+
+Usage:
+    python benchmarks/ingest_benchmark.py                   # 20 season files of 25k fixtures
+    python benchmarks/ingest_benchmark.py --files 40 --rows 50000 --workers 8
+"""
+
+import os
+import sys
+import time
+import tempfile
+import pandas as pd
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.schema_benchmark import make_processed
+from utils.memory import frame_mb
+from utils.normalizer import RECORD_DTYPES
+from utils.parallel_read import default_workers, read_files
+from utils.schema import Registry, concat_datasets, load_dataset
+
+
+def sequential(paths):
+    """The old loader: default parser, one file after another, then concat"""
+    return pd.concat([pd.read_csv(path) for path in paths], ignore_index=True)
+
+
+def parallel(paths, workers):
+    """02's loader: record columns only, pyarrow parser, files read concurrently"""
+    registry = Registry()
+    frames = [
+        df for _, df, _, _ in read_files(
+            paths, lambda path: load_dataset(path, columns=list(RECORD_DTYPES), registry=registry), workers
+        )
+    ]
+    return concat_datasets(frames)
+
+
+def timed(fn, *args):
+    """(result, seconds)"""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    """Run the benchmark"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Raw ingest benchmark')
+    parser.add_argument('--files', type=int, default=20)
+    parser.add_argument('--rows', type=int, default=25_000)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    workers = args.workers or default_workers(args.files)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Raw season files also carry columns 02 never reads (here: 20 extra floats)
+        paths = []
+        for i in range(args.files):
+            path = Path(tmp) / f'season_{i}.csv'
+            make_processed(args.rows, features=20, seed=i).to_csv(path, index=False)
+            paths.append(path)
+
+        old, old_seconds = timed(sequential, paths)
+        one, one_seconds = timed(parallel, paths, 1)
+        new, new_seconds = timed(parallel, paths, workers)
+
+    print(f"📦 {args.files} files x {args.rows:,} fixtures, {os.cpu_count()} CPUs\n")
+    print(f"{'':>22} {'time':>8} {'memory':>10}")
+    print(f"{'pd.read_csv, 1 file':>22} {old_seconds:>7.2f}s {frame_mb(old):>8.1f}MB")
+    print(f"{'pyarrow, 1 thread':>22} {one_seconds:>7.2f}s {frame_mb(one):>8.1f}MB")
+    print(f"{f'pyarrow, {workers} threads':>22} {new_seconds:>7.2f}s {frame_mb(new):>8.1f}MB")
+    print(f"\n   {old_seconds / new_seconds:.1f}x faster than the old loader, "
+          f"{one_seconds / new_seconds:.1f}x from {workers} threads")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Dataset Schema Benchmark
+Memory and groupby time of a processed dataset read with pandas defaults vs utils.schema
+
+Usage:
+    python benchmarks/schema_benchmark.py                   # 100k fixtures
+    python benchmarks/schema_benchmark.py --rows 500000 --features 80
+"""
+
+import sys
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.memory import frame_mb
+from utils.schema import Registry, load_dataset
+
+
+def make_processed(rows, features, teams=2000, leagues=60, seed=42):
+    """Synthetic processed dataset: names, ids, counts, targets and float features"""
+    rng = np.random.default_rng(seed)
+    home_ids = rng.integers(1, teams + 1, rows)
+    away_ids = rng.integers(1, teams + 1, rows)
+    league_ids = rng.integers(1, leagues + 1, rows)
+
+    df = pd.DataFrame({
+        'fixture_id': np.arange(rows) + 1_000_000,
+        'date': pd.date_range('2010-01-01', periods=rows, freq='h').strftime('%Y-%m-%d'),
+        'league': [f'League {i}' for i in league_ids],
+        'league_id': league_ids,
+        'season': rng.integers(2010, 2025, rows),
+        'home_team': [f'Team {i} FC' for i in home_ids],
+        'home_team_id': home_ids,
+        'away_team': [f'Team {i} FC' for i in away_ids],
+        'away_team_id': away_ids,
+    })
+    for col in ['home_goals', 'away_goals', 'home_corners', 'away_corners',
+                'home_yellow_cards', 'away_yellow_cards', 'home_shots', 'away_shots']:
+        df[col] = rng.poisson(3, rows)
+    for col in ['btts', 'over_2_5_goals', 'over_9_5_corners', 'over_3_5_cards']:
+        df[col] = rng.integers(0, 2, rows)
+    df['home_possession'] = rng.uniform(30, 70, rows).round(1)
+    df['away_possession'] = 100 - df['home_possession']
+    for i in range(features):
+        df[f'feature_{i}'] = rng.normal(size=rows)
+    return df
+
+
+def groupby_seconds(df, repeat=3):
+    """Best time for a per-team mean of every float feature"""
+    features = [col for col in df.columns if col.startswith('feature_')]
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df.groupby('home_team', observed=True)[features].mean()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    """Run the benchmark"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Dataset schema benchmark')
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--features', type=int, default=60)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'training_data.csv'
+        make_processed(args.rows, args.features).to_csv(path, index=False)
+
+        start = time.perf_counter()
+        default = pd.read_csv(path)
+        default_read = time.perf_counter() - start
+
+        start = time.perf_counter()
+        typed = load_dataset(path, registry=Registry())
+        typed_read = time.perf_counter() - start
+
+    default_mb, typed_mb = frame_mb(default), frame_mb(typed)
+    default_group, typed_group = groupby_seconds(default), groupby_seconds(typed)
+
+    print(f"📦 {args.rows:,} fixtures, {len(typed.columns)} columns\n")
+    print(f"{'':>10} {'memory':>10} {'read':>8} {'groupby':>9}")
+    print(f"{'default':>10} {default_mb:>8.1f}MB {default_read:>7.2f}s {default_group * 1000:>7.1f}ms")
+    print(f"{'schema':>10} {typed_mb:>8.1f}MB {typed_read:>7.2f}s {typed_group * 1000:>7.1f}ms")
+    print(f"\n   {default_mb / typed_mb:.1f}x less memory, {default_group / typed_group:.1f}x faster groupby")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,17 @@
 
 set -e  # Exit on error
 
+# Stages whose inputs haven't changed since their last run are skipped
+# (see utils/stage_cache.py); pass --force to run everything anyway
+STAGE_FLAGS=""
+if [ "$1" == "--force" ]; then
+    STAGE_FLAGS="--force"
+fi
+
+run_stage() {
+    python3 -m utils.stage_cache --run "$1" $STAGE_FLAGS -- "${@:2}"
+}
+
 echo "🤖 Footy Oracle - LM Training Pipeline"
 echo "========================================"
 echo ""
@@ -56,22 +67,25 @@ echo ""
 
 # Step 2: Process data
 echo "🔧 Step 2: Processing and engineering features..."
-python3 scripts/02_process_data.py
+run_stage process python3 scripts/02_process_data.py --compact
+if [ -s "../shared/ml_inputs/fixtures_today.json" ]; then
+    python3 -m utils.team_features --enrich-today || echo "⚠️  Skipped team stats for today's fixtures"
+fi
 echo ""
 
 # Step 3: Train models
 echo "🤖 Step 3: Training LM babies..."
-python3 scripts/03_train_models.py
+run_stage train python3 scripts/03_train_models.py
 echo ""
 
 # Step 4: Evaluate
 echo "📈 Step 4: Evaluating performance..."
-python3 scripts/04_evaluate.py || echo "⚠️  Evaluation completed with warnings"
+run_stage evaluate python3 scripts/04_evaluate.py || echo "⚠️  Evaluation completed with warnings"
 echo ""
 
 # Step 5: Deploy
 echo "🚀 Step 5: Deploying models..."
-python3 scripts/05_deploy.py
+run_stage deploy python3 scripts/05_deploy.py
 echo ""
 
 # Success summary
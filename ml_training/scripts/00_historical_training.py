@@ -5,19 +5,31 @@ Designed to run daily at 2am, training on progressively older data
 
 Usage:
     python 00_historical_training.py --start-year 2018 --leagues 50
+    python 00_historical_training.py --workers 16 --rate-limit 450
 """
 
 import os
 import sys
 import json
-import requests
+import queue
+import threading
 import pandas as pd
 from pathlib import Path
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-import time
 import logging
 
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.api_football import APIFootballClient
+from utils.fetch_planner import league_ids
+from utils.fixture_index import ROW_SOURCES, FixtureIndex
+from utils.rate_limiter import DEFAULT_RATE_PER_MINUTE
+from utils.http_cache import ResponseCache
+from utils.normalizer import normalize_fixture
+from utils.splits import SPLITS_FILE, save_splits, splits_from_config
+
 # Setup logging
 log_dir = Path(__file__).parent.parent / 'logs'
 log_dir.mkdir(exist_ok=True)
@@ -36,69 +48,25 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 API_KEY = os.getenv('API_FOOTBALL_KEY')
-BASE_URL = 'https://v3.football.api-sports.io'
-
-# Top 50 leagues worldwide
-TOP_50_LEAGUES = [
-    39,   # Premier League (England)
-    140,  # La Liga (Spain)
-    78,   # Bundesliga (Germany)
-    135,  # Serie A (Italy)
-    61,   # Ligue 1 (France)
-    94,   # Primeira Liga (Portugal)
-    88,   # Eredivisie (Netherlands)
-    144,  # Belgian Pro League
-    203,  # Super Lig (Turkey)
-    235,  # Russian Premier League
-    71,   # Serie A (Brazil)
-    128,  # Argentine Primera
-    253,  # MLS (USA)
-    262,  # Liga MX (Mexico)
-    2,    # Champions League
-    3,    # Europa League
-    848,  # Conference League
-    45,   # FA Cup
-    143,  # Copa del Rey
-    81,   # DFB Pokal
-    137,  # Coppa Italia
-    66,   # Coupe de France
-    48,   # Championship (England)
-    141,  # La Liga 2 (Spain)
-    79,   # 2. Bundesliga (Germany)
-    136,  # Serie B (Italy)
-    62,   # Ligue 2 (France)
-    119,  # Danish Superliga
-    103,  # Eliteserien (Norway)
-    113,  # Allsvenskan (Sweden)
-    207,  # Swiss Super League
-    218,  # Bundesliga (Austria)
-    345,  # Czech First League
-    197,  # Greek Super League
-    179,  # Scottish Premiership
-    283,  # UAE Pro League
-    307,  # Saudi Pro League
-    188,  # Romanian Liga 1
-    271,  # Australian A-League
-    169,  # Polish Ekstraklasa
-    172,  # Croatian First League
-    318,  # J1 League (Japan)
-    292,  # K League 1 (South Korea)
-    266,  # Chinese Super League
-    98,   # Segunda División (Portugal)
-    106,  # Superettan (Sweden)
-    104,  # 1. Division (Norway)
-    120,  # 1st Division (Denmark)
-    384,  # Premiership (Northern Ireland)
-]
 
 
 class HistoricalTrainer:
     """Manages historical data collection and training"""
     
-    def __init__(self, start_year=2018, num_leagues=50):
+    def __init__(self, start_year=2018, num_leagues=50, use_cache=True, workers=8,
+                 rate_per_minute=DEFAULT_RATE_PER_MINUTE, refetch=False):
         self.start_year = start_year
         self.current_training_year = self.load_progress()
-        self.leagues = TOP_50_LEAGUES[:num_leagues]
+        self.leagues = league_ids()[:num_leagues]
+        self.workers = max(1, workers)
+        
+        # One pooled client (and rate limiter) shared by the producer and every stats worker
+        self.client = APIFootballClient(API_KEY, rate_per_minute=rate_per_minute, pool_size=self.workers + 1,
+                                        cache=ResponseCache() if use_cache else None)
+        
+        # Fixtures already stored anywhere are skipped unless refetch is set
+        self.index = FixtureIndex()
+        self.refetch = refetch
         
         self.data_dir = Path(__file__).parent.parent / 'data'
         self.raw_dir = self.data_dir / 'raw'
@@ -113,6 +81,7 @@ class HistoricalTrainer:
         logger.info(f"   Start year: {self.start_year}")
         logger.info(f"   Current training year: {self.current_training_year}")
         logger.info(f"   Tracking {len(self.leagues)} leagues")
+        logger.info(f"   Stats workers: {self.workers} @ {rate_per_minute} requests/min")
     
     def load_progress(self):
         """Load training progress from file"""
@@ -143,55 +112,21 @@ class HistoricalTrainer:
         """Fetch all fixtures for a league season"""
         logger.info(f"   Fetching league {league_id}, season {season}...")
         
-        try:
-            response = requests.get(
-                f'{BASE_URL}/fixtures',
-                headers={'x-rapidapi-key': API_KEY},
-                params={
-                    'league': league_id,
-                    'season': season,
-                    'status': 'FT'  # Only finished fixtures
-                },
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                fixtures = data.get('response', [])
-                logger.info(f"   ✅ Found {len(fixtures)} fixtures")
-                return fixtures
-            else:
-                logger.warning(f"   ⚠️  API error {response.status_code}")
-                return []
-                
-        except Exception as e:
-            logger.error(f"   ❌ Error fetching fixtures: {e}")
+        fixtures = self.client.get_response('fixtures', {
+            'league': league_id,
+            'season': season,
+            'status': 'FT'  # Only finished fixtures
+        })
+        
+        if fixtures is None:
             return []
         
-        # Rate limiting
-        time.sleep(0.5)
+        logger.info(f"   ✅ Found {len(fixtures)} fixtures")
+        return fixtures
     
     def fetch_fixture_statistics(self, fixture_id):
         """Fetch detailed statistics for a fixture"""
-        try:
-            response = requests.get(
-                f'{BASE_URL}/fixtures/statistics',
-                headers={'x-rapidapi-key': API_KEY},
-                params={'fixture': fixture_id},
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return data.get('response', [])
-            else:
-                return []
-                
-        except Exception as e:
-            logger.error(f"   ❌ Error fetching stats for fixture {fixture_id}: {e}")
-            return []
-        
-        time.sleep(0.3)
+        return self.client.get_response('fixtures/statistics', {'fixture': fixture_id}) or []
     
     def process_fixture(self, fixture):
         """Extract relevant data from fixture"""
@@ -201,100 +136,146 @@ class HistoricalTrainer:
             # Fetch detailed statistics
             stats = self.fetch_fixture_statistics(fixture_id)
             
-            if len(stats) < 2:
+            record = normalize_fixture(fixture, stats)
+            if record is None:
                 logger.warning(f"   ⚠️  Incomplete stats for fixture {fixture_id}")
-                return None
-            
-            # Extract statistics
-            home_stats = {s['type']: s['value'] for s in stats[0]['statistics']}
-            away_stats = {s['type']: s['value'] for s in stats[1]['statistics']}
-            
-            # Calculate targets
-            home_goals = fixture['goals']['home'] or 0
-            away_goals = fixture['goals']['away'] or 0
-            total_goals = home_goals + away_goals
-            
-            home_corners = home_stats.get('Corner Kicks', 0) or 0
-            away_corners = away_stats.get('Corner Kicks', 0) or 0
-            total_corners = home_corners + away_corners
-            
-            home_yellow = home_stats.get('Yellow Cards', 0) or 0
-            away_yellow = away_stats.get('Yellow Cards', 0) or 0
-            home_red = home_stats.get('Red Cards', 0) or 0
-            away_red = away_stats.get('Red Cards', 0) or 0
-            total_cards = home_yellow + away_yellow + home_red + away_red
-            
-            return {
-                'fixture_id': fixture_id,
-                'date': fixture['fixture']['date'],
-                'league': fixture['league']['name'],
-                'league_id': fixture['league']['id'],
-                'season': fixture['league']['season'],
-                'home_team': fixture['teams']['home']['name'],
-                'home_team_id': fixture['teams']['home']['id'],
-                'away_team': fixture['teams']['away']['name'],
-                'away_team_id': fixture['teams']['away']['id'],
-                'home_goals': home_goals,
-                'away_goals': away_goals,
-                'total_goals': total_goals,
-                
-                # Targets
-                'btts': 1 if (home_goals > 0 and away_goals > 0) else 0,
-                'over_2_5_goals': 1 if total_goals > 2.5 else 0,
-                'over_9_5_corners': 1 if total_corners > 9.5 else 0,
-                'over_3_5_cards': 1 if total_cards > 3.5 else 0,
-                
-                # Stats
-                'home_corners': home_corners,
-                'away_corners': away_corners,
-                'total_corners': total_corners,
-                'home_yellow_cards': home_yellow,
-                'away_yellow_cards': away_yellow,
-                'home_red_cards': home_red,
-                'away_red_cards': away_red,
-                'total_cards': total_cards,
-                'home_shots': home_stats.get('Shots on Goal', 0) or 0,
-                'away_shots': away_stats.get('Shots on Goal', 0) or 0,
-                'home_possession': home_stats.get('Ball Possession', '0%').replace('%', ''),
-                'away_possession': away_stats.get('Ball Possession', '0%').replace('%', ''),
-            }
+            return record
             
         except Exception as e:
             logger.error(f"   ❌ Error processing fixture: {e}")
             return None
     
+    def produce_fixtures(self, year, work_queue, stop, stored_ids):
+        """Producer: fetch each league's fixture list and queue its fixtures for the stats workers
+
+        Fixtures already stored as rows elsewhere are not queued; their ids go to stored_ids.
+        """
+        sequence = 0
+        try:
+            for league_id in self.leagues:
+                if stop.is_set():
+                    break
+                if self.client.limiter.quota_exhausted:
+                    logger.warning("⚠️  Daily quota exhausted - no more leagues queued")
+                    break
+                
+                fixtures = self.fetch_season_fixtures(league_id, year)
+                if not self.refetch:
+                    new_fixtures = self.index.filter_new(fixtures, ROW_SOURCES)
+                    new_ids = {fixture['fixture']['id'] for fixture in new_fixtures}
+                    stored_ids.update(fixture['fixture']['id'] for fixture in fixtures
+                                      if fixture['fixture']['id'] not in new_ids)
+                    if len(new_fixtures) < len(fixtures):
+                        logger.info(f"   📇 {len(fixtures) - len(new_fixtures)} already stored, "
+                                    f"{len(new_fixtures)} new")
+                    fixtures = new_fixtures
+                
+                for fixture in fixtures:
+                    # Blocks while the workers are behind, keeping memory bounded
+                    work_queue.put((sequence, fixture))
+                    sequence += 1
+        finally:
+            # One sentinel per worker so each exits once the queue drains
+            for _ in range(self.workers):
+                work_queue.put(None)
+    
+    def consume_fixtures(self, work_queue, results, progress):
+        """Worker: fetch statistics for queued fixtures until the producer's sentinel arrives"""
+        while True:
+            item = work_queue.get()
+            if item is None:
+                return
+            
+            sequence, fixture = item
+            processed = self.process_fixture(fixture)
+            
+            with progress['lock']:
+                if processed:
+                    results[sequence] = processed
+                progress['done'] += 1
+                if progress['done'] % 500 == 0:
+                    logger.info(f"   Progress: {progress['done']:,} fixtures, "
+                                f"{self.client.limiter.achieved_rate():.1f} req/s")
+    
     def collect_year_data(self, year):
         """Collect all fixtures for a specific year"""
         logger.info(f"\n{'='*60}")
         logger.info(f"📥 Collecting data for year {year}")
         logger.info(f"{'='*60}\n")
         
-        all_fixtures = []
+        # League fixture lists stream into the queue while workers fetch statistics
+        work_queue = queue.Queue(maxsize=self.workers * 50)
+        stop = threading.Event()
+        results = {}
+        stored_ids = set()
+        progress = {'done': 0, 'lock': threading.Lock()}
         
-        for league_id in self.leagues:
-            fixtures = self.fetch_season_fixtures(league_id, year)
-            
-            for fixture in fixtures:
-                processed = self.process_fixture(fixture)
-                if processed:
-                    all_fixtures.append(processed)
-            
-            # Rate limiting between leagues
-            time.sleep(1)
+        producer = threading.Thread(target=self.produce_fixtures, args=(year, work_queue, stop, stored_ids),
+                                    name='fixtures-producer', daemon=True)
+        workers = [
+            threading.Thread(target=self.consume_fixtures, args=(work_queue, results, progress),
+                             name=f'stats-worker-{i}', daemon=True)
+            for i in range(self.workers)
+        ]
+        
+        producer.start()
+        for worker in workers:
+            worker.start()
+        
+        try:
+            producer.join()
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            stop.set()
+            raise
+        
+        # Keep the sequential collector's ordering (league by league) regardless of completion order
+        all_fixtures = [results[sequence] for sequence in sorted(results)]
+        
+        self.client.log_summary(logger)
+        
+        output_file = self.historical_dir / f'fixtures_{year}.csv'
+        
+        # Skipped fixtures stored by another fetcher: read their rows back so this year's file stays complete
+        stored = self.index.read_rows(stored_ids, exclude=[output_file])
+        if len(stored):
+            logger.info(f"   📇 {len(stored):,} fixtures merged from other stored sources")
+        
+        # Nothing new, but an earlier run already stored this year
+        if not all_fixtures and not len(stored) and output_file.exists():
+            total = len(pd.read_csv(output_file, usecols=['fixture_id']))
+            logger.info(f"\n✅ Year {year} already stored: {total:,} fixtures, none new")
+            return {
+                'year': year,
+                'total_fixtures': total,
+                'new_fixtures': 0,
+                'leagues_covered': len(self.leagues),
+                'file': str(output_file)
+            }
         
         # Save to CSV
-        if all_fixtures:
+        if all_fixtures or len(stored):
             df = pd.DataFrame(all_fixtures)
-            output_file = self.historical_dir / f'fixtures_{year}.csv'
+            new_ids = df['fixture_id'] if all_fixtures else []
+            
+            # Keep rows stored by earlier runs for this year and elsewhere (they were skipped above)
+            frames = [pd.read_csv(output_file)] if output_file.exists() else []
+            frames += [frame for frame in (stored, df) if len(frame)]
+            df = pd.concat(frames, ignore_index=True).drop_duplicates('fixture_id', keep='last')
+            
             df.to_csv(output_file, index=False)
+            self.index.add(new_ids, 'historical', output_file)
             
             logger.info(f"\n✅ Year {year} complete:")
-            logger.info(f"   Total fixtures: {len(all_fixtures):,}")
+            logger.info(f"   New fixtures: {len(all_fixtures):,}")
+            logger.info(f"   Total fixtures: {len(df):,}")
             logger.info(f"   Saved to: {output_file}")
             
             return {
                 'year': year,
-                'total_fixtures': len(all_fixtures),
+                'total_fixtures': len(df),
+                'new_fixtures': len(all_fixtures),
                 'leagues_covered': len(self.leagues),
                 'file': str(output_file)
             }
@@ -320,14 +301,18 @@ class HistoricalTrainer:
             logger.error(f"❌ No data available for training!")
             return False
         
-        # Combine all data
+        # Combine all data (date-sorted: the train/val splits are row ranges)
         combined_df = pd.concat(all_data, ignore_index=True)
+        combined_df = combined_df.sort_values(
+            'date', key=lambda d: pd.to_datetime(d, utc=True, errors='coerce'), kind='stable'
+        ).reset_index(drop=True)
         logger.info(f"\n   Total training data: {len(combined_df):,} fixtures")
         
-        # Save combined training data
+        # Save combined training data, with split definitions to match
         training_file = self.data_dir / 'processed' / 'training_data.csv'
         training_file.parent.mkdir(exist_ok=True)
         combined_df.to_csv(training_file, index=False)
+        save_splits(splits_from_config(combined_df['date']), training_file.parent / SPLITS_FILE.name)
         
         # Run training script
         logger.info(f"\n   Running model training...")
@@ -394,12 +379,19 @@ def main():
     
     parser = argparse.ArgumentParser(description='Historical Training Pipeline')
     parser.add_argument('--start-year', type=int, default=2018, help='Starting year (default: 2018)')
-    parser.add_argument('--leagues', type=int, default=50, help='Number of leagues to track (default: 50)')
+    parser.add_argument('--leagues', type=int, default=50, help='Number of leagues from config/leagues.json to track, by priority (default: 50)')
     parser.add_argument('--test', action='store_true', help='Test mode (single year only)')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the on-disk API response cache')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent stats requests (default: 8)')
+    parser.add_argument('--rate-limit', type=int, default=DEFAULT_RATE_PER_MINUTE,
+                        help=f'API plan requests per minute (default: {DEFAULT_RATE_PER_MINUTE})')
+    parser.add_argument('--refetch', action='store_true',
+                        help='Fetch statistics even for fixtures already in the known-fixture index')
     
     args = parser.parse_args()
     
-    trainer = HistoricalTrainer(start_year=args.start_year, num_leagues=args.leagues)
+    trainer = HistoricalTrainer(start_year=args.start_year, num_leagues=args.leagues, use_cache=not args.no_cache,
+                                workers=args.workers, rate_per_minute=args.rate_limit, refetch=args.refetch)
     
     if args.test:
         logger.info("🧪 Running in TEST mode")
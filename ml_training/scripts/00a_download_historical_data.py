@@ -5,18 +5,39 @@ Saves raw data for processing by 00b_train_historical_models.py at 2am
 
 Usage:
     python 00a_download_historical_data.py --year 2015
+    python 00a_download_historical_data.py --year 2015 --workers 16 --rate-limit 450
+    python 00a_download_historical_data.py --year 2015 --finalise
+    python 00a_download_historical_data.py --plan --budget 7000
+
+Stats are appended to {year}_stats.jsonl as they arrive; rerunning after a crash
+skips every fixture already in the journal. The journal is compacted into
+{year}_stats.json at the end of each run (or on its own with --finalise).
+
+--plan ignores --year/--leagues and lets utils/fetch_planner.py pick tonight's
+league/seasons from config/leagues.json priorities, fitted to --budget calls;
+unfinished work carries over to the next night.
 """
 
 import os
 import sys
 import json
-import requests
 import time
 import logging
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.api_football import APIFootballClient
+from utils.fetch_planner import DEFAULT_BUDGET, FetchPlanner, league_ids
+from utils.fixture_index import ROW_SOURCES, FixtureIndex
+from utils.http_cache import ResponseCache
+from utils.json_stream import iter_json_array
+from utils.rate_limiter import DEFAULT_RATE_PER_MINUTE
+
 # Setup logging
 log_dir = Path(__file__).parent.parent / 'logs'
 log_dir.mkdir(exist_ok=True)
@@ -35,23 +56,26 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 API_KEY = os.getenv('API_FOOTBALL_KEY')
-BASE_URL = 'https://v3.football.api-sports.io'
-
-# Top 50 leagues
-TOP_50_LEAGUES = [
-    39, 140, 78, 135, 61, 94, 88, 144, 203, 235, 71, 128, 253, 262,
-    2, 3, 848, 45, 143, 81, 137, 66, 48, 141, 79, 136, 62, 119, 103,
-    113, 207, 218, 345, 197, 179, 283, 307, 188, 271, 169, 172, 318,
-    292, 266, 98, 106, 104, 120, 384
-]
 
 
 class HistoricalDataDownloader:
     """Downloads fixtures and stats for a historical year"""
     
-    def __init__(self, year, num_leagues=50):
+    def __init__(self, year, num_leagues=50, workers=8, rate_per_minute=DEFAULT_RATE_PER_MINUTE,
+                 use_cache=True, leagues=None, client=None, refetch=False):
         self.year = year
-        self.leagues = TOP_50_LEAGUES[:num_leagues]
+        self.leagues = leagues if leagues is not None else league_ids()[:num_leagues]
+        self.workers = max(1, workers)
+        self.fetched_leagues = set()
+        
+        # One pooled client (and rate limiter) shared by every worker
+        self.client = client or APIFootballClient(API_KEY, rate_per_minute=rate_per_minute, pool_size=self.workers,
+                                                  cache=ResponseCache() if use_cache else None)
+        self.limiter = self.client.limiter
+        
+        # Fixtures already stored by any fetcher are skipped unless refetch is set
+        self.index = FixtureIndex()
+        self.refetch = refetch
         
         self.data_dir = Path(__file__).parent.parent / 'data'
         self.raw_dir = self.data_dir / 'historical' / 'raw'
@@ -59,119 +83,210 @@ class HistoricalDataDownloader:
         
         self.fixtures_file = self.raw_dir / f'{year}_fixtures.json'
         self.stats_file = self.raw_dir / f'{year}_stats.json'
+        self.journal_file = self.raw_dir / f'{year}_stats.jsonl'
         
         logger.info(f"📥 Historical Data Downloader initialized")
         logger.info(f"   Year: {year}")
         logger.info(f"   Leagues: {len(self.leagues)}")
+        logger.info(f"   Workers: {self.workers} @ {rate_per_minute} requests/min")
         logger.info(f"   Output: {self.raw_dir}")
     
     def fetch_season_fixtures(self, league_id):
         """Fetch all fixtures for a league season"""
         logger.info(f"   Fetching league {league_id}, season {self.year}...")
         
-        try:
-            response = requests.get(
-                f'{BASE_URL}/fixtures',
-                headers={'x-apisports-key': API_KEY},
-                params={
-                    'league': league_id,
-                    'season': self.year,
-                    'status': 'FT'
-                },
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                fixtures = data.get('response', [])
-                logger.info(f"   ✅ Found {len(fixtures)} fixtures")
-                return fixtures
-            else:
-                logger.warning(f"   ⚠️  API error {response.status_code}")
-                return []
-                
-        except Exception as e:
-            logger.error(f"   ❌ Error: {e}")
+        fixtures = self.client.get_response('fixtures', {
+            'league': league_id,
+            'season': self.year,
+            'status': 'FT'
+        })
+        
+        if fixtures is None:
             return []
         
-        finally:
-            time.sleep(0.5)  # Rate limiting
+        self.fetched_leagues.add(league_id)
+        logger.info(f"   ✅ Found {len(fixtures)} fixtures")
+        return fixtures
     
     def fetch_fixture_statistics(self, fixture_id):
-        """Fetch detailed statistics for a fixture"""
-        try:
-            response = requests.get(
-                f'{BASE_URL}/fixtures/statistics',
-                headers={'x-apisports-key': API_KEY},
-                params={'fixture': fixture_id},
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return data.get('response', [])
-            else:
-                return []
-                
-        except Exception as e:
-            logger.error(f"   ❌ Error fetching stats for {fixture_id}: {e}")
-            return []
+        """Fetch detailed statistics for a fixture (None if the request failed)"""
+        return self.client.get_response('fixtures/statistics', {'fixture': fixture_id})
+    
+    def load_journal(self, stats_only=False):
+        """Read the stats journal back and return the fixture ids already fetched (only those with stats if stats_only)"""
+        done_ids = set()
+        
+        if not self.journal_file.exists():
+            return done_ids
         
-        finally:
-            time.sleep(0.3)  # Rate limiting
+        with open(self.journal_file, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Last line may be half-written if the previous run crashed
+                    continue
+                if entry['stats'] or not stats_only:
+                    done_ids.add(entry['fixture_id'])
+        
+        # Terminate a half-written last line so new entries start on their own line
+        with open(self.journal_file, 'rb+') as f:
+            f.seek(0, 2)
+            if f.tell() > 0:
+                f.seek(-1, 2)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+        
+        return done_ids
+    
+    def finalise_stats(self):
+        """Compact the stats journal into the per-year {year}_stats.json artifact"""
+        all_stats = {}
+        
+        if self.journal_file.exists():
+            with open(self.journal_file, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if entry['stats']:
+                        all_stats[str(entry['fixture_id'])] = entry['stats']
+        
+        # Write to a temp file first so a crash never leaves a truncated artifact
+        tmp_file = self.stats_file.with_suffix('.json.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(all_stats, f)
+        tmp_file.replace(self.stats_file)
+        
+        logger.info(f"💾 Compacted journal into {self.stats_file} ({len(all_stats)} stats)")
+        return len(all_stats)
     
-    def download_all_data(self):
-        """Download all fixtures and stats for the year"""
+    def log_progress(self, done, total, start_time):
+        """Log progress, ETA and achieved request rate"""
+        elapsed = (datetime.now() - start_time).total_seconds() / 60
+        rate = done / elapsed if elapsed > 0 else 0
+        remaining = (total - done) / rate if rate > 0 else 0
+        logger.info(f"Progress: {done}/{total} ({done/total*100:.1f}%) - "
+                  f"Elapsed: {elapsed:.1f}min - ETA: {remaining:.1f}min - "
+                  f"{self.limiter.achieved_rate():.2f} req/s")
+    
+    def fixture_progress(self):
+        """Map of fixture id -> league id from the saved fixtures, plus the ids already stored"""
+        league_of = {}
+        if self.fixtures_file.exists():
+            for fixture in iter_json_array(self.fixtures_file):
+                league_of[fixture['fixture']['id']] = fixture['league']['id']
+        return league_of, self.load_journal() | self.index.known(league_of, ROW_SOURCES)
+    
+    def download_all_data(self, call_budget=None):
+        """Download all fixtures and stats for the year (at most call_budget API calls if given)"""
         logger.info(f"\n{'='*60}")
         logger.info(f"📥 Downloading data for year {self.year}")
         logger.info(f"{'='*60}\n")
         
         start_time = datetime.now()
+        requests_at_start = self.limiter.acquired
+        
+        # Step 1: Download fixtures (reuse the saved list for leagues already in it)
         all_fixtures = []
-        all_stats = {}
+        if self.fixtures_file.exists():
+            with open(self.fixtures_file, 'r') as f:
+                all_fixtures = json.load(f)
+            logger.info(f"STEP 1: Reusing {len(all_fixtures)} fixtures from {self.fixtures_file}")
         
-        # Step 1: Download all fixtures
-        logger.info("STEP 1: Downloading fixtures...")
-        for i, league_id in enumerate(self.leagues, 1):
-            logger.info(f"\nLeague {i}/{len(self.leagues)}: {league_id}")
-            fixtures = self.fetch_season_fixtures(league_id)
-            all_fixtures.extend(fixtures)
-            time.sleep(1)  # Rate limiting between leagues
+        saved_leagues = {fx['league']['id'] for fx in all_fixtures}
+        self.fetched_leagues.update(league_id for league_id in self.leagues if league_id in saved_leagues)
+        missing_leagues = [league_id for league_id in self.leagues if league_id not in saved_leagues]
         
-        logger.info(f"\n✅ Downloaded {len(all_fixtures)} fixtures")
+        if missing_leagues:
+            logger.info("STEP 1: Downloading fixtures...")
+            for i, league_id in enumerate(missing_leagues, 1):
+                logger.info(f"\nLeague {i}/{len(missing_leagues)}: {league_id}")
+                fixtures = self.fetch_season_fixtures(league_id)
+                all_fixtures.extend(fixtures)
+            
+            logger.info(f"\n✅ Downloaded {len(all_fixtures)} fixtures")
+            
+            # Save fixtures immediately
+            with open(self.fixtures_file, 'w') as f:
+                json.dump(all_fixtures, f, indent=2)
+            logger.info(f"💾 Saved fixtures to {self.fixtures_file}")
         
-        # Save fixtures immediately
-        with open(self.fixtures_file, 'w') as f:
-            json.dump(all_fixtures, f, indent=2)
-        logger.info(f"💾 Saved fixtures to {self.fixtures_file}")
+        # Step 2: Download stats for each fixture not already in the journal, highest priority league first
+        done_ids = self.load_journal()
         
-        # Step 2: Download stats for each fixture
-        logger.info(f"\nSTEP 2: Downloading stats for {len(all_fixtures)} fixtures...")
-        logger.info("⚠️  This will take 2-4 hours for ~30,000 fixtures\n")
+        # Journal lines flushed before a crash may never have reached the index
+        # (fixtures without stats are never registered: 00b drops them)
+        with_stats = self.load_journal(stats_only=True)
+        self.index.add(with_stats - self.index.known(with_stats), 'journal', self.journal_file)
         
-        for i, fixture in enumerate(all_fixtures, 1):
-            fixture_id = fixture['fixture']['id']
-            
-            if i % 100 == 0:
-                elapsed = (datetime.now() - start_time).total_seconds() / 60
-                rate = i / elapsed if elapsed > 0 else 0
-                remaining = (len(all_fixtures) - i) / rate if rate > 0 else 0
-                logger.info(f"Progress: {i}/{len(all_fixtures)} ({i/len(all_fixtures)*100:.1f}%) - "
-                          f"Elapsed: {elapsed:.1f}min - ETA: {remaining:.1f}min")
-            
-            stats = self.fetch_fixture_statistics(fixture_id)
-            if stats:
-                all_stats[str(fixture_id)] = stats
+        # Skip fixtures another fetcher (or an earlier year's run) already stored as rows;
+        # 00b reads those rows back from where the index says they are
+        skip_ids = set(done_ids)
+        if not self.refetch:
+            stored = self.index.known((fx['fixture']['id'] for fx in all_fixtures), ROW_SOURCES) - done_ids
+            if stored:
+                logger.info(f"   📇 {len(stored)} fixtures already stored elsewhere - skipped")
+            skip_ids |= stored
+        
+        rank = {league_id: i for i, league_id in enumerate(self.leagues)}
+        pending = [fx['fixture']['id'] for fx in
+                   sorted(all_fixtures, key=lambda fx: rank.get(fx['league']['id'], len(rank)))
+                   if fx['fixture']['id'] not in skip_ids]
+        
+        if call_budget is not None:
+            stats_budget = max(0, call_budget - (self.limiter.acquired - requests_at_start))
+            if len(pending) > stats_budget:
+                logger.info(f"   Call budget allows {stats_budget} of {len(pending)} stats requests tonight")
+                pending = pending[:stats_budget]
+        
+        logger.info(f"\nSTEP 2: Downloading stats for {len(pending)} fixtures...")
+        if done_ids:
+            logger.info(f"   Resuming: {len(done_ids)} fixtures already in {self.journal_file.name}")
+        logger.info(f"   {self.workers} workers in flight, gated by the shared rate limiter\n")
+        
+        stats_start = time.monotonic()
+        requests_before = self.limiter.acquired
+        failed = 0
+        written = []
+        
+        # One JSON line per fixture, flushed as it lands, so a crash loses at most one line
+        with open(self.journal_file, 'a') as journal, \
+                ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(self.fetch_fixture_statistics, fixture_id): fixture_id
+                for fixture_id in pending
+            }
             
-            # Save stats every 500 fixtures (checkpoint)
-            if i % 500 == 0:
-                with open(self.stats_file, 'w') as f:
-                    json.dump(all_stats, f, indent=2)
-                logger.info(f"💾 Checkpoint: Saved {len(all_stats)} stats")
+            for i, future in enumerate(as_completed(futures), 1):
+                fixture_id = futures[future]
+                
+                stats = future.result()
+                if stats is None:
+                    failed += 1
+                else:
+                    journal.write(json.dumps({'fixture_id': fixture_id, 'stats': stats}) + '\n')
+                    journal.flush()
+                    if stats:
+                        written.append(fixture_id)
+                
+                if i % 100 == 0:
+                    self.log_progress(i, len(pending), start_time)
+        
+        self.index.add(written, 'journal', self.journal_file)
+        
+        stats_elapsed = time.monotonic() - stats_start
+        stats_requests = self.limiter.acquired - requests_before
+        requests_per_second = stats_requests / stats_elapsed if stats_elapsed > 0 else 0
+        
+        if self.limiter.quota_exhausted:
+            logger.warning("⚠️  Daily API quota exhausted - rerun to resume the remaining fixtures")
+        if failed:
+            logger.warning(f"⚠️  {failed} fixtures failed and will be retried on the next run")
         
         # Final save
-        with open(self.stats_file, 'w') as f:
-            json.dump(all_stats, f, indent=2)
+        total_stats = self.finalise_stats()
         
         elapsed = (datetime.now() - start_time).total_seconds() / 60
         
@@ -179,20 +294,94 @@ class HistoricalDataDownloader:
         logger.info(f"✅ Download complete!")
         logger.info(f"{'='*60}")
         logger.info(f"Total fixtures: {len(all_fixtures)}")
-        logger.info(f"Total stats: {len(all_stats)}")
+        logger.info(f"Total stats: {total_stats}")
         logger.info(f"Time elapsed: {elapsed:.1f} minutes")
+        logger.info(f"Stats requests: {stats_requests} ({requests_per_second:.2f} req/s)")
+        self.client.log_summary(logger)
         logger.info(f"Fixtures file: {self.fixtures_file}")
         logger.info(f"Stats file: {self.stats_file}")
         
         return {
             'year': self.year,
             'total_fixtures': len(all_fixtures),
-            'total_stats': len(all_stats),
+            'total_stats': total_stats,
+            'failed': failed,
             'elapsed_minutes': elapsed,
+            'requests_per_second': requests_per_second,
             'fixtures_file': str(self.fixtures_file),
             'stats_file': str(self.stats_file)
         }
 
+def run_planned_download(budget=DEFAULT_BUDGET, workers=8, rate_per_minute=DEFAULT_RATE_PER_MINUTE,
+                         use_cache=True, refetch=False):
+    """Download tonight's planned league/seasons within the call budget and report progress"""
+    cache = ResponseCache() if use_cache else None
+    client = APIFootballClient(API_KEY, rate_per_minute=rate_per_minute, pool_size=max(1, workers), cache=cache)
+    raw_dir = Path(__file__).parent.parent / 'data' / 'historical' / 'raw'
+    
+    planner = FetchPlanner(budget=budget, cache=cache)
+    if not planner.state_file.exists():
+        # First planned night: pick up downloads made before the planner existed
+        planner.seed_from_raw(raw_dir)
+    
+    plans = []
+    while True:
+        remaining = budget - client.limiter.acquired
+        if remaining <= 0 or client.limiter.quota_exhausted:
+            break
+        
+        # Later rounds re-plan whatever budget pessimistic estimates left unspent
+        plan = planner.build_plan(remaining)
+        if not plan['items']:
+            break
+        plans.append(plan)
+        plan_file = planner.write_plan(planner.merge_plans(plans))
+        
+        title = "Tonight's plan" if len(plans) == 1 else f"Top-up round {len(plans)}"
+        logger.info(f"🗓️  {title}: {len(plan['items'])} league/seasons, "
+                    f"{plan['planned_calls']} of {remaining} calls")
+        for item in plan['items']:
+            note = ' (partial)' if item['partial'] else ''
+            logger.info(f"   P{item['priority']} {item['season']} {item['league']}: "
+                        f"~{item['allotted_calls']} calls ({item['estimate_source']}){note}")
+        logger.info(f"   Backlog after this round: {plan['backlog_items']} items, ~{plan['backlog_calls']:,} calls "
+                    f"(~{plan['nights_remaining']} nights)")
+        logger.info(f"   Plan written to {plan_file}")
+        
+        requests_before = client.limiter.acquired
+        for season, league_ids in planner.seasons_in_plan(plan).items():
+            remaining = budget - client.limiter.acquired
+            if remaining <= 0 or client.limiter.quota_exhausted:
+                logger.warning(f"⚠️  Budget spent before season {season} - carried over")
+                break
+            
+            downloader = HistoricalDataDownloader(season, workers=workers, leagues=league_ids, client=client,
+                                                  refetch=refetch)
+            downloader.download_all_data(call_budget=remaining)
+            
+            league_of, done_ids = downloader.fixture_progress()
+            planner.update_items(season, league_of, done_ids, downloader.fetched_leagues)
+        
+        # A round that spent nothing (everything failed or was cached) would loop forever
+        if client.limiter.acquired == requests_before:
+            break
+    
+    if not plans:
+        logger.info("✅ Nothing to download - backfill complete or budget already spent")
+        return None
+    
+    plan = planner.merge_plans(plans)
+    report, report_file = planner.record_run(plan, client.summary())
+    
+    logger.info(f"\n📈 Backfill: {report['backfill_items_complete']}/{report['backfill_items_total']} "
+                f"league/seasons ({report['backfill_percent']}%)")
+    logger.info(f"   Calls: {report['actual_calls']} actual vs {report['planned_calls']} planned")
+    logger.info(f"   Completed tonight: {len(report['completed_items'])}, "
+                f"carried over: {len(report['carried_over'])}")
+    logger.info(f"   Report written to {report_file}")
+    
+    return report
+
 
 def main():
     """Main entry point"""
@@ -200,10 +389,27 @@ def main():
     
     parser = argparse.ArgumentParser(description='Download Historical Data')
     parser.add_argument('--year', type=int, help='Year to download (default: from progress file)')
-    parser.add_argument('--leagues', type=int, default=50, help='Number of leagues (default: 50)')
+    parser.add_argument('--leagues', type=int, default=50, help='Number of leagues from config/leagues.json, by priority (default: 50)')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent stats requests (default: 8)')
+    parser.add_argument('--rate-limit', type=int, default=DEFAULT_RATE_PER_MINUTE,
+                        help=f'API plan requests per minute (default: {DEFAULT_RATE_PER_MINUTE})')
+    parser.add_argument('--finalise', action='store_true',
+                        help='Only compact the stats journal into {year}_stats.json')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the on-disk API response cache')
+    parser.add_argument('--plan', action='store_true',
+                        help='Download the planner\'s priority-ordered league/seasons for tonight')
+    parser.add_argument('--budget', type=int, default=DEFAULT_BUDGET,
+                        help=f'API calls the planner may spend tonight (default: {DEFAULT_BUDGET})')
+    parser.add_argument('--refetch', action='store_true',
+                        help='Fetch statistics even for fixtures already in the known-fixture index')
     
     args = parser.parse_args()
     
+    if args.plan:
+        run_planned_download(args.budget, workers=args.workers, rate_per_minute=args.rate_limit,
+                             use_cache=not args.no_cache, refetch=args.refetch)
+        return
+    
     # Determine year to download
     if args.year:
         year = args.year
@@ -219,7 +425,14 @@ def main():
     
     logger.info(f"🎯 Target year: {year}")
     
-    downloader = HistoricalDataDownloader(year, args.leagues)
+    downloader = HistoricalDataDownloader(year, args.leagues, workers=args.workers,
+                                          rate_per_minute=args.rate_limit, use_cache=not args.no_cache,
+                                          refetch=args.refetch)
+    
+    if args.finalise:
+        downloader.finalise_stats()
+        return
+    
     result = downloader.download_all_data()
     
     logger.info(f"\n✅ Download successful: {result}")
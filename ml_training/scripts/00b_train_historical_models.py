@@ -5,6 +5,9 @@ Uses data downloaded by 00a_download_historical_data.py at midnight
 
 Usage:
     python 00b_train_historical_models.py --year 2015
+    python 00b_train_historical_models.py --year 2015 --format parquet
+    python 00b_train_historical_models.py --years 2015 2014 2013 --workers 4
+    python 00b_train_historical_models.py --all-downloaded
 """
 
 import os
@@ -13,6 +16,7 @@ import json
 import pandas as pd
 import logging
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -31,14 +35,28 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.columnar_store import (HISTORICAL_STORE, conform_to_schema, read_partitioned, store_exists,
+                                  write_partitioned)
+from utils.fixture_index import FixtureIndex
+from utils.json_stream import iter_json_array, iter_json_object, iter_jsonl
+from utils.memory import peak_rss_mb
+from utils.normalizer import normalize_batch, slim_fixture
+from utils.splits import SPLITS_FILE, save_splits, splits_from_config
+
 load_dotenv()
 
+RAW_DIR = Path(__file__).parent.parent / 'data' / 'historical' / 'raw'
+
 
 class HistoricalModelTrainer:
     """Processes pre-downloaded data and trains models"""
     
-    def __init__(self, year):
+    def __init__(self, year, output_format='csv'):
         self.year = year
+        self.output_format = output_format
         
         self.data_dir = Path(__file__).parent.parent / 'data'
         self.raw_dir = self.data_dir / 'historical' / 'raw'
@@ -47,7 +65,9 @@ class HistoricalModelTrainer:
         
         self.fixtures_file = self.raw_dir / f'{year}_fixtures.json'
         self.stats_file = self.raw_dir / f'{year}_stats.json'
+        self.journal_file = self.raw_dir / f'{year}_stats.jsonl'
         self.output_file = self.historical_dir / f'fixtures_{year}.csv'
+        self.unstreamed_ids = set()
         
         logger.info(f"🤖 Historical Model Trainer initialized")
         logger.info(f"   Year: {year}")
@@ -55,100 +75,50 @@ class HistoricalModelTrainer:
         logger.info(f"   Stats: {self.stats_file}")
     
     def load_downloaded_data(self):
-        """Load pre-downloaded fixtures and stats"""
+        """Check the pre-downloaded fixtures and stats files exist"""
         logger.info(f"\n📂 Loading pre-downloaded data...")
         
         if not self.fixtures_file.exists():
             logger.error(f"❌ Fixtures file not found: {self.fixtures_file}")
-            return None, None
+            return False
         
-        if not self.stats_file.exists():
+        if not self.stats_file.exists() and not self.journal_file.exists():
             logger.error(f"❌ Stats file not found: {self.stats_file}")
-            return None, None
+            return False
         
-        with open(self.fixtures_file, 'r') as f:
-            fixtures = json.load(f)
+        return True
+    
+    def iter_fixture_stats(self):
+        """Stream (fixture, stats) pairs from the downloaded files with bounded memory"""
+        # Index slim fixture headers by id (a few hundred bytes each)
+        headers = {}
+        for fixture in iter_json_array(self.fixtures_file):
+            headers[str(fixture['fixture']['id'])] = slim_fixture(fixture)
+        logger.info(f"✅ Indexed {len(headers)} fixtures")
         
-        with open(self.stats_file, 'r') as f:
-            stats = json.load(f)
+        # Stream stats from the compacted artifact, or the 00a journal if it was never finalised
+        if self.stats_file.exists():
+            stats_source = iter_json_object(self.stats_file)
+        else:
+            logger.info(f"   Reading stats journal {self.journal_file.name}")
+            stats_source = ((str(e['fixture_id']), e['stats']) for e in iter_jsonl(self.journal_file))
         
-        logger.info(f"✅ Loaded {len(fixtures)} fixtures")
-        logger.info(f"✅ Loaded {len(stats)} stats")
+        streamed = 0
+        for fixture_id, stats in stats_source:
+            fixture = headers.pop(fixture_id, None)
+            if fixture is None:
+                continue
+            streamed += 1
+            if streamed % 5000 == 0:
+                logger.info(f"Processing: {streamed} fixtures streamed")
+            yield fixture, stats
         
-        return fixtures, stats
-    
-    def process_fixture(self, fixture, stats_dict):
-        """Process a single fixture with its stats"""
-        try:
-            fixture_id = str(fixture['fixture']['id'])
-            
-            if fixture_id not in stats_dict:
-                logger.warning(f"⚠️  No stats for fixture {fixture_id}")
-                return None
-            
-            stats = stats_dict[fixture_id]
-            
-            if len(stats) < 2:
-                logger.warning(f"⚠️  Incomplete stats for fixture {fixture_id}")
-                return None
-            
-            # Extract statistics
-            home_stats = {s['type']: s['value'] for s in stats[0]['statistics']}
-            away_stats = {s['type']: s['value'] for s in stats[1]['statistics']}
-            
-            # Calculate targets
-            home_goals = fixture['goals']['home'] or 0
-            away_goals = fixture['goals']['away'] or 0
-            total_goals = home_goals + away_goals
-            
-            home_corners = home_stats.get('Corner Kicks', 0) or 0
-            away_corners = away_stats.get('Corner Kicks', 0) or 0
-            total_corners = home_corners + away_corners
-            
-            home_yellow = home_stats.get('Yellow Cards', 0) or 0
-            away_yellow = away_stats.get('Yellow Cards', 0) or 0
-            home_red = home_stats.get('Red Cards', 0) or 0
-            away_red = away_stats.get('Red Cards', 0) or 0
-            total_cards = home_yellow + away_yellow + home_red + away_red
-            
-            return {
-                'fixture_id': fixture_id,
-                'date': fixture['fixture']['date'],
-                'league': fixture['league']['name'],
-                'league_id': fixture['league']['id'],
-                'season': fixture['league']['season'],
-                'home_team': fixture['teams']['home']['name'],
-                'home_team_id': fixture['teams']['home']['id'],
-                'away_team': fixture['teams']['away']['name'],
-                'away_team_id': fixture['teams']['away']['id'],
-                'home_goals': home_goals,
-                'away_goals': away_goals,
-                'total_goals': total_goals,
-                
-                # Targets
-                'btts': 1 if (home_goals > 0 and away_goals > 0) else 0,
-                'over_2_5_goals': 1 if total_goals > 2.5 else 0,
-                'over_9_5_corners': 1 if total_corners > 9.5 else 0,
-                'over_3_5_cards': 1 if total_cards > 3.5 else 0,
-                
-                # Stats
-                'home_corners': home_corners,
-                'away_corners': away_corners,
-                'total_corners': total_corners,
-                'home_yellow_cards': home_yellow,
-                'away_yellow_cards': away_yellow,
-                'home_red_cards': home_red,
-                'away_red_cards': away_red,
-                'total_cards': total_cards,
-                'home_shots': home_stats.get('Shots on Goal', 0) or 0,
-                'away_shots': away_stats.get('Shots on Goal', 0) or 0,
-                'home_possession': str(home_stats.get('Ball Possession', '0%')).replace('%', ''),
-                'away_possession': str(away_stats.get('Ball Possession', '0%')).replace('%', ''),
-            }
-            
-        except Exception as e:
-            logger.error(f"❌ Error processing fixture: {e}")
-            return None
+        logger.info(f"✅ Streamed stats for {streamed} fixtures")
+        if headers:
+            logger.warning(f"⚠️  No stats for {len(headers)} fixtures")
+        
+        # 00a skips fixtures other fetchers already stored; their rows are merged back from the index
+        self.unstreamed_ids = {int(fixture_id) for fixture_id in headers}
     
     def process_all_fixtures(self):
         """Process all fixtures and create CSV"""
@@ -157,34 +127,60 @@ class HistoricalModelTrainer:
         logger.info(f"{'='*60}\n")
         
         # Load data
-        fixtures, stats_dict = self.load_downloaded_data()
-        
-        if not fixtures or not stats_dict:
+        if not self.load_downloaded_data():
             logger.error("❌ Failed to load data")
             return None
         
-        # Process all fixtures
-        all_data = []
-        for i, fixture in enumerate(fixtures, 1):
-            if i % 1000 == 0:
-                logger.info(f"Processing: {i}/{len(fixtures)} ({i/len(fixtures)*100:.1f}%)")
+        # Stream fixtures and stats straight into columns
+        columns, skipped = normalize_batch(self.iter_fixture_stats())
+        total = len(columns['fixture_id'])
+        
+        if skipped:
+            logger.warning(f"⚠️  {len(skipped)} fixtures skipped (incomplete stats)")
+        
+        output = HISTORICAL_STORE if self.output_format == 'parquet' else self.output_file
+        
+        # Fixtures 00a skipped because another fetcher stored them: read their rows back
+        index = FixtureIndex()
+        stored = index.read_rows(self.unstreamed_ids, exclude=[output])
+        if len(stored):
+            logger.info(f"   📇 {len(stored):,} fixtures merged from other stored sources")
+        
+        # Save to CSV (or the partitioned Parquet store)
+        if total or len(stored):
+            df = pd.DataFrame(columns)
+            
+            # Keep the rows this output already has, then stored rows, then the newly processed ones
+            if self.output_format == 'parquet':
+                incoming = pd.concat([conform_to_schema(frame) for frame in (stored, df) if len(frame)], ignore_index=True)
+                # Partitions are replaced whole, so read every season being written
+                frames = [read_partitioned(seasons=incoming['season'].unique())] if store_exists() else []
+                df = pd.concat(frames + [incoming], ignore_index=True).drop_duplicates('fixture_id', keep='last')
+                write_partitioned(conform_to_schema(df))
+                source = 'store'
+            else:
+                frames = [pd.read_csv(self.output_file)] if self.output_file.exists() else []
+                frames += [frame for frame in (stored, df) if len(frame)]
+                df = pd.concat(frames, ignore_index=True).drop_duplicates('fixture_id', keep='last')
+                df.to_csv(self.output_file, index=False)
+                source = 'historical'
             
-            processed = self.process_fixture(fixture, stats_dict)
-            if processed:
-                all_data.append(processed)
-        
-        # Save to CSV
-        if all_data:
-            df = pd.DataFrame(all_data)
-            df.to_csv(self.output_file, index=False)
+            # Every row written now lives in this output, merged ones included
+            index.add(df['fixture_id'], source, output)
+            index.close()
+            total = len(df)
             
             logger.info(f"\n✅ Processing complete:")
-            logger.info(f"   Total fixtures: {len(all_data):,}")
-            logger.info(f"   Output file: {self.output_file}")
+            logger.info(f"   Total fixtures: {total:,}")
+            logger.info(f"   Output: {output}")
+            
+            peak_mb = peak_rss_mb()
+            if peak_mb is not None:
+                logger.info(f"   Peak memory: {peak_mb:.0f}MB")
             
             return {
                 'year': self.year,
-                'total_fixtures': len(all_data),
+                'total_fixtures': total,
                 'file': str(self.output_file)
             }
         else:
@@ -195,39 +191,70 @@ class HistoricalModelTrainer:
         """Train models on all historical data up to this year"""
         logger.info(f"\n🤖 Training models on data through {self.year}...")
         
-        # Combine all historical data
-        all_data = []
+        if self.output_format == 'parquet':
+            return self.train_models_from_store()
         
         # Get all CSV files from historical directory
-        csv_files = sorted(self.historical_dir.glob('fixtures_*.csv'))
-        
-        for csv_file in csv_files:
+        csv_files = {}
+        for csv_file in self.historical_dir.glob('fixtures_*.csv'):
             year = int(csv_file.stem.split('_')[1])
             if year <= self.year:
-                df = pd.read_csv(csv_file)
-                all_data.append(df)
-                logger.info(f"   Loaded {len(df):,} fixtures from {year}")
+                csv_files[year] = csv_file
+        
+        # Parsing is mostly C code that releases the GIL, so threads overlap the reads
+        frames = {}
+        with ThreadPoolExecutor(max_workers=min(8, len(csv_files) or 1)) as executor:
+            futures = {executor.submit(pd.read_csv, path): year for year, path in csv_files.items()}
+            for future in as_completed(futures):
+                frames[futures[future]] = future.result()
+        
+        # Combine all historical data (oldest first, independent of completion order)
+        all_data = []
+        for year in sorted(frames):
+            all_data.append(frames[year])
+            logger.info(f"   Loaded {len(frames[year]):,} fixtures from {year}")
         
         if not all_data:
             logger.error("❌ No data available for training")
             return False
         
-        # Combine all data
+        # Combine all data (date-sorted: the train/val splits are row ranges)
         combined_df = pd.concat(all_data, ignore_index=True)
+        combined_df = combined_df.sort_values(
+            'date', key=lambda d: pd.to_datetime(d, utc=True, errors='coerce'), kind='stable'
+        ).reset_index(drop=True)
         logger.info(f"\n   Total training data: {len(combined_df):,} fixtures")
         
-        # Save combined training data
+        # Save combined training data, with split definitions to match
         training_file = self.data_dir / 'processed' / 'training_data.csv'
         training_file.parent.mkdir(exist_ok=True)
         combined_df.to_csv(training_file, index=False)
+        save_splits(splits_from_config(combined_df['date']), training_file.parent / SPLITS_FILE.name)
+        
+        return self.run_training_script()
+    
+    def train_models_from_store(self):
+        """Train from the Parquet store (03 --from-store runs it through 02's feature engineering first)"""
+        seasons = read_partitioned(max_season=self.year, columns=['season'])['season']
         
-        # Run training script
+        if seasons.empty:
+            logger.error("❌ No data available for training")
+            return False
+        
+        for season, count in seasons.value_counts().sort_index().items():
+            logger.info(f"   {count:,} fixtures from {season}")
+        logger.info(f"\n   Total training data: {len(seasons):,} fixtures")
+        
+        return self.run_training_script(['--from-store', '--max-season', str(self.year)])
+    
+    def run_training_script(self, extra_args=()):
+        """Run 03_train_models.py"""
         logger.info(f"\n   Running model training...")
         train_script = Path(__file__).parent / '03_train_models.py'
         
         import subprocess
         result = subprocess.run(
-            [sys.executable, str(train_script)],
+            [sys.executable, str(train_script), *extra_args],
             capture_output=True,
             text=True
         )
@@ -288,15 +315,109 @@ class HistoricalModelTrainer:
             return False
 
 
+def downloaded_years():
+    """Years with a fixtures file and stats (compacted or journal) in the raw directory"""
+    years = []
+    for fixtures_file in RAW_DIR.glob('*_fixtures.json'):
+        year = fixtures_file.name.split('_')[0]
+        if not year.isdigit():
+            continue
+        if (RAW_DIR / f'{year}_stats.json').exists() or (RAW_DIR / f'{year}_stats.jsonl').exists():
+            years.append(int(year))
+    return sorted(years, reverse=True)
+
+
+def process_year(year, output_format='csv'):
+    """Process one downloaded year (runs inside a worker process)"""
+    trainer = HistoricalModelTrainer(year, output_format=output_format)
+    return trainer.process_all_fixtures()
+
+
+def run_multi_year_pipeline(years, output_format='csv', workers=None):
+    """Process several years across a process pool, then train once on all of them"""
+    years = sorted(set(years), reverse=True)
+    workers = min(workers or os.cpu_count() or 1, len(years))
+    
+    logger.info(f"\n{'='*60}")
+    logger.info(f"🚀 Processing {len(years)} years with {workers} workers")
+    logger.info(f"{'='*60}\n")
+    logger.info(f"Years: {', '.join(str(y) for y in years)}")
+    
+    started = datetime.now()
+    results = {}
+    # Each year writes its own CSV / season partitions, so workers never touch the same files
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(process_year, year, output_format): year for year in years}
+        for future in as_completed(futures):
+            year = futures[future]
+            try:
+                results[year] = future.result()
+            except Exception as e:
+                logger.error(f"❌ Year {year} failed: {e}")
+                results[year] = None
+    
+    elapsed = (datetime.now() - started).total_seconds()
+    processed = sorted((y for y, stats in results.items() if stats), reverse=True)
+    failed = sorted((y for y, stats in results.items() if not stats), reverse=True)
+    
+    logger.info(f"\n✅ Processed {len(processed)}/{len(years)} years in {elapsed:.1f}s")
+    for year in processed:
+        logger.info(f"   {year}: {results[year]['total_fixtures']:,} fixtures")
+    if failed:
+        logger.warning(f"⚠️  Failed years: {', '.join(str(y) for y in failed)}")
+    
+    if not processed:
+        logger.error("❌ Failed to process fixtures")
+        return False
+    
+    # Train once, through the newest year so every processed year is included
+    trainer = HistoricalModelTrainer(max(processed), output_format=output_format)
+    if not trainer.train_models():
+        logger.error("❌ Pipeline failed during training")
+        return False
+    
+    # Progress continues backwards from the oldest year processed
+    trainer.year = min(processed)
+    trainer.save_progress({
+        'years': processed,
+        'failed_years': failed,
+        'total_fixtures': sum(results[y]['total_fixtures'] for y in processed),
+    })
+    
+    logger.info(f"\n{'='*60}")
+    logger.info(f"✅ Pipeline complete!")
+    logger.info(f"{'='*60}")
+    logger.info(f"Next year to train: {trainer.year - 1}")
+    
+    return not failed
+
+
 def main():
     """Main entry point"""
     import argparse
     
     parser = argparse.ArgumentParser(description='Train Historical Models')
     parser.add_argument('--year', type=int, help='Year to train (default: from progress file)')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv',
+                        help='Write processed fixtures as fixtures_{year}.csv or into the Parquet store')
+    parser.add_argument('--years', type=int, nargs='+',
+                        help='Process several downloaded years in parallel, then train once')
+    parser.add_argument('--all-downloaded', action='store_true',
+                        help='Process every year found in data/historical/raw in parallel')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes for multi-year mode (default: CPU count)')
     
     args = parser.parse_args()
     
+    # Multi-year mode
+    if args.years or args.all_downloaded:
+        years = args.years or downloaded_years()
+        if not years:
+            logger.error("❌ No downloaded years found")
+            sys.exit(1)
+        success = run_multi_year_pipeline(years, output_format=args.format, workers=args.workers)
+        sys.exit(0 if success else 1)
+    
     # Determine year to train
     if args.year:
         year = args.year
@@ -312,7 +433,7 @@ def main():
     
     logger.info(f"🎯 Target year: {year}")
     
-    trainer = HistoricalModelTrainer(year)
+    trainer = HistoricalModelTrainer(year, output_format=args.format)
     success = trainer.run_pipeline()
     
     sys.exit(0 if success else 1)
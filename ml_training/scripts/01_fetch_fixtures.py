@@ -1,21 +1,39 @@
 """
 Daily Fixture Fetcher
 Fetches completed fixtures from API-Football and saves to CSV
+
+Usage:
+    python 01_fetch_fixtures.py                      # yesterday, bulk hydration
+    python 01_fetch_fixtures.py --date 2025-11-29
+    python 01_fetch_fixtures.py --mode per-league    # one call per league + per fixture
+
+Bulk mode pulls the whole day with one date-scoped query, filters leagues
+locally and hydrates statistics for up to 20 fixture ids per request.
+Fixtures already in the known-fixture index are skipped (--refetch to ignore it).
 """
 
 import os
 import sys
-import requests
+import logging
 import pandas as pd
 from datetime import datetime, timedelta
 from pathlib import Path
 from dotenv import load_dotenv
 
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.api_football import APIFootballClient
+from utils.fixture_index import FixtureIndex
+from utils.http_cache import ResponseCache
+from utils.normalizer import normalize_fixture, normalize_batch
+
 # Load environment variables
 load_dotenv()
 
 API_KEY = os.getenv('API_FOOTBALL_KEY')
-BASE_URL = 'https://v3.football.api-sports.io'
+
+client = APIFootballClient(API_KEY, cache=ResponseCache())
 
 # Top 30 leagues to track
 LEAGUES = [
@@ -34,180 +52,193 @@ LEAGUES = [
     71,   # Serie A Brazil
     128,  # Argentine Primera
     253,  # MLS
-    39,   # Championship
-    40,   # FA Cup
-    48,   # Copa del Rey
+    40,   # Championship
+    45,   # FA Cup
+    143,  # Copa del Rey
     81,   # DFB Pokal
     137,  # Coppa Italia
     66,   # Coupe de France
 ]
 
+# API-Football accepts at most 20 ids per /fixtures?ids= request
+MAX_IDS_PER_REQUEST = 20
+
 
 def fetch_fixtures(date: str):
     """Fetch all fixtures for a specific date"""
     fixtures = []
     
-    headers = {
-        'x-apisports-key': API_KEY
-    }
-    
     for league_id in LEAGUES:
-        try:
-            response = requests.get(
-                f'{BASE_URL}/fixtures',
-                headers=headers,
-                params={
-                    'league': league_id,
-                    'date': date,
-                    'status': 'FT'  # Only finished fixtures
-                }
-            )
-            
-            data = response.json()
-            if data.get('results', 0) > 0:
-                fixtures.extend(data['response'])
-                print(f"✅ League {league_id}: {data['results']} fixtures")
-        except Exception as e:
-            print(f"❌ Error fetching league {league_id}: {e}")
+        data = client.get('fixtures', {
+            'league': league_id,
+            'date': date,
+            'status': 'FT'  # Only finished fixtures
+        })
+        
+        if data is None:
+            print(f"❌ Error fetching league {league_id}")
+        elif data.get('results', 0) > 0:
+            fixtures.extend(data['response'])
+            print(f"✅ League {league_id}: {data['results']} fixtures")
     
     return fixtures
 
 
+def fetch_fixtures_bulk(date: str):
+    """Fetch every finished fixture for a date in one call, keeping tracked leagues"""
+    fixtures = client.get_response('fixtures', {
+        'date': date,
+        'status': 'FT'  # Only finished fixtures
+    })
+    
+    if fixtures is None:
+        print(f"❌ Error fetching fixtures for {date}")
+        return []
+    
+    tracked = set(LEAGUES)
+    kept = [f for f in fixtures if f['league']['id'] in tracked]
+    print(f"✅ {len(fixtures)} finished fixtures on {date}, {len(kept)} in tracked leagues")
+    
+    return kept
+
+
+def fetch_statistics_bulk(fixture_ids):
+    """Fetch statistics for many fixtures, MAX_IDS_PER_REQUEST ids per call"""
+    stats_by_id = {}
+    
+    for i in range(0, len(fixture_ids), MAX_IDS_PER_REQUEST):
+        batch = fixture_ids[i:i + MAX_IDS_PER_REQUEST]
+        
+        # Finished fixtures never change, so batches are cached forever - but only
+        # once every fixture in them has its statistics published
+        hydrated = client.get_response(
+            'fixtures',
+            {'ids': '-'.join(str(fixture_id) for fixture_id in batch)},
+            cache_ttl=None,
+            cache_if=lambda data: all(fixture.get('statistics') for fixture in data['response'])
+        )
+        
+        if hydrated is None:
+            print(f"❌ Error hydrating fixtures {batch[0]}..{batch[-1]}")
+            continue
+        
+        for fixture in hydrated:
+            stats_by_id[fixture['fixture']['id']] = fixture.get('statistics', [])
+    
+    return stats_by_id
+
+
 def fetch_fixture_statistics(fixture_id: int):
     """Fetch detailed statistics for a fixture"""
-    headers = {
-        'x-apisports-key': API_KEY
-    }
-    
-    try:
-        response = requests.get(
-            f'{BASE_URL}/fixtures/statistics',
-            headers=headers,
-            params={'fixture': fixture_id}
-        )
-        return response.json()['response']
-    except Exception as e:
-        print(f"❌ Error fetching stats for fixture {fixture_id}: {e}")
+    stats = client.get_response('fixtures/statistics', {'fixture': fixture_id})
+    
+    if stats is None:
+        print(f"❌ Error fetching stats for fixture {fixture_id}")
         return []
+    
+    return stats
 
 
-def extract_stat_value(stats_list, stat_type):
-    """Extract a specific stat value from statistics list"""
-    for stat in stats_list:
-        if stat['type'] == stat_type:
-            value = stat['value']
-            # Handle None or string values
-            if value is None:
-                return 0
-            if isinstance(value, str):
-                # Remove % sign if present
-                value = value.replace('%', '')
-                try:
-                    return float(value)
-                except:
-                    return 0
-            return value
-    return 0
-
-
-def process_fixture(fixture):
-    """Extract relevant data from fixture"""
+def process_fixture(fixture, stats=None):
+    """Extract relevant data from fixture (fetching its stats if not supplied)"""
     fixture_id = fixture['fixture']['id']
-    stats = fetch_fixture_statistics(fixture_id)
+    if stats is None:
+        stats = fetch_fixture_statistics(fixture_id)
     
-    if not stats or len(stats) < 2:
+    record = normalize_fixture(fixture, stats)
+    if record is None:
         print(f"⚠️  No stats for fixture {fixture_id}")
-        return None
-    
-    # Extract key metrics
-    home_stats = stats[0]['statistics']
-    away_stats = stats[1]['statistics']
-    
-    return {
-        'fixture_id': fixture_id,
-        'date': fixture['fixture']['date'],
-        'league': fixture['league']['name'],
-        'league_id': fixture['league']['id'],
-        'season': fixture['league']['season'],
-        'home_team': fixture['teams']['home']['name'],
-        'home_team_id': fixture['teams']['home']['id'],
-        'away_team': fixture['teams']['away']['name'],
-        'away_team_id': fixture['teams']['away']['id'],
-        'home_goals': fixture['goals']['home'],
-        'away_goals': fixture['goals']['away'],
-        'total_goals': fixture['goals']['home'] + fixture['goals']['away'],
-        
-        # BTTS
-        'btts': 1 if (fixture['goals']['home'] > 0 and fixture['goals']['away'] > 0) else 0,
-        
-        # Goals O/U 2.5
-        'over_2_5_goals': 1 if (fixture['goals']['home'] + fixture['goals']['away'] > 2.5) else 0,
-        
-        # Corners
-        'home_corners': extract_stat_value(home_stats, 'Corner Kicks'),
-        'away_corners': extract_stat_value(away_stats, 'Corner Kicks'),
-        'total_corners': extract_stat_value(home_stats, 'Corner Kicks') + extract_stat_value(away_stats, 'Corner Kicks'),
-        'over_9_5_corners': 1 if (extract_stat_value(home_stats, 'Corner Kicks') + extract_stat_value(away_stats, 'Corner Kicks') > 9.5) else 0,
-        
-        # Cards
-        'home_yellow_cards': extract_stat_value(home_stats, 'Yellow Cards'),
-        'away_yellow_cards': extract_stat_value(away_stats, 'Yellow Cards'),
-        'home_red_cards': extract_stat_value(home_stats, 'Red Cards'),
-        'away_red_cards': extract_stat_value(away_stats, 'Red Cards'),
-        'total_cards': (extract_stat_value(home_stats, 'Yellow Cards') + 
-                       extract_stat_value(away_stats, 'Yellow Cards') + 
-                       extract_stat_value(home_stats, 'Red Cards') + 
-                       extract_stat_value(away_stats, 'Red Cards')),
-        'over_3_5_cards': 1 if ((extract_stat_value(home_stats, 'Yellow Cards') + 
-                                 extract_stat_value(away_stats, 'Yellow Cards') + 
-                                 extract_stat_value(home_stats, 'Red Cards') + 
-                                 extract_stat_value(away_stats, 'Red Cards')) > 3.5) else 0,
-        
-        # Additional stats
-        'home_shots': extract_stat_value(home_stats, 'Total Shots'),
-        'away_shots': extract_stat_value(away_stats, 'Total Shots'),
-        'home_shots_on_target': extract_stat_value(home_stats, 'Shots on Goal'),
-        'away_shots_on_target': extract_stat_value(away_stats, 'Shots on Goal'),
-        'home_possession': extract_stat_value(home_stats, 'Ball Possession'),
-        'away_possession': extract_stat_value(away_stats, 'Ball Possession'),
-    }
+    
+    return record
 
 
 def main():
     """Main execution"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Daily Fixture Fetcher')
+    parser.add_argument('--date', help='Date to fetch, YYYY-MM-DD (default: yesterday)')
+    parser.add_argument('--mode', choices=['bulk', 'per-league'], default='bulk',
+                        help='bulk: one date query + batched ids (default); per-league: legacy per-call fetch')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the on-disk API response cache')
+    parser.add_argument('--refetch', action='store_true',
+                        help='Fetch statistics even for fixtures already in the known-fixture index')
+    args = parser.parse_args()
+    
+    # Client warnings and the API usage summary go through logging
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
+    if args.no_cache:
+        client.cache = None
+    
     # Get yesterday's date
-    yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+    yesterday = args.date or (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
     
-    print(f"\n🔄 Fetching fixtures for {yesterday}...")
+    print(f"\n🔄 Fetching fixtures for {yesterday} ({args.mode} mode)...")
     
     # Fetch fixtures
-    fixtures = fetch_fixtures(yesterday)
+    if args.mode == 'bulk':
+        fixtures = fetch_fixtures_bulk(yesterday)
+    else:
+        fixtures = fetch_fixtures(yesterday)
     print(f"\n✅ Found {len(fixtures)} completed fixtures")
     
     if not fixtures:
         print("⚠️  No fixtures found for yesterday")
         return
     
-    # Process each fixture
-    processed_data = []
-    for i, fixture in enumerate(fixtures, 1):
-        print(f"\n📊 Processing fixture {i}/{len(fixtures)}: {fixture['teams']['home']['name']} vs {fixture['teams']['away']['name']}")
-        data = process_fixture(fixture)
-        if data:
-            processed_data.append(data)
+    # Only pay for statistics of fixtures we haven't stored yet
+    index = FixtureIndex()
+    if not args.refetch:
+        new_fixtures = index.filter_new(fixtures)
+        print(f"📇 {len(fixtures) - len(new_fixtures)} already stored, {len(new_fixtures)} new")
+        fixtures = new_fixtures
+        
+        if not fixtures:
+            print("✅ Nothing new to fetch")
+            client.log_summary()
+            return
     
-    # Save to CSV
-    if processed_data:
-        df = pd.DataFrame(processed_data)
+    if args.mode == 'bulk':
+        # Hydrate statistics in batches, then normalize straight into columns
+        stats_by_id = fetch_statistics_bulk([f['fixture']['id'] for f in fixtures])
+        print(f"✅ Hydrated statistics for {len(stats_by_id)} fixtures")
         
+        columns, skipped = normalize_batch(
+            (fixture, stats_by_id.get(fixture['fixture']['id'])) for fixture in fixtures
+        )
+        if skipped:
+            print(f"⚠️  No stats for {len(skipped)} fixtures")
+        df = pd.DataFrame(columns)
+    else:
+        # Process each fixture
+        processed_data = []
+        for i, fixture in enumerate(fixtures, 1):
+            print(f"\n📊 Processing fixture {i}/{len(fixtures)}: {fixture['teams']['home']['name']} vs {fixture['teams']['away']['name']}")
+            data = process_fixture(fixture)
+            if data:
+                processed_data.append(data)
+        df = pd.DataFrame(processed_data)
+    
+    # Save to CSV
+    if not df.empty:
         # Create output directory
         output_dir = Path(__file__).parent.parent / 'data' / 'incremental'
         output_dir.mkdir(parents=True, exist_ok=True)
         
         output_file = output_dir / f'{yesterday}.csv'
+        new_ids = df['fixture_id']
+        
+        # A rerun for the same date adds to the day's file instead of replacing it
+        if output_file.exists():
+            existing = pd.read_csv(output_file)
+            existing = existing[~existing['fixture_id'].isin(new_ids)]
+            df = pd.concat([existing, df], ignore_index=True)
+        
         df.to_csv(output_file, index=False)
+        index.add(new_ids, 'incremental', output_file)
         
-        print(f"\n✅ Saved {len(df)} fixtures to {output_file}")
+        print(f"\n✅ Saved {len(new_ids)} new fixtures to {output_file} ({len(df)} total)")
         print(f"\n📊 Summary:")
         print(f"   BTTS: {df['btts'].sum()} / {len(df)} ({df['btts'].mean():.1%})")
         print(f"   Over 2.5 Goals: {df['over_2_5_goals'].sum()} / {len(df)} ({df['over_2_5_goals'].mean():.1%})")
@@ -215,6 +246,9 @@ def main():
         print(f"   Over 3.5 Cards: {df['over_3_5_cards'].sum()} / {len(df)} ({df['over_3_5_cards'].mean():.1%})")
     else:
         print("❌ No data to save")
+    
+    print()
+    client.log_summary()
 
 
 if __name__ == '__main__':
@@ -1,10 +1,19 @@
 """
 Data Processing & Feature Engineering
 Cleans new data, calculates features, and merges with training set
+
+Usage:
+    python 02_process_data.py
+    python 02_process_data.py --historical-store --seasons 2017 2018 --leagues 39
+    python 02_process_data.py --compact                 # fold daily CSVs into monthly partitions first
+    python 02_process_data.py --incremental             # only new fixtures, from the saved feature state
+    python 02_process_data.py --chunked --chunk-rows 50000   # out-of-core full rebuild
 """
 
 import os
 import sys
+import time
+import shutil
 import pandas as pd
 import numpy as np
 from pathlib import Path
@@ -13,30 +22,47 @@ from datetime import datetime
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from utils.columnar_store import HISTORICAL_STORE, read_partitioned, store_exists
+from utils.config import feature_settings
+from utils.feature_state import FeatureState
+from utils.h2h import H2H_INDEX_FILE, MEETING_COLS, HeadToHeadIndex, append_meetings
+from utils.incremental_store import INCREMENTAL_DIR, compact, iter_incremental, load_manifest, read_incremental
+from utils.memory import frame_mb, peak_rss_mb
+from utils.normalizer import RECORD_DTYPES
+from utils.parallel_read import default_workers, read_files
+from utils.rolling import group_layout, grouped_ewm_means, grouped_rolling_means
+from utils.schema import Registry, apply_schema, concat_datasets, load_dataset
+from utils.splits import DEFAULT_SPLIT, SPLITS_FILE, save_splits, split_names, splits_from_config
+from utils.targets import HALFTIME_COLS, compute_targets, target_names
+from utils.team_features import SnapshotWriter, TeamFeatureStore, append_snapshots, store_parts
 
-def load_incremental_data():
-    """Load all incremental CSV files"""
-    incremental_dir = Path(__file__).parent.parent / 'data' / 'incremental'
-    
-    if not incremental_dir.exists():
+
+# Raw files are read down to the fixture record columns every other input already has
+RAW_COLUMNS = list(RECORD_DTYPES)
+
+
+def print_file_load(name, rows, seconds):
+    """One line per loaded file"""
+    print(f"   ✅ Loaded {name}: {rows:,} fixtures in {seconds:.2f}s")
+
+
+def load_incremental_data(since=None):
+    """Load incremental fixtures via the manifest (monthly partitions + uncompacted daily CSVs)"""
+    if not INCREMENTAL_DIR.exists():
         print("⚠️  No incremental data directory found")
         return pd.DataFrame()
     
-    csv_files = list(incremental_dir.glob('*.csv'))
-    
-    if not csv_files:
-        print("⚠️  No incremental CSV files found")
-        return pd.DataFrame()
+    partitions = load_manifest()['partitions']
+    if partitions:
+        rows = sum(entry['rows'] for entry in partitions.values())
+        print(f"📂 Manifest lists {len(partitions)} monthly partitions ({rows:,} fixtures)")
     
-    print(f"📂 Found {len(csv_files)} incremental files")
+    combined = read_incremental(since=since, report=print_file_load)
     
-    dfs = []
-    for csv_file in csv_files:
-        df = pd.read_csv(csv_file)
-        dfs.append(df)
-        print(f"   ✅ Loaded {csv_file.name}: {len(df)} fixtures")
+    if combined.empty:
+        print("⚠️  No incremental data found")
+        return combined
     
-    combined = pd.concat(dfs, ignore_index=True)
     print(f"\n✅ Total incremental fixtures: {len(combined)}")
     
     return combined
@@ -50,125 +76,319 @@ def load_raw_data():
         print("⚠️  No raw data directory found")
         return pd.DataFrame()
     
-    csv_files = list(raw_dir.glob('*.csv'))
+    csv_files = sorted(raw_dir.glob('*.csv'))
     
     if not csv_files:
         print("⚠️  No raw CSV files found")
         return pd.DataFrame()
     
-    print(f"📂 Found {len(csv_files)} raw files")
+    workers = default_workers(len(csv_files))
+    print(f"📂 Found {len(csv_files)} raw files (reading with {workers} threads)")
     
+    registry = Registry.load()
     dfs = []
-    for csv_file in csv_files:
-        try:
-            df = pd.read_csv(csv_file)
-            dfs.append(df)
-            print(f"   ✅ Loaded {csv_file.name}: {len(df)} fixtures")
-        except Exception as e:
-            print(f"   ❌ Error loading {csv_file.name}: {e}")
+    start = time.perf_counter()
+    for csv_file, df, error, seconds in read_files(
+        csv_files, lambda path: load_dataset(path, columns=RAW_COLUMNS, registry=registry), workers
+    ):
+        if error is not None:
+            print(f"   ❌ Error loading {csv_file.name}: {error}")
+            continue
+        dfs.append(df)
+        print_file_load(csv_file.name, len(df), seconds)
     
     if not dfs:
         return pd.DataFrame()
     
-    combined = pd.concat(dfs, ignore_index=True)
-    print(f"\n✅ Total raw fixtures: {len(combined)}")
+    combined = concat_datasets(dfs)
+    print(f"\n✅ Total raw fixtures: {len(combined)} ({frame_mb(combined):.1f} MB in memory, "
+          f"read in {time.perf_counter() - start:.2f}s)")
     
     return combined
 
 
-def clean_data(df):
+# (feature, value column) for league-wide averages
+LEAGUE_FEATURES = [
+    ('league_avg_goals', 'total_goals'),
+    ('league_avg_corners', 'total_corners'),
+    ('league_avg_cards', 'total_cards'),
+]
+
+
+def rolling_feature_specs(df):
+    """(stat, home value column, away value column) for each team rolling stat the data supports"""
+    specs = []
+    
+    if 'home_team_id' in df.columns and 'away_team_id' in df.columns:
+        # Goals scored and conceded
+        specs.append(('goals', 'home_goals', 'away_goals'))
+        specs.append(('conceded', 'away_goals', 'home_goals'))
+        
+        # Corners
+        if 'home_corners' in df.columns or 'away_corners' in df.columns:
+            specs.append(('corners', 'home_corners', 'away_corners'))
+        
+        # Cards
+        if 'home_yellow_cards' in df.columns or 'away_yellow_cards' in df.columns:
+            specs.append(('cards', 'home_yellow_cards', 'away_yellow_cards'))
+    
+    return specs
+
+
+def team_match_table(df, specs):
+    """Long view of fixtures: two rows per fixture (home team, then away team), one column per stat
+
+    Row 2*i is fixture i's home team and row 2*i+1 its away team, so a date-sorted
+    frame gives every team its matches in date order, home and away together.
+    """
+    def interleave(home, away):
+        values = np.empty(2 * len(df))
+        values[0::2] = home
+        values[1::2] = away
+        return values
+    
+    def column(name):
+        return df[name].to_numpy(dtype=float) if name in df.columns else np.full(len(df), np.nan)
+    
+    long = pd.DataFrame({'team_id': interleave(column('home_team_id'), column('away_team_id'))})
+    for stat, home_col, away_col in specs:
+        long[stat] = interleave(column(home_col), column(away_col))
+    
+    return long
+
+
+def rolling_feature_columns(stat, window_means, ewm_means, settings):
+    """Feature columns for one stat: {stat}_l{window}, {stat}_ewm{span}, then {stat}_momentum
+
+    Momentum is the shortest window minus the longest, when the momentum group is on.
+    """
+    windows, spans = settings['rolling_windows'], settings['ewm_spans']
+    columns = {f'{stat}_l{window}': means for window, means in zip(windows, window_means)}
+    columns.update({f'{stat}_ewm{span}': means for span, means in zip(spans, ewm_means)})
+    
+    if 'momentum' in settings['groups'] and len(windows) > 1:
+        columns[f'{stat}_momentum'] = window_means[0] - window_means[-1]
+    
+    return columns
+
+
+def pivot_team_features(team_features, index):
+    """Team-match feature arrays back onto fixtures as home_* and away_* columns"""
+    columns = {}
+    for side, start in [('home', 0), ('away', 1)]:
+        for name, values in team_features.items():
+            columns[f'{side}_{name}'] = values[start::2]
+    return pd.DataFrame(columns, index=index)
+
+
+def load_historical_store(seasons=None, league_ids=None):
+    """Load historical fixtures from the Parquet store (only the requested partitions)"""
+    if not store_exists():
+        print("⚠️  No historical Parquet store found")
+        return pd.DataFrame()
+    
+    df = read_partitioned(seasons=seasons, league_ids=league_ids)
+    print(f"📂 Loaded {len(df):,} historical fixtures from {HISTORICAL_STORE}")
+    
+    return df
+
+
+def clean_data(df, verbose=True):
     """Clean and validate data"""
-    print("\n🧹 Cleaning data...")
+    if verbose:
+        print("\n🧹 Cleaning data...")
     
     initial_count = len(df)
     
     # Remove duplicates
     df = df.drop_duplicates(subset=['fixture_id'], keep='last')
-    print(f"   Removed {initial_count - len(df)} duplicates")
+    if verbose:
+        print(f"   Removed {initial_count - len(df)} duplicates")
     
     # Remove rows with missing critical data
     critical_cols = ['home_goals', 'away_goals', 'total_goals']
     df = df.dropna(subset=critical_cols)
-    print(f"   Removed {initial_count - len(df)} rows with missing critical data")
-    
-    # Ensure target columns exist
-    if 'btts' not in df.columns:
-        df['btts'] = ((df['home_goals'] > 0) & (df['away_goals'] > 0)).astype(int)
-    
-    if 'over_2_5_goals' not in df.columns:
-        df['over_2_5_goals'] = (df['total_goals'] > 2.5).astype(int)
-    
-    if 'over_9_5_corners' not in df.columns and 'total_corners' in df.columns:
-        df['over_9_5_corners'] = (df['total_corners'] > 9.5).astype(int)
-    
-    if 'over_3_5_cards' not in df.columns and 'total_cards' in df.columns:
-        df['over_3_5_cards'] = (df['total_cards'] > 3.5).astype(int)
-    
-    # Fill missing values
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    if verbose:
+        print(f"   Removed {initial_count - len(df)} rows with missing critical data")
+    
+    # Ensure production target columns exist (computed only where the source data lacks them,
+    # e.g. raw rows concatenated with incremental rows that carry the column)
+    missing_targets = [
+        name for name in target_names('production') if name not in df.columns or df[name].isna().any()
+    ]
+    if missing_targets:
+        for name, values in compute_targets(df, missing_targets).items():
+            if name in df.columns:
+                values = pd.to_numeric(df[name], errors='coerce').fillna(values.astype(float))
+            df[name] = values.fillna(0).astype(int)
+    
+    # Fill missing values (halftime scores stay missing for the HT/FT targets)
+    numeric_cols = [col for col in df.select_dtypes(include=[np.number]).columns if col not in HALFTIME_COLS]
     df[numeric_cols] = df[numeric_cols].fillna(0)
     
-    print(f"✅ Cleaned data: {len(df)} fixtures remaining")
+    if verbose:
+        print(f"✅ Cleaned data: {len(df)} fixtures remaining")
     
     return df
 
 
+def sort_by_date(df):
+    """Parse dates and order fixtures chronologically (fixture_id breaks ties)"""
+    df['date'] = pd.to_datetime(df['date'])
+    keys = ['date', 'fixture_id'] if 'fixture_id' in df.columns else ['date']
+    return df.sort_values(keys, kind='stable')
+
+
+def add_match_features(df):
+    """Match-level features"""
+    df['goal_difference'] = df['home_goals'] - df['away_goals']
+    df['total_shots'] = df.get('home_shots', 0) + df.get('away_shots', 0)
+    df['shots_on_target_ratio'] = (
+        (df.get('home_shots_on_target', 0) + df.get('away_shots_on_target', 0)) / 
+        (df['total_shots'] + 1)  # +1 to avoid division by zero
+    )
+    return df
+
+
+def add_h2h_features(df, index, lookback, later=None):
+    """Head-to-head features from each pair's last `lookback` meetings before the fixture"""
+    features = index.features(df['home_team_id'], df['away_team_id'], df['date'], lookback, later=later)
+    return pd.concat([df, features.set_index(df.index)], axis=1)
+
+
 def engineer_features(df):
     """Calculate advanced features"""
     print("\n🔧 Engineering features...")
     
     # Sort by date
     if 'date' in df.columns:
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.sort_values('date')
+        df = sort_by_date(df)
     
-    # Team-based rolling averages (last 5 matches)
-    for team_type in ['home', 'away']:
-        team_col = f'{team_type}_team_id'
-        
-        if team_col in df.columns:
-            # Goals scored
-            df[f'{team_type}_goals_l5'] = df.groupby(team_col)[f'{team_type}_goals'].transform(
-                lambda x: x.rolling(5, min_periods=1).mean()
-            )
-            
-            # Goals conceded
-            opponent_goals = 'away_goals' if team_type == 'home' else 'home_goals'
-            df[f'{team_type}_conceded_l5'] = df.groupby(team_col)[opponent_goals].transform(
-                lambda x: x.rolling(5, min_periods=1).mean()
-            )
-            
-            # Corners
-            if f'{team_type}_corners' in df.columns:
-                df[f'{team_type}_corners_l5'] = df.groupby(team_col)[f'{team_type}_corners'].transform(
-                    lambda x: x.rolling(5, min_periods=1).mean()
-                )
-            
-            # Cards
-            if f'{team_type}_yellow_cards' in df.columns:
-                df[f'{team_type}_cards_l5'] = df.groupby(team_col)[f'{team_type}_yellow_cards'].transform(
-                    lambda x: x.rolling(5, min_periods=1).mean()
-                )
+    # Team-based rolling and exponentially weighted averages over each team's home and away
+    # matches: one sort of the team-match table, shared by every stat, window and span
+    settings = feature_settings()
+    specs = rolling_feature_specs(df)
+    long = team_match_table(df, specs)
+    
+    keys = long['team_id'].to_numpy()
+    values = long[[stat for stat, _, _ in specs]].to_numpy(dtype=float)
+    layout = group_layout(keys)
+    
+    window_means = grouped_rolling_means(keys, values, settings['rolling_windows'], layout=layout)
+    ewm_means = grouped_ewm_means(keys, values, settings['ewm_spans'], layout=layout)
+    
+    team_features = {}
+    for i, (stat, _, _) in enumerate(specs):
+        team_features.update(rolling_feature_columns(
+            stat,
+            [window_means[window][:, i] for window in settings['rolling_windows']],
+            [ewm_means[span][:, i] for span in settings['ewm_spans']],
+            settings,
+        ))
+    
+    df = pd.concat([df, pivot_team_features(team_features, df.index)], axis=1)
     
     # Match-level features
-    df['goal_difference'] = df['home_goals'] - df['away_goals']
-    df['total_shots'] = df.get('home_shots', 0) + df.get('away_shots', 0)
-    df['shots_on_target_ratio'] = (
-        (df.get('home_shots_on_target', 0) + df.get('away_shots_on_target', 0)) / 
-        (df['total_shots'] + 1)  # +1 to avoid division by zero
-    )
+    df = add_match_features(df)
     
     # League-based features
     if 'league_id' in df.columns:
-        df['league_avg_goals'] = df.groupby('league_id')['total_goals'].transform('mean')
-        df['league_avg_corners'] = df.groupby('league_id')['total_corners'].transform('mean')
-        df['league_avg_cards'] = df.groupby('league_id')['total_cards'].transform('mean')
+        for feature, value_col in LEAGUE_FEATURES:
+            df[feature] = df.groupby('league_id')[value_col].transform('mean')
+    
+    # Head-to-head features (earlier meetings only)
+    if 'h2h_analysis' in settings['groups']:
+        df = add_h2h_features(df, HeadToHeadIndex.from_fixtures(df), settings['h2h_lookback'])
+    
+    print(f"✅ Feature engineering complete")
+    
+    return df
+
+
+def engineer_features_incremental(df, state, h2h_index=None, add_league_values=True, new_meetings=None):
+    """Features for new fixtures only, continuing each team's saved rolling window
+
+    h2h_index must already include the new fixtures, unless new_meetings (an
+    index of just the new fixtures, all later than h2h_index's) is given.
+    add_league_values=False when the state's league sums already cover them
+    (chunked mode's first pass).
+    """
+    print(f"\n🔧 Engineering features for {len(df)} new fixtures...")
+    
+    df = sort_by_date(df).reset_index(drop=True)
+    
+    # League averages cover every fixture seen so far, new ones included (as in a full run)
+    if add_league_values and 'league_id' in df.columns:
+        for feature, value_col in LEAGUE_FEATURES:
+            state.add_league_values(feature, df['league_id'], df[value_col])
+    
+    # Team-based rolling and exponentially weighted averages, continuing each team's saved state
+    settings = feature_settings()
+    specs = rolling_feature_specs(df)
+    long = team_match_table(df, specs)
+    
+    team_features = {}
+    for stat, _, _ in specs:
+        window_means, ewm_means = state.advance(stat, long['team_id'], long[stat])
+        team_features.update(rolling_feature_columns(
+            stat,
+            [window_means[window] for window in settings['rolling_windows']],
+            [ewm_means[span] for span in settings['ewm_spans']],
+            settings,
+        ))
+    
+    df = pd.concat([df, pivot_team_features(team_features, df.index)], axis=1)
+    
+    # Match-level features
+    df = add_match_features(df)
+    
+    if 'league_id' in df.columns:
+        for feature, _ in LEAGUE_FEATURES:
+            means = {league_id: state.league_mean(feature, league_id) for league_id in df['league_id'].unique()}
+            df[feature] = df['league_id'].map(means)
+    
+    if h2h_index is not None:
+        df = add_h2h_features(df, h2h_index, settings['h2h_lookback'], later=new_meetings)
     
     print(f"✅ Feature engineering complete")
     
     return df
 
 
+def save_feature_state(df):
+    """Save per-team rolling windows and league sums for the next incremental run"""
+    settings = feature_settings()
+    specs = rolling_feature_specs(df)
+    
+    # The team-match table with each row's EWM means, read back from the pivoted columns
+    long = team_match_table(df, specs)
+    for stat, _, _ in specs:
+        for span in settings['ewm_spans']:
+            name = f'{stat}_ewm{span}'
+            long[name] = team_match_table(df, [(name, f'home_{name}', f'away_{name}')])[name]
+    
+    state = FeatureState.from_frame(
+        df, long, [stat for stat, _, _ in specs], LEAGUE_FEATURES,
+        windows=settings['rolling_windows'], ewm_spans=settings['ewm_spans'],
+    )
+    state.save()
+    print(f"💾 Saved feature state for {len(df):,} fixtures")
+
+
+def save_team_features(df):
+    """Write each team's features after every match to the point-in-time team feature store"""
+    store = TeamFeatureStore.from_processed(df)
+    store.save()
+    print(f"🗃️  Team feature store: {len(store):,} team-match rows")
+
+
+def save_h2h_index(df):
+    """Save every fixture as a head-to-head meeting for later incremental runs and today's fixtures"""
+    index = HeadToHeadIndex.from_fixtures(df)
+    index.save()
+    print(f"🤝 Head-to-head index: {len(index):,} meetings, {len(index.pairs):,} team pairs")
+
+
 def save_processed_data(df):
     """Save processed data"""
     processed_dir = Path(__file__).parent.parent / 'data' / 'processed'
@@ -180,33 +400,316 @@ def save_processed_data(df):
     print(f"\n✅ Saved training data: {training_file}")
     print(f"   Total fixtures: {len(df):,}")
     
-    # Create validation split (last 20% by date)
+    # Train/val splits (rows are in date order) as row ranges over that one file
     if 'date' in df.columns:
-        df = df.sort_values('date')
-        split_idx = int(len(df) * 0.8)
+        save_split_definitions(df['date'], processed_dir)
+
+
+def save_split_definitions(dates, processed_dir):
+    """Write splits.json for the processed dataset, dropping train/val copies from older runs"""
+    splits = splits_from_config(dates)
+    save_splits(splits, processed_dir / SPLITS_FILE.name)
+    
+    for name in ['train_split.csv', 'val_split.csv']:
+        (processed_dir / name).unlink(missing_ok=True)
+    
+    holdout = splits['splits'][DEFAULT_SPLIT]
+    print(f"   Training split: {holdout['train'][1]:,} fixtures")
+    print(f"   Validation split: {splits['rows'] - holdout['val'][0]:,} fixtures")
+    print(f"✂️  Saved {len(splits['splits'])} splits: {', '.join(split_names(splits))}")
+
+
+def append_processed_data(df, state):
+    """Append newly processed fixtures to the training data (they join the open-ended validation ranges)"""
+    processed_dir = Path(__file__).parent.parent / 'data' / 'processed'
+    
+    # Same columns, same order as the full dataset
+    df = df.reindex(columns=state.columns)
+    
+    path = processed_dir / 'training_data.csv'
+    df.to_csv(path, mode='a', header=not path.exists(), index=False)
+    
+    print(f"\n✅ Appended {len(df):,} fixtures to training_data.csv")
+
+
+def run_incremental(state, since=None):
+    """Process only fixtures not yet in the processed dataset (False if a full rebuild is needed instead)"""
+    # Partitions older than the last processed month hold nothing new
+    since = since or (state.last_date[:7] if state.last_date else None)
+    incremental_df = load_incremental_data(since)
+    
+    if incremental_df.empty:
+        print("✅ No incremental data - nothing to do")
+        return True
+    
+    new_df = incremental_df[~incremental_df['fixture_id'].isin(state.fixture_ids)]
+    print(f"📇 {len(incremental_df) - len(new_df):,} already processed, {len(new_df):,} new")
+    
+    if new_df.empty:
+        print("✅ Processed data is up to date")
+        return True
+    
+    new_df = clean_data(new_df)
+    
+    # Appended rows must come after everything processed: the splits are row ranges
+    # and the rolling state only moves forward in time
+    earliest = pd.to_datetime(new_df['date']).min()
+    if state.last_date and earliest < pd.Timestamp(state.last_date):
+        print(f"⚠️  New fixtures from {earliest} predate the processed data "
+              f"(up to {state.last_date}) - running a full rebuild\n")
+        return False
+    
+    # Saved meetings are queried as they are; only the new fixtures get indexed
+    h2h_index, new_meetings = None, None
+    if 'h2h_analysis' in feature_settings()['groups']:
+        h2h_index = HeadToHeadIndex.load() or HeadToHeadIndex(pd.DataFrame(columns=MEETING_COLS))
+        new_meetings = HeadToHeadIndex.from_fixtures(new_df)
+    
+    new_df = engineer_features_incremental(new_df, state, h2h_index, new_meetings=new_meetings)
+    
+    append_processed_data(new_df, state)
+    
+    if store_parts():
+        rows = append_snapshots(new_df)
+        print(f"🗃️  Team feature store: +{rows:,} team-match rows")
+    else:
+        print("⚠️  No team feature store yet - rebuild it with: python -m utils.team_features --rebuild")
+    
+    state.add_fixtures(new_df['fixture_id'])
+    state.last_date = max(filter(None, [state.last_date, str(new_df['date'].max())]))
+    state.save()
+    if new_meetings is not None:
+        append_meetings(new_df)
+    registry = Registry.load()
+    if registry.update(new_df).changed:
+        registry.save()
+    
+    print(f"   Date range: {new_df['date'].min()} to {new_df['date'].max()}")
+    print("\n✅ Incremental processing complete!")
+    return True
+
+
+CHUNK_ROWS = 100_000
+
+
+def raw_chunks(chunk_rows, historical_store=False, seasons=None, leagues=None, incremental_since=None):
+    """Yield (source name, fixtures) pieces of at most chunk_rows from every input, never all at once"""
+    registry = Registry.load()
+    raw_dir = Path(__file__).parent.parent / 'data' / 'raw'
+    
+    for csv_file in sorted(raw_dir.glob('*.csv')) if raw_dir.exists() else []:
+        for part in pd.read_csv(csv_file, chunksize=chunk_rows, usecols=lambda col: col in RECORD_DTYPES):
+            yield csv_file.name, apply_schema(part, registry)
+    
+    # One season at a time from the Parquet store
+    if historical_store and store_exists():
+        store_seasons = sorted(int(path.name.split('=')[1]) for path in HISTORICAL_STORE.glob('season=*'))
+        for season in store_seasons:
+            if seasons and season not in seasons:
+                continue
+            yield f'store season {season}', read_partitioned(seasons=[season], league_ids=leagues)
+    
+    # Incremental data one monthly partition (or daily file) at a time
+    if INCREMENTAL_DIR.exists():
+        for name, df in iter_incremental(since=incremental_since):
+            yield f'incremental {name}', df
+
+
+def partition_by_month(chunks, chunk_dir):
+    """Spill fixtures into one folder of Parquet pieces per month; returns rows per month and all columns"""
+    if chunk_dir.exists():
+        shutil.rmtree(chunk_dir)
+    
+    rows_by_month = {}
+    columns = []
+    piece = 0
+    
+    for source, df in chunks:
+        if df.empty:
+            continue
+        print(f"   📦 {source}: {len(df):,} fixtures")
+        columns.extend(col for col in df.columns if col not in columns)
         
-        train_df = df.iloc[:split_idx]
-        val_df = df.iloc[split_idx:]
+        # Fixtures without a parseable date sort last, as in a full run
+        months = pd.to_datetime(df['date'], errors='coerce', utc=True).dt.strftime('%Y-%m').fillna('9999-99')
+        for month, part in df.groupby(months.to_numpy(), sort=False):
+            month_dir = chunk_dir / month
+            month_dir.mkdir(parents=True, exist_ok=True)
+            # Categoricals would differ between pieces; plain values concatenate cleanly later
+            part = part.astype({col: str for col in part.columns if isinstance(part[col].dtype, pd.CategoricalDtype)})
+            part.to_parquet(month_dir / f'{piece:06d}.parquet', engine='pyarrow', index=False)
+            rows_by_month[month] = rows_by_month.get(month, 0) + len(part)
+            piece += 1
+    
+    return rows_by_month, columns
+
+
+def month_batches(rows_by_month, chunk_rows):
+    """Consecutive months grouped into batches of about chunk_rows fixtures (a month is never split)"""
+    batch, rows = [], 0
+    for month in sorted(rows_by_month):
+        batch.append(month)
+        rows += rows_by_month[month]
+        if rows >= chunk_rows:
+            yield batch
+            batch, rows = [], 0
+    if batch:
+        yield batch
+
+
+def cleaned_batches(chunk_dir, rows_by_month, chunk_rows, columns, verbose=True):
+    """(months, cleaned fixtures) per batch of spilled months, each fixture in the first batch that has it"""
+    seen = set()
+    for months in month_batches(rows_by_month, chunk_rows):
+        pieces = [pd.read_parquet(path) for month in months for path in sorted((chunk_dir / month).glob('*.parquet'))]
+        df = pd.concat(pieces, ignore_index=True).reindex(columns=columns)
         
-        train_file = processed_dir / 'train_split.csv'
-        val_file = processed_dir / 'val_split.csv'
+        # Duplicates within the batch: the later source wins, as in a full run; earlier batches keep theirs
+        df = df.drop_duplicates(subset=['fixture_id'], keep='last')
+        df = df[~df['fixture_id'].isin(seen)]
+        if df.empty:
+            continue
         
-        train_df.to_csv(train_file, index=False)
-        val_df.to_csv(val_file, index=False)
+        if verbose:
+            print(f"\n🗓️  {months[0]} to {months[-1]}")
+        df = clean_data(df, verbose)
+        seen.update(int(i) for i in df['fixture_id'])
+        yield months, df
+
+
+def run_chunked(chunk_rows, historical_store=False, seasons=None, leagues=None, incremental_since=None):
+    """Out-of-core full rebuild: date-ordered chunks, team state carried across chunk boundaries
+
+    Inputs are first spilled to monthly Parquet pieces, then processed a batch
+    of months at a time through the incremental feature path, so peak memory
+    follows chunk_rows (and the largest month), not the size of the history.
+    League averages are whole-dataset means as in a full run, so a first pass
+    over the batches sums each league before any features are written.
+    """
+    processed_dir = Path(__file__).parent.parent / 'data' / 'processed'
+    chunk_dir = processed_dir / 'chunks'
+    training_file = processed_dir / 'training_data.csv'
+    
+    print(f"📂 Partitioning inputs by month ({chunk_rows:,} rows per read)...")
+    rows_by_month, columns = partition_by_month(
+        raw_chunks(chunk_rows, historical_store, seasons, leagues, incremental_since), chunk_dir
+    )
+    if not rows_by_month:
+        print("❌ No data found!")
+        return
+    print(f"\n✅ {sum(rows_by_month.values()):,} fixtures in {len(rows_by_month)} months")
+    
+    settings = feature_settings()
+    state = FeatureState(windows=settings['rolling_windows'], ewm_spans=settings['ewm_spans'])
+    h2h_index = HeadToHeadIndex(pd.DataFrame(columns=MEETING_COLS)) if 'h2h_analysis' in settings['groups'] else None
+    registry = Registry.load()
+    snapshots = SnapshotWriter()
+    training_file.unlink(missing_ok=True)
+    dates = []
+    total = 0
+    
+    print("\n📊 Summing league averages over every batch (first pass)...")
+    for _, df in cleaned_batches(chunk_dir, rows_by_month, chunk_rows, columns, verbose=False):
+        if 'league_id' in df.columns:
+            for feature, value_col in LEAGUE_FEATURES:
+                state.add_league_values(feature, df['league_id'], df[value_col])
+    
+    for months, df in cleaned_batches(chunk_dir, rows_by_month, chunk_rows, columns):
+        if h2h_index is not None:
+            h2h_index = h2h_index.extend(df)
+        df = engineer_features_incremental(df, state, h2h_index, add_league_values=False)
+        
+        # Every batch has the same input columns, so the first batch fixes the output layout
+        if not state.columns:
+            state.columns = list(df.columns)
+        df = df.reindex(columns=state.columns)
+        df.to_csv(training_file, mode='a', header=total == 0, index=False)
+        dates.append(df['date'])
+        snapshots.write(df)
+        registry.update(df)
+        
+        state.add_fixtures(df['fixture_id'])
+        state.last_date = str(df['date'].max())
+        total += len(df)
         
-        print(f"   Training split: {len(train_df):,} fixtures")
-        print(f"   Validation split: {len(val_df):,} fixtures")
+        peak = peak_rss_mb()
+        if peak is not None:
+            print(f"   {total:,} fixtures written, peak memory {peak:.0f} MB")
+    
+    snapshots.close()
+    shutil.rmtree(chunk_dir)
+    
+    print(f"\n✅ Saved training data: {training_file}")
+    print(f"   Total fixtures: {total:,}")
+    if dates:
+        save_split_definitions(pd.concat(dates, ignore_index=True), processed_dir)
+    
+    state.save()
+    if h2h_index is not None:
+        h2h_index.save()
+    registry.save()
+    print(f"💾 Saved feature state, team feature store ({snapshots.rows:,} rows) and registry")
+    
+    peak = peak_rss_mb()
+    if peak is not None:
+        print(f"   Peak memory: {peak:.0f} MB")
+    print("\n✅ Chunked data processing complete!")
 
 
 def main():
     """Main execution"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Process data and engineer features')
+    parser.add_argument('--historical-store', action='store_true',
+                        help='Also load historical fixtures from the Parquet store')
+    parser.add_argument('--seasons', type=int, nargs='+', help='Store: only these seasons')
+    parser.add_argument('--leagues', type=int, nargs='+', help='Store: only these league ids')
+    parser.add_argument('--compact', action='store_true',
+                        help='Compact daily incremental CSVs into monthly partitions before loading')
+    parser.add_argument('--incremental-since', help='Only load incremental partitions from this month (YYYY-MM)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only process new incremental fixtures, appending them to the processed dataset')
+    parser.add_argument('--chunked', action='store_true',
+                        help='Full rebuild out of core, in date-ordered chunks (bounded memory)')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help='Fixtures per chunk in --chunked mode')
+    args = parser.parse_args()
+    
     print("🔄 Starting data processing pipeline...\n")
     
+    if args.compact:
+        changed = compact()
+        print(f"🗜️  Compacted incremental data: {len(changed)} months updated\n")
+    
+    if args.incremental:
+        settings = feature_settings()
+        state = FeatureState.load()
+        h2h_ready = 'h2h_analysis' not in settings['groups'] or H2H_INDEX_FILE.exists()
+        if state is not None and state.matches(settings['rolling_windows'], settings['ewm_spans']) and h2h_ready:
+            if run_incremental(state, args.incremental_since):
+                return
+        elif state is None:
+            print("⚠️  No saved feature state - running a full rebuild\n")
+        elif not h2h_ready:
+            print("⚠️  No saved head-to-head index - running a full rebuild\n")
+        else:
+            print("⚠️  Rolling windows or EWM spans changed in the config - running a full rebuild\n")
+    
+    if args.chunked:
+        run_chunked(args.chunk_rows, args.historical_store, args.seasons, args.leagues, args.incremental_since)
+        return
+    
     # Load raw data (your 100k dataset)
     raw_df = load_raw_data()
     
+    # Historical fixtures from the Parquet store count as raw data
+    if args.historical_store:
+        store_df = load_historical_store(args.seasons, args.leagues)
+        if not store_df.empty:
+            raw_df = pd.concat([raw_df, store_df], ignore_index=True)
+    
     # Load incremental data (daily updates)
-    incremental_df = load_incremental_data()
+    incremental_df = load_incremental_data(args.incremental_since)
     
     # Combine datasets
     if not raw_df.empty and not incremental_df.empty:
@@ -230,6 +733,10 @@ def main():
     
     # Save processed data
     save_processed_data(df)
+    save_feature_state(df)
+    save_team_features(df)
+    save_h2h_index(df)
+    Registry.load().update(df).save()
     
     # Print summary statistics
     print("\n📊 Dataset Summary:")
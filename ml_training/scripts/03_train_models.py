@@ -1,13 +1,19 @@
 """
 Model Training Script
 Trains 4 LM babies (BTTS, Goals, Corners, Cards) with XGBoost
+
+Usage:
+    python 03_train_models.py                                  # processed data, holdout split
+    python 03_train_models.py --split walk_forward_2           # another split from splits.json
+    python 03_train_models.py --from-store --max-season 2018   # Parquet store, processed by 02 first
+    python 03_train_models.py --from-store --seasons 2017 2018 --leagues 39 140
 """
 
 import os
 import sys
 import json
 import pickle
-import pandas as pd
+import subprocess
 import numpy as np
 from pathlib import Path
 from datetime import datetime
@@ -19,13 +25,23 @@ warnings.filterwarnings('ignore')
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from utils.columnar_store import read_partitioned
+from utils.memory import frame_mb
+from utils.schema import Registry
+from utils.splits import DEFAULT_SPLIT, load_split, split_dir
+from utils.targets import HALFTIME_COLS, attach_targets, target_label, target_names
+from utils.team_features import attach_store_features
+
 
 class LMTrainer:
     """Trains the 4 LM babies"""
     
-    def __init__(self):
-        self.models_dir = Path(__file__).parent.parent / 'models'
-        self.models_dir.mkdir(exist_ok=True)
+    def __init__(self, split=DEFAULT_SPLIT):
+        # Named train/val split (splits.json)
+        self.split = split
+        
+        self.models_dir = split_dir(Path(__file__).parent.parent / 'models', split)
+        self.models_dir.mkdir(parents=True, exist_ok=True)
         
         self.models = {}
         self.metrics = {}
@@ -46,31 +62,21 @@ class LMTrainer:
     
     def load_data(self):
         """Load processed training data"""
-        processed_dir = Path(__file__).parent.parent / 'data' / 'processed'
-        
-        train_file = processed_dir / 'train_split.csv'
-        val_file = processed_dir / 'val_split.csv'
-        
-        if not train_file.exists() or not val_file.exists():
-            # Fallback to full training data
-            full_file = processed_dir / 'training_data.csv'
-            if not full_file.exists():
-                raise FileNotFoundError("No processed data found! Run 02_process_data.py first")
-            
-            print("⚠️  Using full dataset (no train/val split found)")
-            df = pd.read_csv(full_file)
-            
-            # Create 80/20 split
-            split_idx = int(len(df) * 0.8)
-            train_df = df.iloc[:split_idx]
-            val_df = df.iloc[split_idx:]
+        full_file = Path(__file__).parent.parent / 'data' / 'processed' / 'training_data.csv'
+        if not full_file.exists():
+            raise FileNotFoundError("No processed data found! Run 02_process_data.py first")
+        
+        train_df, val_df = load_split(self.split, path=full_file, registry=Registry.load())
+        (train_df, val_df), store = attach_store_features([train_df, val_df])
+        if store is None:
+            print("⚠️  No team feature store - using the team features in training_data.csv")
         else:
-            train_df = pd.read_csv(train_file)
-            val_df = pd.read_csv(val_file)
+            print(f"🗃️  Team features as of kickoff from the store ({len(store.features)} per side)")
         
-        print(f"✅ Loaded data:")
+        print(f"✅ Loaded data ({self.split} split):")
         print(f"   Training: {len(train_df):,} fixtures")
         print(f"   Validation: {len(val_df):,} fixtures")
+        print(f"   Memory: {frame_mb(train_df) + frame_mb(val_df):.1f} MB")
         
         return train_df, val_df
     
@@ -80,13 +86,15 @@ class LMTrainer:
         exclude_cols = [
             'fixture_id', 'date', 'league', 'league_id', 'season',
             'home_team', 'home_team_id', 'away_team', 'away_team_id',
-            'btts', 'over_2_5_goals', 'over_9_5_corners', 'over_3_5_cards'
-        ]
+        ] + target_names() + HALFTIME_COLS
         
         feature_cols = [col for col in df.columns if col not in exclude_cols]
         
+        # Fixtures without a label (missing inputs) are left out rather than counted as 0
+        df = df[df[target_col].notna()]
+        
         X = df[feature_cols].fillna(0)
-        y = df[target_col].fillna(0).astype(int)
+        y = df[target_col].astype(int)
         
         return X, y, feature_cols
     
@@ -149,7 +157,8 @@ class LMTrainer:
             'feature_cols': feature_cols,
             'metrics': metrics,
             'trained_at': datetime.now().isoformat(),
-            'model_params': self.model_params
+            'model_params': self.model_params,
+            'split': self.split
         }
         
         with open(model_file, 'wb') as f:
@@ -165,12 +174,9 @@ class LMTrainer:
         train_df, val_df = self.load_data()
         
         # Define targets
-        targets = {
-            'btts': 'BTTS (Both Teams To Score)',
-            'over_2_5_goals': 'Over 2.5 Goals',
-            'over_9_5_corners': 'Over 9.5 Corners',
-            'over_3_5_cards': 'Over 3.5 Cards'
-        }
+        targets = {name: target_label(name) for name in target_names('production')}
+        train_df = attach_targets(train_df, list(targets))
+        val_df = attach_targets(val_df, list(targets))
         
         # Train each model
         for target_col, display_name in targets.items():
@@ -252,9 +258,42 @@ class LMTrainer:
         print()
 
 
+def process_store(seasons=None, leagues=None, max_season=None):
+    """Run the Parquet store's fixtures through 02 (--historical-store), so models see the same features as 04"""
+    if max_season is not None:
+        stored = read_partitioned(seasons=seasons, max_season=max_season, columns=['season'])['season']
+        seasons = sorted(int(season) for season in stored.unique())
+        if not seasons:
+            print(f"❌ No seasons up to {max_season} in the Parquet store")
+            return False
+    
+    command = [sys.executable, str(Path(__file__).parent / '02_process_data.py'), '--historical-store']
+    if seasons:
+        command += ['--seasons', *[str(season) for season in seasons]]
+    if leagues:
+        command += ['--leagues', *[str(league) for league in leagues]]
+    
+    print("🔧 Processing the Parquet store: 02_process_data.py --historical-store\n")
+    return subprocess.run(command).returncode == 0
+
+
 def main():
     """Main execution"""
-    trainer = LMTrainer()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Train LM babies')
+    parser.add_argument('--from-store', action='store_true',
+                        help='Process the Parquet store with 02 first, then train on the result')
+    parser.add_argument('--max-season', type=int, help='Store: include seasons up to this one')
+    parser.add_argument('--seasons', type=int, nargs='+', help='Store: only these seasons')
+    parser.add_argument('--leagues', type=int, nargs='+', help='Store: only these league ids')
+    parser.add_argument('--split', default=DEFAULT_SPLIT, help='Named train/val split (see python -m utils.splits)')
+    args = parser.parse_args()
+    
+    if args.from_store and not process_store(args.seasons, args.leagues, args.max_season):
+        sys.exit(1)
+    
+    trainer = LMTrainer(split=args.split)
     trainer.train_all_models()
 
 
@@ -9,13 +9,16 @@ New Learning Machines:
 4. Halftime/Fulltime Outcomes
 
 These models train independently and don't affect the main 4 production models.
+
+Usage:
+    python 03b_train_experimental_models.py
+    python 03b_train_experimental_models.py --split walk_forward_1
 """
 
 import os
 import sys
 import json
 import pickle
-import pandas as pd
 import numpy as np
 from pathlib import Path
 from datetime import datetime
@@ -27,13 +30,22 @@ warnings.filterwarnings('ignore')
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from utils.memory import frame_mb
+from utils.schema import Registry
+from utils.splits import DEFAULT_SPLIT, load_split, split_dir
+from utils.targets import HALFTIME_COLS, attach_targets, target_names
+from utils.team_features import attach_store_features
+
 
 class ExperimentalLMTrainer:
     """Trains experimental LM babies for future deployment"""
     
-    def __init__(self):
+    def __init__(self, split=DEFAULT_SPLIT):
+        # Named train/val split (splits.json)
+        self.split = split
+        
         # Save to separate experimental directory
-        self.models_dir = Path(__file__).parent.parent / 'models' / 'experimental'
+        self.models_dir = split_dir(Path(__file__).parent.parent / 'models' / 'experimental', split)
         self.models_dir.mkdir(parents=True, exist_ok=True)
         
         self.models = {}
@@ -55,116 +67,40 @@ class ExperimentalLMTrainer:
     
     def load_data(self):
         """Load processed training data"""
-        processed_dir = Path(__file__).parent.parent / 'data' / 'processed'
-        
-        train_file = processed_dir / 'train_split.csv'
-        val_file = processed_dir / 'val_split.csv'
-        
-        if not train_file.exists() or not val_file.exists():
-            # Fallback to full training data
-            full_file = processed_dir / 'training_data.csv'
-            if not full_file.exists():
-                raise FileNotFoundError("No processed data found! Run 02_process_data.py first")
-            
-            print("⚠️  Using full dataset (no train/val split found)")
-            df = pd.read_csv(full_file)
-            
-            # Create 80/20 split
-            split_idx = int(len(df) * 0.8)
-            train_df = df.iloc[:split_idx]
-            val_df = df.iloc[split_idx:]
+        full_file = Path(__file__).parent.parent / 'data' / 'processed' / 'training_data.csv'
+        if not full_file.exists():
+            raise FileNotFoundError("No processed data found! Run 02_process_data.py first")
+        
+        train_df, val_df = load_split(self.split, path=full_file, registry=Registry.load())
+        (train_df, val_df), store = attach_store_features([train_df, val_df])
+        if store is None:
+            print("⚠️  No team feature store - using the team features in training_data.csv")
         else:
-            train_df = pd.read_csv(train_file)
-            val_df = pd.read_csv(val_file)
+            print(f"🗃️  Team features as of kickoff from the store ({len(store.features)} per side)")
         
-        print(f"✅ Loaded data:")
+        print(f"✅ Loaded data ({self.split} split):")
         print(f"   Training: {len(train_df):,} fixtures")
         print(f"   Validation: {len(val_df):,} fixtures")
+        print(f"   Memory: {frame_mb(train_df) + frame_mb(val_df):.1f} MB")
         
         return train_df, val_df
     
     def create_target_columns(self, df):
-        """Create target columns for experimental models"""
-        print("\n🎯 Creating experimental target columns...")
-        
-        targets_created = []
-        
-        # 1. RED CARD IN GAME
-        if 'home_red_cards' in df.columns and 'away_red_cards' in df.columns:
-            df['has_red_card'] = ((df['home_red_cards'] > 0) | (df['away_red_cards'] > 0)).astype(int)
-            targets_created.append('has_red_card')
-            print(f"   ✅ has_red_card: {df['has_red_card'].mean():.1%} positive rate")
-        
-        # 2. PLAYER BOOKING (team-level: any yellow card)
-        if 'home_yellow_cards' in df.columns and 'away_yellow_cards' in df.columns:
-            df['any_player_booked'] = ((df['home_yellow_cards'] > 0) | (df['away_yellow_cards'] > 0)).astype(int)
-            targets_created.append('any_player_booked')
-            print(f"   ✅ any_player_booked: {df['any_player_booked'].mean():.1%} positive rate")
-            
-            # Bonus: Over 3.5 total bookings
-            df['over_3_5_bookings'] = ((df['home_yellow_cards'] + df['away_yellow_cards']) > 3.5).astype(int)
-            targets_created.append('over_3_5_bookings')
-            print(f"   ✅ over_3_5_bookings: {df['over_3_5_bookings'].mean():.1%} positive rate")
-        
-        # 3. WIN BY +2 GOALS
-        if 'home_goals' in df.columns and 'away_goals' in df.columns:
-            df['goal_difference'] = df['home_goals'] - df['away_goals']
-            
-            # Home wins by 2+
-            df['home_win_by_2_plus'] = (df['goal_difference'] >= 2).astype(int)
-            targets_created.append('home_win_by_2_plus')
-            print(f"   ✅ home_win_by_2_plus: {df['home_win_by_2_plus'].mean():.1%} positive rate")
-            
-            # Away wins by 2+
-            df['away_win_by_2_plus'] = (df['goal_difference'] <= -2).astype(int)
-            targets_created.append('away_win_by_2_plus')
-            print(f"   ✅ away_win_by_2_plus: {df['away_win_by_2_plus'].mean():.1%} positive rate")
-            
-            # Either team wins by 2+
-            df['any_team_win_by_2_plus'] = ((df['goal_difference'] >= 2) | (df['goal_difference'] <= -2)).astype(int)
-            targets_created.append('any_team_win_by_2_plus')
-            print(f"   ✅ any_team_win_by_2_plus: {df['any_team_win_by_2_plus'].mean():.1%} positive rate")
-        
-        # 4. HALFTIME/FULLTIME (requires halftime scores)
-        if 'ht_home_goals' in df.columns and 'ht_away_goals' in df.columns:
-            # Determine HT result
-            df['ht_result'] = 'D'  # Draw
-            df.loc[df['ht_home_goals'] > df['ht_away_goals'], 'ht_result'] = 'H'  # Home
-            df.loc[df['ht_home_goals'] < df['ht_away_goals'], 'ht_result'] = 'A'  # Away
-            
-            # Determine FT result
-            df['ft_result'] = 'D'  # Draw
-            df.loc[df['home_goals'] > df['away_goals'], 'ft_result'] = 'H'  # Home
-            df.loc[df['home_goals'] < df['away_goals'], 'ft_result'] = 'A'  # Away
-            
-            # Create HT/FT combined outcome
-            df['ht_ft_outcome'] = df['ht_result'] + df['ft_result']
-            
-            # Most common patterns (train separate binary classifiers)
-            df['ht_ft_home_home'] = (df['ht_ft_outcome'] == 'HH').astype(int)
-            df['ht_ft_draw_draw'] = (df['ht_ft_outcome'] == 'DD').astype(int)
-            df['ht_ft_away_away'] = (df['ht_ft_outcome'] == 'AA').astype(int)
-            df['ht_ft_draw_home'] = (df['ht_ft_outcome'] == 'DH').astype(int)
-            df['ht_ft_draw_away'] = (df['ht_ft_outcome'] == 'DA').astype(int)
-            df['ht_ft_home_draw'] = (df['ht_ft_outcome'] == 'HD').astype(int)
-            df['ht_ft_away_draw'] = (df['ht_ft_outcome'] == 'AD').astype(int)
-            df['ht_ft_home_away'] = (df['ht_ft_outcome'] == 'HA').astype(int)
-            df['ht_ft_away_home'] = (df['ht_ft_outcome'] == 'AH').astype(int)
-            
-            ht_ft_targets = [
-                'ht_ft_home_home', 'ht_ft_draw_draw', 'ht_ft_away_away',
-                'ht_ft_draw_home', 'ht_ft_draw_away', 'ht_ft_home_draw',
-                'ht_ft_away_draw', 'ht_ft_home_away', 'ht_ft_away_home'
-            ]
-            targets_created.extend(ht_ft_targets)
-            
-            print(f"   ✅ HT/FT outcomes created:")
-            for target in ht_ft_targets:
-                print(f"      - {target}: {df[target].mean():.1%} positive rate")
-        else:
-            print("   ⚠️  HT/FT targets skipped (halftime score data not available)")
+        """Attach the experimental targets from the target registry (sidecar or computed)"""
+        print("\n🎯 Attaching experimental target columns...")
+        
+        names = target_names('experimental')
+        df = attach_targets(df, names)
+        targets_created = [name for name in names if name in df.columns]
         
-        print(f"\n✅ Created {len(targets_created)} experimental target columns")
+        for target in targets_created:
+            print(f"   ✅ {target}: {df[target].mean():.1%} positive rate")
+        
+        skipped = [name for name in names if name not in df.columns]
+        if skipped:
+            print(f"   ⚠️  Skipped {len(skipped)} targets (input columns not available): {', '.join(skipped)}")
+        
+        print(f"\n✅ Attached {len(targets_created)} experimental target columns")
         
         return df, targets_created
     
@@ -174,21 +110,17 @@ class ExperimentalLMTrainer:
         exclude_cols = [
             'fixture_id', 'date', 'league', 'league_id', 'season',
             'home_team', 'home_team_id', 'away_team', 'away_team_id',
-            # Main production targets
-            'btts', 'over_2_5_goals', 'over_9_5_corners', 'over_3_5_cards',
-            # Experimental targets
-            'has_red_card', 'any_player_booked', 'over_3_5_bookings',
-            'home_win_by_2_plus', 'away_win_by_2_plus', 'any_team_win_by_2_plus',
+            # Helper columns older 02b runs wrote into the dataset
             'goal_difference', 'ht_result', 'ft_result', 'ht_ft_outcome',
-            'ht_ft_home_home', 'ht_ft_draw_draw', 'ht_ft_away_away',
-            'ht_ft_draw_home', 'ht_ft_draw_away', 'ht_ft_home_draw',
-            'ht_ft_away_draw', 'ht_ft_home_away', 'ht_ft_away_home'
-        ]
+        ] + target_names() + HALFTIME_COLS
         
         feature_cols = [col for col in df.columns if col not in exclude_cols]
         
+        # Fixtures without a label (missing inputs) are left out rather than counted as 0
+        df = df[df[target_col].notna()]
+        
         X = df[feature_cols].fillna(0)
-        y = df[target_col].fillna(0).astype(int)
+        y = df[target_col].astype(int)
         
         return X, y, feature_cols
     
@@ -281,7 +213,7 @@ class ExperimentalLMTrainer:
         val_df, _ = self.create_target_columns(val_df)
         
         if not targets_created:
-            print("\n❌ No experimental targets could be created!")
+            print("\n❌ No experimental targets could be attached!")
             print("   Check if required columns exist in your data")
             return
         
@@ -374,7 +306,13 @@ class ExperimentalLMTrainer:
 
 def main():
     """Main execution"""
-    trainer = ExperimentalLMTrainer()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Train experimental LM babies')
+    parser.add_argument('--split', default=DEFAULT_SPLIT, help='Named train/val split (see python -m utils.splits)')
+    args = parser.parse_args()
+    
+    trainer = ExperimentalLMTrainer(split=args.split)
     trainer.train_all_experimental_models()
 
 
@@ -1,13 +1,16 @@
 """
 Model Evaluation Script
 Evaluates trained models and tracks performance over time
+
+Usage:
+    python 04_evaluate.py                           # production models, holdout split
+    python 04_evaluate.py --split walk_forward_1    # models 03 trained on that split
 """
 
 import os
 import sys
 import json
 import pickle
-import pandas as pd
 import numpy as np
 from pathlib import Path
 from datetime import datetime
@@ -16,14 +19,20 @@ from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_sc
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from utils.memory import frame_mb
+from utils.splits import DEFAULT_SPLIT, load_split, split_dir
+from utils.team_features import attach_store_features
+
 
 class ModelEvaluator:
     """Evaluates LM babies and tracks progress"""
     
-    def __init__(self):
-        self.models_dir = Path(__file__).parent.parent / 'models'
-        self.logs_dir = Path(__file__).parent.parent / 'logs'
-        self.logs_dir.mkdir(exist_ok=True)
+    def __init__(self, split=DEFAULT_SPLIT):
+        # Named train/val split (splits.json); other splits have their own models and history
+        self.split = split
+        self.models_dir = split_dir(Path(__file__).parent.parent / 'models', split)
+        self.logs_dir = split_dir(Path(__file__).parent.parent / 'logs', split)
+        self.logs_dir.mkdir(parents=True, exist_ok=True)
         
         self.analytics_dir = Path(__file__).parent.parent.parent / 'analytics_hub' / 'metrics'
         self.analytics_dir.mkdir(parents=True, exist_ok=True)
@@ -42,13 +51,20 @@ class ModelEvaluator:
     
     def load_validation_data(self):
         """Load validation data"""
-        processed_dir = Path(__file__).parent.parent / 'data' / 'processed'
-        val_file = processed_dir / 'val_split.csv'
+        full_file = Path(__file__).parent.parent / 'data' / 'processed' / 'training_data.csv'
         
-        if not val_file.exists():
+        if not full_file.exists():
             raise FileNotFoundError("Validation data not found!")
         
-        return pd.read_csv(val_file)
+        # Only the split's validation rows are converted
+        val_df, = load_split(self.split, parts=['val'], path=full_file)
+        (val_df,), store = attach_store_features([val_df])
+        if store is None:
+            print("⚠️  No team feature store - using the team features in training_data.csv")
+        else:
+            print(f"🗃️  Team features as of kickoff from the store ({len(store.features)} per side)")
+        print(f"📂 Validation data ({self.split} split): {len(val_df):,} fixtures, {frame_mb(val_df):.1f} MB")
+        return val_df
     
     def evaluate_model(self, model_data, val_df, target_col):
         """Evaluate a single model"""
@@ -264,8 +280,9 @@ class ModelEvaluator:
             
             print()
         
-        # Save analytics data
-        self.save_analytics_data(all_metrics)
+        # Save analytics data (the hub tracks the production models only)
+        if self.split == DEFAULT_SPLIT:
+            self.save_analytics_data(all_metrics)
         
         print(f"{'='*60}")
         print("✅ Evaluation Complete!")
@@ -298,7 +315,13 @@ class ModelEvaluator:
 
 def main():
     """Main execution"""
-    evaluator = ModelEvaluator()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Evaluate LM babies')
+    parser.add_argument('--split', default=DEFAULT_SPLIT, help='Named train/val split (see python -m utils.splits)')
+    args = parser.parse_args()
+    
+    evaluator = ModelEvaluator(split=args.split)
     all_improved = evaluator.evaluate_all_models()
     
     # Return exit code (0 if all improved, 1 if any declined)
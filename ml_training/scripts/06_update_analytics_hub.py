@@ -9,9 +9,14 @@ Usage:
 
 import json
 import os
+import sys
 from pathlib import Path
 from datetime import datetime
-import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.schema import load_dataset
 
 class AnalyticsHubUpdater:
     """Updates analytics hub with training metrics"""
@@ -51,7 +56,8 @@ class AnalyticsHubUpdater:
         if not training_file.exists():
             return 0
         
-        df = pd.read_csv(training_file)
+        # Only the row count is needed, so parse a single column
+        df = load_dataset(training_file, columns=['fixture_id'])
         return len(df)
     
     def load_daily_performance(self):
@@ -0,0 +1,110 @@
+"""
+Historical Parquet Converter
+Converts historical fixtures into the partitioned Parquet store
+(data/historical/store, partitioned by season and league_id)
+
+Each year is read from fixtures_{year}.csv if 00b has produced it, otherwise
+straight from the raw {year}_fixtures.json / {year}_stats.json downloads.
+
+Usage:
+    python convert_historical_to_parquet.py              # every year found
+    python convert_historical_to_parquet.py --year 2015
+"""
+
+import sys
+import time
+import logging
+import pandas as pd
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.columnar_store import HISTORICAL_STORE, conform_to_schema, read_partitioned, store_exists, write_partitioned
+from utils.fixture_index import FixtureIndex
+from utils.json_stream import iter_json_array, iter_json_object
+from utils.normalizer import normalize_batch, slim_fixture
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+HISTORICAL_DIR = Path(__file__).parent.parent / 'data' / 'historical'
+RAW_DIR = HISTORICAL_DIR / 'raw'
+
+
+def available_years():
+    """Years with either a processed CSV or a raw download"""
+    years = {int(p.stem.split('_')[1]) for p in HISTORICAL_DIR.glob('fixtures_*.csv')}
+    years |= {int(p.name.split('_')[0]) for p in RAW_DIR.glob('*_fixtures.json')}
+    return sorted(years)
+
+
+def load_year(year):
+    """Load one year's fixtures as a DataFrame, preferring the processed CSV"""
+    csv_file = HISTORICAL_DIR / f'fixtures_{year}.csv'
+    if csv_file.exists():
+        logger.info(f"   Reading {csv_file.name}")
+        return pd.read_csv(csv_file)
+
+    fixtures_file = RAW_DIR / f'{year}_fixtures.json'
+    stats_file = RAW_DIR / f'{year}_stats.json'
+    if not stats_file.exists():
+        logger.warning(f"   ⚠️  No stats file for {year}, skipping")
+        return None
+
+    logger.info(f"   Streaming {fixtures_file.name} + {stats_file.name}")
+    headers = {str(f['fixture']['id']): slim_fixture(f) for f in iter_json_array(fixtures_file)}
+    pairs = (
+        (headers[fixture_id], stats)
+        for fixture_id, stats in iter_json_object(stats_file)
+        if fixture_id in headers
+    )
+    columns, _ = normalize_batch(pairs)
+    return pd.DataFrame(columns)
+
+
+def convert_year(year, index):
+    """Convert one year into the store and register its fixtures there"""
+    start = time.monotonic()
+    df = load_year(year)
+
+    if df is None or df.empty:
+        return 0
+
+    # Partitions are replaced whole, so keep what the store already has for these seasons
+    df = conform_to_schema(df)
+    if store_exists():
+        existing = read_partitioned(seasons=df['season'].unique())
+        df = pd.concat([existing, df], ignore_index=True).drop_duplicates('fixture_id', keep='last')
+    write_partitioned(conform_to_schema(df))
+    index.add(df['fixture_id'], 'store', HISTORICAL_STORE)
+
+    logger.info(f"   ✅ {year}: {len(df):,} fixtures, "
+                f"{df['league_id'].nunique()} league partitions ({time.monotonic() - start:.1f}s)")
+    return len(df)
+
+
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Convert historical data to Parquet')
+    parser.add_argument('--year', type=int, help='Single year to convert (default: all)')
+    args = parser.parse_args()
+
+    years = [args.year] if args.year else available_years()
+    if not years:
+        logger.error("❌ No historical data found")
+        sys.exit(1)
+
+    logger.info(f"📦 Converting {len(years)} years into {HISTORICAL_STORE}")
+
+    index = FixtureIndex()
+    total = sum(convert_year(year, index) for year in years)
+    index.close()
+
+    logger.info(f"\n✅ Converted {total:,} fixtures")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Shared fixtures: synthetic fixture rows and a throwaway copy of ml_training/ to run scripts in"""
+
+import sys
+import shutil
+import subprocess
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ML_ROOT = Path(__file__).parent.parent
+
+# Tests import utils the way the scripts do
+sys.path.insert(0, str(ML_ROOT))
+
+
+def make_fixtures(n, start_id=1, start_date='2023-01-01', seed=0, teams=20, leagues=3):
+    """n finished fixtures in the normalizer's record layout, one every 6 hours"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'fixture_id': np.arange(start_id, start_id + n),
+        'date': pd.date_range(start_date, periods=n, freq='6h').strftime('%Y-%m-%dT%H:%M:%S+00:00'),
+        'league_id': rng.integers(1, leagues + 1, n),
+        'season': 2023,
+        'home_team_id': rng.integers(1, teams + 1, n),
+        'away_team_id': rng.integers(1, teams + 1, n),
+        'home_goals': rng.poisson(1.5, n),
+        'away_goals': rng.poisson(1.1, n),
+        'ht_home_goals': rng.poisson(0.6, n).astype(float),
+        'ht_away_goals': rng.poisson(0.5, n).astype(float),
+        'home_corners': rng.poisson(5, n).astype(float),
+        'away_corners': rng.poisson(4, n).astype(float),
+        'home_yellow_cards': rng.poisson(2, n),
+        'away_yellow_cards': rng.poisson(2, n),
+    })
+    df['league'] = 'League ' + df['league_id'].astype(str)
+    df['home_team'] = 'Team ' + df['home_team_id'].astype(str)
+    df['away_team'] = 'Team ' + df['away_team_id'].astype(str)
+    df.loc[::7, 'away_corners'] = np.nan
+    df['total_goals'] = df['home_goals'] + df['away_goals']
+    df['total_corners'] = df['home_corners'] + df['away_corners']
+    df['total_cards'] = df['home_yellow_cards'] + df['away_yellow_cards']
+    return df
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    """A copy of the scripts, utils and config with an empty data/ tree; .run(script, *args) runs a script in it"""
+    root = tmp_path / 'ml_training'
+    for name in ['scripts', 'utils', 'config']:
+        shutil.copytree(ML_ROOT / name, root / name, ignore=shutil.ignore_patterns('__pycache__'))
+    for name in ['raw', 'incremental', 'processed']:
+        (root / 'data' / name).mkdir(parents=True)
+
+    class Workspace:
+        path = root
+        data = root / 'data'
+
+        @staticmethod
+        def run(script, *args):
+            result = subprocess.run(
+                [sys.executable, str(root / 'scripts' / script), *args],
+                cwd=root, capture_output=True, text=True,
+            )
+            assert result.returncode == 0, result.stdout[-2000:] + result.stderr[-2000:]
+            return result.stdout
+
+    return Workspace()
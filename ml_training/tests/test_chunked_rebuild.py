@@ -0,0 +1,32 @@
+"""02 --chunked must produce the same training data as the in-memory full rebuild"""
+
+import numpy as np
+import pandas as pd
+
+from conftest import make_fixtures
+
+
+def read_sorted(path):
+    return pd.read_csv(path).sort_values('fixture_id').reset_index(drop=True)
+
+
+def test_chunked_matches_full_rebuild(workspace):
+    for i in range(3):
+        make_fixtures(600, start_id=1 + i * 600, start_date=f'202{i}-01-01', seed=i).to_csv(
+            workspace.data / 'raw' / f'season_{i}.csv', index=False
+        )
+    training_file = workspace.data / 'processed' / 'training_data.csv'
+
+    workspace.run('02_process_data.py')
+    full = read_sorted(training_file)
+
+    workspace.run('02_process_data.py', '--chunked', '--chunk-rows', '300')
+    chunked = read_sorted(training_file)
+
+    assert list(chunked.columns) == list(full.columns)
+    assert len(chunked) == len(full) == 1800
+    for col in full.columns:
+        if pd.api.types.is_numeric_dtype(full[col]):
+            assert np.allclose(full[col], chunked[col], equal_nan=True), col
+        else:
+            assert (full[col].astype(str) == chunked[col].astype(str)).all(), col
@@ -0,0 +1,86 @@
+"""Known-fixture index: upserts, source filters and reading stored rows back"""
+
+import logging
+
+import pytest
+
+from conftest import make_fixtures
+from utils.columnar_store import write_partitioned
+from utils.fixture_index import FixtureIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = FixtureIndex(tmp_path / 'fixture_index.sqlite')
+    yield index
+    index.close()
+
+
+def test_add_upserts_to_the_latest_location(index, tmp_path):
+    index.add([1, 2, 3], 'journal', tmp_path / '2019_stats.jsonl')
+    index.add([2, 3, 4], 'historical', tmp_path / 'fixtures_2019.csv')
+
+    assert len(index) == 4
+    assert index.locations([1, 2, 4]) == {
+        1: ('journal', str(tmp_path / '2019_stats.jsonl')),
+        2: ('historical', str(tmp_path / 'fixtures_2019.csv')),
+        4: ('historical', str(tmp_path / 'fixtures_2019.csv')),
+    }
+    assert index.sources() == {'journal': 1, 'historical': 3}
+    assert 3 in index and 5 not in index
+
+
+def test_known_and_filter_new_by_source(index):
+    index.add([1, 2], 'journal')
+    index.add([3], 'incremental')
+
+    assert index.known([1, 2, 3, 9]) == {1, 2, 3}
+    assert index.known([1, 2, 3, 9], sources=('incremental',)) == {3}
+
+    payloads = [{'fixture': {'id': i}} for i in [3, 9, 1]]
+    assert index.filter_new(payloads) == [{'fixture': {'id': 9}}]
+    assert index.filter_new(payloads, sources=('incremental',)) == [{'fixture': {'id': 9}}, {'fixture': {'id': 1}}]
+
+
+def test_batches_beyond_the_sqlite_parameter_limit(index):
+    index.add(range(5000), 'raw')
+    assert len(index.known(range(-10, 6000))) == 5000
+
+
+def test_read_rows_from_csv_and_parquet_locations(index, tmp_path):
+    csv_file = tmp_path / 'fixtures_2023.csv'
+    make_fixtures(10).to_csv(csv_file, index=False)
+    store = tmp_path / 'store'
+    write_partitioned(make_fixtures(10, start_id=100), store)
+
+    index.add(range(1, 11), 'historical', csv_file)
+    index.add(range(100, 110), 'store', store)
+    index.add([500], 'journal', tmp_path / '2023_stats.jsonl')
+
+    rows = index.read_rows([2, 3, 105, 500, 999])
+    assert sorted(rows['fixture_id']) == [2, 3, 105]
+
+    # The caller's own output is left out
+    rows = index.read_rows([2, 3, 105], exclude=[store])
+    assert sorted(rows['fixture_id']) == [2, 3]
+
+
+def test_read_rows_warns_about_missing_locations(index, tmp_path, caplog):
+    index.add([1, 2], 'incremental', tmp_path / 'incremental' / '2024-01-01.csv')
+
+    with caplog.at_level(logging.WARNING, logger='utils.fixture_index'):
+        rows = index.read_rows([1, 2])
+
+    assert rows.empty
+    assert '2 indexed fixtures not read back' in caplog.text
+
+
+def test_rebuild_registers_files_on_disk(index, tmp_path):
+    (tmp_path / 'raw').mkdir()
+    (tmp_path / 'incremental').mkdir()
+    make_fixtures(5).to_csv(tmp_path / 'raw' / 'season.csv', index=False)
+    make_fixtures(3, start_id=50).to_csv(tmp_path / 'incremental' / '2024-01-01.csv', index=False)
+    write_partitioned(make_fixtures(4, start_id=100), tmp_path / 'historical' / 'store')
+
+    assert index.rebuild(tmp_path) == {'raw': 5, 'incremental': 3, 'store': 4}
+    assert sorted(index.read_rows([1, 50, 101])['fixture_id']) == [1, 50, 101]
@@ -0,0 +1,87 @@
+"""Head-to-head prefix-sum features against a brute-force loop over past meetings"""
+
+import numpy as np
+import pandas as pd
+
+from conftest import make_fixtures
+from utils.h2h import HeadToHeadIndex, append_meetings
+
+
+def brute_force(history, home_id, away_id, date, lookback):
+    """h2h features for one fixture by scanning every earlier meeting of the pair"""
+    pair = {home_id, away_id}
+    meetings = history[
+        history.apply(lambda m: {m['home_team_id'], m['away_team_id']} == pair, axis=1)
+        & (history['date'] < date)
+    ].sort_values(['date', 'fixture_id']).tail(lookback)
+
+    home_goals = np.where(meetings['home_team_id'] == home_id, meetings['home_goals'], meetings['away_goals'])
+    away_goals = np.where(meetings['home_team_id'] == home_id, meetings['away_goals'], meetings['home_goals'])
+    both_scored = (meetings['home_goals'] > 0) & (meetings['away_goals'] > 0)
+
+    def mean(values):
+        values = pd.Series(values, dtype=float).dropna()
+        return values.mean() if len(values) else np.nan
+
+    return {
+        'h2h_matches': len(meetings),
+        'h2h_avg_goals': mean(meetings['home_goals'] + meetings['away_goals']),
+        'h2h_home_team_goals': mean(home_goals),
+        'h2h_away_team_goals': mean(away_goals),
+        'h2h_btts_rate': mean(both_scored.astype(float)) if len(meetings) else np.nan,
+        'h2h_avg_corners': mean(meetings['total_corners']),
+        'h2h_avg_cards': mean(meetings['total_cards']),
+    }
+
+
+def fixtures(n=300, seed=0, **kwargs):
+    df = make_fixtures(n, seed=seed, teams=5, **kwargs)
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+def expected_features(history, queries, lookback):
+    rows = [
+        brute_force(history, q['home_team_id'], q['away_team_id'], q['date'], lookback)
+        for _, q in queries.iterrows()
+    ]
+    return pd.DataFrame(rows)
+
+
+def test_features_match_brute_force():
+    history = fixtures()
+    # Same kickoff as a stored meeting must not see it; some pairs never met
+    queries = pd.concat([history.iloc[::7], history.iloc[:3].assign(home_team_id=99)], ignore_index=True)
+
+    for lookback in [1, 3, 5]:
+        features = HeadToHeadIndex.from_fixtures(history).features(
+            queries['home_team_id'], queries['away_team_id'], queries['date'], lookback
+        )
+        expected = expected_features(history, queries, lookback)
+        pd.testing.assert_frame_equal(features, expected, check_dtype=False)
+
+
+def test_later_index_continues_saved_meetings():
+    history = fixtures()
+    saved, new = history.iloc[:220], history.iloc[220:]
+    lookback = 5
+
+    features = HeadToHeadIndex.from_fixtures(saved).features(
+        new['home_team_id'], new['away_team_id'], new['date'], lookback,
+        later=HeadToHeadIndex.from_fixtures(new),
+    )
+    expected = expected_features(history, new, lookback)
+    pd.testing.assert_frame_equal(features, expected, check_dtype=False)
+
+
+def test_appended_parts_load_as_one_index(tmp_path):
+    history = fixtures()
+    path = tmp_path / 'h2h_index'
+    HeadToHeadIndex.from_fixtures(history.iloc[:200]).save(path)
+    append_meetings(history.iloc[200:], path)
+    # A re-processed fixture's later row replaces its earlier one
+    append_meetings(history.iloc[[0]].assign(home_goals=9), path)
+
+    index = HeadToHeadIndex.load(path)
+    assert len(index) == len(history)
+    assert index.meetings.set_index('fixture_id').loc[history['fixture_id'].iloc[0], 'home_goals'] == 9
@@ -0,0 +1,73 @@
+"""Streaming JSON readers: same items as json.load, errors (not silent loss) on truncated files"""
+
+import json
+
+import pytest
+
+from utils.json_stream import iter_json_array, iter_json_object, iter_jsonl
+
+ITEMS = [
+    {'fixture': {'id': 1, 'date': '2023-01-01T15:00:00+00:00'}, 'goals': {'home': 2, 'away': 0}},
+    {'fixture': {'id': 22, 'venue': 'Estádio do Dragão'}, 'odds': [1.5, 3.25, -0.0, 1e-3]},
+    [],
+    12345678901234567890,
+    'a "quoted", [bracketed] string',
+    None,
+]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 7, 64, 1 << 20])
+def test_array_items_match_json_load(tmp_path, chunk_size):
+    path = tmp_path / 'fixtures.json'
+    path.write_text(json.dumps(ITEMS, indent=2, ensure_ascii=False), encoding='utf-8')
+
+    assert list(iter_json_array(path, chunk_size)) == ITEMS
+
+
+@pytest.mark.parametrize('chunk_size', [1, 5, 1 << 20])
+def test_object_pairs_match_json_load(tmp_path, chunk_size):
+    stats = {str(i): item for i, item in enumerate(ITEMS)}
+    path = tmp_path / 'stats.json'
+    path.write_text(json.dumps(stats), encoding='utf-8')
+
+    assert dict(iter_json_object(path, chunk_size)) == stats
+
+
+def test_empty_containers(tmp_path):
+    path = tmp_path / 'empty.json'
+    path.write_text(' [ \n ] ')
+    assert list(iter_json_array(path)) == []
+
+    path.write_text('{}')
+    assert list(iter_json_object(path)) == []
+
+
+@pytest.mark.parametrize('chunk_size', [3, 1 << 20])
+def test_truncated_array_raises_after_the_complete_items(tmp_path, chunk_size):
+    text = json.dumps(ITEMS)
+    path = tmp_path / 'fixtures.json'
+
+    # Every cut short of the closing bracket: a download that died part way
+    for cut in range(len(text.rstrip(']'))):
+        path.write_text(text[:cut])
+        items = []
+        with pytest.raises(ValueError):
+            for item in iter_json_array(path, chunk_size):
+                items.append(item)
+        assert items == ITEMS[:len(items)], cut
+
+
+def test_truncated_object_raises(tmp_path):
+    path = tmp_path / 'stats.json'
+    path.write_text(json.dumps({'1': {'shots': 4}, '2': {'shots': 7}})[:-5])
+
+    with pytest.raises(ValueError):
+        list(iter_json_object(path))
+
+
+def test_jsonl_skips_a_torn_last_line(tmp_path):
+    path = tmp_path / 'stats.jsonl'
+    lines = [json.dumps({'fixture_id': i, 'stats': [i]}) for i in range(3)]
+    path.write_text('\n'.join(lines) + '\n' + lines[0][:10])
+
+    assert [entry['fixture_id'] for entry in iter_jsonl(path)] == [0, 1, 2]
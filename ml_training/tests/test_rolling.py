@@ -0,0 +1,86 @@
+"""Grouped rolling / EWM kernels against pandas groupby().rolling() / ewm()"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.rolling import grouped_ewm_means, grouped_rolling_means, group_layout
+
+
+def pandas_rolling(df, cols, window, min_periods=1):
+    """groupby().rolling() means back in row order (rows with a missing key get NaN)"""
+    rolled = df.groupby('key')[cols].rolling(window, min_periods=min_periods).mean()
+    return rolled.droplevel(0).reindex(df.index)
+
+
+def frame(n=400, seed=0):
+    """Grouped values with missing keys and missing values"""
+    rng = np.random.default_rng(seed)
+    keys = rng.integers(0, 12, n).astype(float)
+    keys[rng.random(n) < 0.05] = np.nan
+    values = rng.poisson(2, (n, 2)).astype(float)
+    values[rng.random((n, 2)) < 0.15] = np.nan
+    return pd.DataFrame({'key': keys, 'a': values[:, 0], 'b': values[:, 1]})
+
+
+@pytest.mark.parametrize('min_periods', [1, 3])
+def test_rolling_means_match_pandas(min_periods):
+    df = frame()
+    windows = [window for window in [1, 3, 5, 10] if window >= min_periods]
+    results = grouped_rolling_means(df['key'], df[['a', 'b']].to_numpy(), windows, min_periods=min_periods)
+
+    for window in windows:
+        expected = pandas_rolling(df, ['a', 'b'], window, min_periods)
+        np.testing.assert_allclose(results[window], expected.to_numpy(), equal_nan=True)
+
+
+def test_rolling_one_dimensional_values_keep_shape():
+    df = frame(seed=1)
+    result = grouped_rolling_means(df['key'], df['a'], [5])[5]
+    expected = pandas_rolling(df, 'a', 5)
+
+    assert result.shape == (len(df),)
+    np.testing.assert_allclose(result, expected.to_numpy(), equal_nan=True)
+
+
+def test_ewm_means_match_pandas():
+    df = frame(seed=2)
+    spans = [3, 10]
+    results = grouped_ewm_means(df['key'], df[['a', 'b']].to_numpy(), spans)
+
+    for span in spans:
+        expected = df.groupby('key')[['a', 'b']].transform(lambda x: x.ewm(span=span).mean())
+        np.testing.assert_allclose(results[span], expected.to_numpy(), equal_nan=True)
+
+
+def test_missing_keys_belong_to_no_group():
+    df = frame(seed=3)
+    missing = df['key'].isna().to_numpy()
+    layout = group_layout(df['key'])
+
+    rolling = grouped_rolling_means(df['key'], df['a'], [3], layout=layout)[3]
+    ewm = grouped_ewm_means(df['key'], df['a'], [5], layout=layout)[5]
+
+    assert missing.any()
+    assert np.isnan(rolling[missing]).all()
+    assert np.isnan(ewm[missing]).all()
+
+
+def test_ewm_initial_state_continues_history():
+    df = frame(seed=4).dropna(subset=['key']).reset_index(drop=True)
+    head, tail = df.iloc[:250], df.iloc[250:]
+    span = 5
+    decay = 1 - 2 / (span + 1)
+
+    # (numerator, denominator) per group of the tail, from the head's values
+    groups = pd.unique(tail['key'])
+    numerator = np.zeros((len(groups), 1, 1))
+    denominator = np.zeros((len(groups), 1, 1))
+    for i, key in enumerate(groups):
+        for value in head.loc[head['key'] == key, 'a']:
+            numerator[i] = decay * numerator[i] + (0 if np.isnan(value) else value)
+            denominator[i] = decay * denominator[i] + (not np.isnan(value))
+
+    result = grouped_ewm_means(tail['key'], tail['a'], [span], initial=(numerator, denominator))[span]
+    expected = df.groupby('key')['a'].transform(lambda x: x.ewm(span=span).mean()).iloc[250:]
+    np.testing.assert_allclose(result, expected.to_numpy(), equal_nan=True)
@@ -0,0 +1,68 @@
+"""Split row ranges: disjoint, covering the data, training only on earlier rows"""
+
+import pandas as pd
+import pytest
+
+from conftest import make_fixtures
+from utils.splits import DEFAULT_SPLIT, build_splits, load_split, load_splits, save_splits
+
+
+def rows(part, total):
+    start, stop = part
+    return set(range(start, total if stop is None else stop))
+
+
+@pytest.mark.parametrize('total', [1, 7, 100, 1001])
+@pytest.mark.parametrize('folds', [0, 1, 3])
+def test_ranges_are_disjoint_and_cover_the_data(total, folds):
+    dates = pd.date_range('2020-01-01', periods=total, freq='D')
+    splits = build_splits(dates, train_fraction=0.8, walk_forward_folds=folds)['splits']
+
+    holdout = splits[DEFAULT_SPLIT]
+    train, val = rows(holdout['train'], total), rows(holdout['val'], total)
+    assert not train & val
+    assert train | val == set(range(total))
+    assert not train or not val or max(train) < min(val)
+
+    walk_forward = [splits[name] for name in splits if name.startswith('walk_forward_')]
+    assert len(walk_forward) == min(folds, total - holdout['train'][1])
+
+    # The folds' validation blocks partition the holdout's validation rows
+    blocks = [rows(fold['val'], total) for fold in walk_forward]
+    for i, block in enumerate(blocks):
+        assert block
+        assert all(not block & other for other in blocks[i + 1:])
+    if blocks:
+        assert set().union(*blocks) == val
+
+    # Each fold trains on exactly the rows before its block
+    for fold in walk_forward:
+        assert fold['train'] == [0, fold['val'][0]]
+
+
+def test_only_the_last_validation_range_is_open_ended():
+    splits = build_splits(pd.date_range('2020-01-01', periods=50), walk_forward_folds=3)['splits']
+
+    assert splits[DEFAULT_SPLIT]['val'][1] is None
+    assert splits['walk_forward_3']['val'][1] is None
+    assert splits['walk_forward_1']['val'][1] is not None
+    assert splits['walk_forward_2']['val'][1] is not None
+
+
+def test_load_split_reads_the_row_ranges(tmp_path):
+    df = make_fixtures(100)
+    data_file = tmp_path / 'training_data.csv'
+    splits_file = tmp_path / 'splits.json'
+    df.to_csv(data_file, index=False)
+    save_splits(build_splits(df['date'], walk_forward_folds=2), splits_file)
+
+    # Rows appended after the split file was written join the open-ended validation range
+    make_fixtures(10, start_id=1000, start_date='2024-01-01').to_csv(data_file, mode='a', header=False, index=False)
+
+    splits = load_splits(splits_file)
+    train, val = load_split(DEFAULT_SPLIT, path=data_file, splits=splits)
+    assert train['fixture_id'].tolist() == list(range(1, 81))
+    assert val['fixture_id'].tolist() == list(range(81, 101)) + list(range(1000, 1010))
+
+    first_val, = load_split('walk_forward_1', parts=['val'], path=data_file, splits=splits)
+    assert first_val['fixture_id'].tolist() == list(range(81, 91))
@@ -0,0 +1,98 @@
+"""Stage cache: skip unchanged stages, re-run on changes or --force, ignore write timestamps"""
+
+import sys
+import json
+import subprocess
+
+import pytest
+
+# A stand-in stage command: counts its runs and writes a model and an evaluation log
+STAGE = (
+    "import pathlib, sys; "
+    "pathlib.Path('models').mkdir(exist_ok=True); "
+    "pathlib.Path('models/lm_model.pkl').write_text('model'); "
+    "pathlib.Path('logs').mkdir(exist_ok=True); "
+    "pathlib.Path('logs/lm_history.json').write_text('[]'); "
+    "open('runs.txt', 'a').write('run\\n'); "
+    "sys.exit(int(sys.argv[1]))"
+)
+
+
+@pytest.fixture
+def cache(workspace):
+    """Runs a stage through python -m utils.stage_cache in the workspace; returns (exit code, output)"""
+    processed = workspace.data / 'processed'
+    (processed / 'training_data.csv').write_text('fixture_id\n1\n')
+    (processed / 'splits.json').write_text(json.dumps({'updated': '2024-01-01T00:00:00', 'rows': 1}))
+
+    class Cache:
+        data = workspace.data
+
+        @staticmethod
+        def run(stage='train', exit_code=0, force=False):
+            command = [sys.executable, '-m', 'utils.stage_cache', '--run', stage]
+            command += ['--force'] if force else []
+            command += ['--', sys.executable, '-c', STAGE, str(exit_code)]
+            result = subprocess.run(command, cwd=workspace.path, capture_output=True, text=True)
+            return result.returncode, result.stdout
+
+        @staticmethod
+        def runs():
+            path = workspace.path / 'runs.txt'
+            return len(path.read_text().splitlines()) if path.exists() else 0
+
+    return Cache()
+
+
+def test_unchanged_stage_is_skipped(cache):
+    assert cache.run()[0] == 0
+    code, output = cache.run()
+
+    assert code == 0
+    assert 'reusing 1 outputs' in output
+    assert cache.runs() == 1
+
+
+def test_changed_input_or_force_reruns(cache):
+    cache.run()
+    (cache.data / 'processed' / 'training_data.csv').write_text('fixture_id\n1\n2\n')
+    cache.run()
+    assert cache.runs() == 2
+
+    cache.run(force=True)
+    assert cache.runs() == 3
+
+
+def test_changed_output_reruns(cache):
+    cache.run()
+    (cache.data.parent / 'models' / 'lm_model.pkl').write_text('edited by hand')
+    cache.run()
+    assert cache.runs() == 2
+
+
+def test_write_timestamps_do_not_count_as_changes(cache):
+    cache.run()
+    splits = cache.data / 'processed' / 'splits.json'
+    splits.write_text(json.dumps({'updated': '2024-06-01T12:00:00', 'rows': 1}, indent=2))
+    cache.run()
+    assert cache.runs() == 1
+
+    splits.write_text(json.dumps({'updated': '2024-06-01T12:00:00', 'rows': 2}))
+    cache.run()
+    assert cache.runs() == 2
+
+
+def test_failed_run_is_not_cached(cache):
+    code, _ = cache.run(exit_code=2)
+    assert code == 2
+    cache.run()
+    assert cache.runs() == 2
+
+
+def test_ok_exit_codes_are_cached_and_replayed(cache):
+    # 04 exits 1 when a model declined; that evaluation still counts as done
+    assert cache.run('evaluate', exit_code=1)[0] == 1
+    code, output = cache.run('evaluate', exit_code=1)
+    assert code == 1
+    assert 'reusing' in output
+    assert cache.runs() == 1
@@ -0,0 +1,4 @@
+"""
+Shared helpers for the ML training scripts
+Imported by the numbered scripts in ml_training/scripts/
+"""
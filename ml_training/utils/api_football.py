@@ -0,0 +1,231 @@
+"""
+API-Football Client
+Pooled, rate-limited and instrumented HTTP client shared by the fetch scripts
+
+- One keep-alive session per client, so requests reuse TCP+TLS connections
+- Retries 429/5xx and connection errors with jittered exponential backoff
+- Tracks the daily quota from the x-ratelimit-* response headers
+- Records a latency histogram per endpoint
+- Optionally serves repeat requests from an on-disk ResponseCache
+"""
+
+import os
+import time
+import random
+import threading
+import logging
+from collections import defaultdict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.rate_limiter import TokenBucket, DEFAULT_RATE_PER_MINUTE
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = os.getenv('API_FOOTBALL_BASE_URL', 'https://v3.football.api-sports.io')
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Latency histogram bucket upper bounds (milliseconds)
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram for one endpoint"""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms):
+        """Add one observation"""
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if ms <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+
+        self.total += 1
+        self.sum_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, pct):
+        """Upper bound of the bucket holding the given percentile"""
+        if not self.total:
+            return 0.0
+
+        target = self.total * pct / 100
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def summary(self):
+        """Plain dict for logs and JSON reports"""
+        return {
+            'requests': self.total,
+            'mean_ms': round(self.sum_ms / self.total, 1) if self.total else 0.0,
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'max_ms': round(self.max_ms, 1),
+            'buckets': dict(zip([f'<={b}ms' for b in LATENCY_BUCKETS_MS] + ['slower'], self.counts)),
+        }
+
+
+class APIFootballClient:
+    """Shared API-Football client used by 00, 00a and 01"""
+
+    def __init__(self, api_key=None, base_url=BASE_URL, rate_per_minute=DEFAULT_RATE_PER_MINUTE,
+                 pool_size=16, timeout=30, max_retries=4, limiter=None, cache=None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.limiter = limiter or TokenBucket(rate_per_minute)
+        self.cache = cache
+
+        # Keep-alive connection pool, sized for the number of concurrent workers
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'x-apisports-key': api_key or os.getenv('API_FOOTBALL_KEY', '')})
+
+        self.histograms = defaultdict(LatencyHistogram)
+        self.errors = defaultdict(int)
+        self.retries = 0
+        self.lock = threading.Lock()
+
+    def _backoff(self, attempt, retry_after=None):
+        """Sleep before the next attempt (full jitter, honouring Retry-After)"""
+        if retry_after and retry_after.isdigit():
+            delay = float(retry_after)
+        else:
+            delay = random.uniform(0, min(30.0, 0.5 * 2 ** attempt))
+
+        with self.lock:
+            self.retries += 1
+        time.sleep(delay)
+
+    def _record(self, endpoint, elapsed_ms=None, error=None):
+        """Record a latency observation or an error for an endpoint"""
+        with self.lock:
+            if elapsed_ms is not None:
+                self.histograms[endpoint].record(elapsed_ms)
+            if error:
+                self.errors[f'{endpoint} {error}'] += 1
+
+    def get(self, endpoint, params=None, cache_ttl='default', cache_if=None):
+        """GET an endpoint and return the parsed JSON body, or None on failure
+
+        cache_if, if given, decides from the body whether it may be cached.
+        """
+        if self.cache is not None:
+            cached = self.cache.get(endpoint, params)
+            if cached is not None:
+                return cached
+
+        url = f'{self.base_url}/{endpoint.lstrip("/")}'
+
+        for attempt in range(self.max_retries + 1):
+            if self.limiter.quota_exhausted:
+                return None
+
+            self.limiter.acquire()
+            start = time.monotonic()
+
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except requests.RequestException as e:
+                self._record(endpoint, error=type(e).__name__)
+                logger.warning(f"   ⚠️  {endpoint} {params}: {e} (attempt {attempt + 1})")
+                self._backoff(attempt)
+                continue
+
+            self._record(endpoint, elapsed_ms=(time.monotonic() - start) * 1000)
+            self.limiter.update_from_headers(response.headers)
+
+            if response.status_code in RETRY_STATUSES:
+                self._record(endpoint, error=response.status_code)
+                self._backoff(attempt, response.headers.get('Retry-After'))
+                continue
+
+            if response.status_code != 200:
+                self._record(endpoint, error=response.status_code)
+                logger.warning(f"   ⚠️  API error {response.status_code} for {endpoint} {params}")
+                return None
+
+            data = response.json()
+
+            # API-Football reports quota and rate errors in the body with a 200
+            errors = data.get('errors')
+            if errors:
+                if isinstance(errors, dict) and 'rateLimit' in errors:
+                    self._record(endpoint, error='rateLimit')
+                    self._backoff(attempt)
+                    continue
+                if isinstance(errors, dict) and 'requests' in errors:
+                    self.limiter.daily_remaining = 0
+                self._record(endpoint, error='api')
+                logger.warning(f"   ⚠️  API error for {endpoint} {params}: {errors}")
+                return None
+
+            # Empty responses are not cached: stats may simply not be published yet
+            if self.cache is not None and data.get('response') and (cache_if is None or cache_if(data)):
+                self.cache.put(endpoint, params, data, ttl=cache_ttl)
+
+            return data
+
+        logger.error(f"   ❌ Giving up on {endpoint} {params} after {self.max_retries + 1} attempts")
+        return None
+
+    def get_response(self, endpoint, params=None, cache_ttl='default', cache_if=None):
+        """GET an endpoint and return its 'response' list, or None on failure"""
+        data = self.get(endpoint, params, cache_ttl=cache_ttl, cache_if=cache_if)
+        if data is None:
+            return None
+        return data.get('response', [])
+
+    @property
+    def quota_remaining(self):
+        """Daily requests left according to the last response headers"""
+        return self.limiter.daily_remaining
+
+    def summary(self):
+        """Request counts, quota and per-endpoint latency for reports"""
+        with self.lock:
+            return {
+                'requests': self.limiter.acquired,
+                'requests_per_second': round(self.limiter.achieved_rate(), 2),
+                'retries': self.retries,
+                'quota_remaining': self.limiter.daily_remaining,
+                'cache': self.cache.summary() if self.cache is not None else None,
+                'errors': dict(self.errors),
+                'endpoints': {name: hist.summary() for name, hist in self.histograms.items()},
+            }
+
+    def log_summary(self, log=None):
+        """Log request, quota and latency figures"""
+        log = log or logger
+        summary = self.summary()
+
+        log.info(f"📡 API usage: {summary['requests']} requests "
+                 f"({summary['requests_per_second']} req/s), {summary['retries']} retries")
+        if summary['quota_remaining'] is not None:
+            log.info(f"   Daily quota remaining: {summary['quota_remaining']}")
+        if summary['cache'] is not None:
+            log.info(f"   Cache: {summary['cache']['hits']} hits, {summary['cache']['misses']} misses")
+        for name, hist in summary['endpoints'].items():
+            log.info(f"   {name}: {hist['requests']} calls - mean {hist['mean_ms']}ms, "
+                     f"p50 ≤{hist['p50_ms']}ms, p95 ≤{hist['p95_ms']}ms, max {hist['max_ms']}ms")
+        for error, count in summary['errors'].items():
+            log.info(f"   ⚠️  {error}: {count}")
+
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
@@ -0,0 +1,90 @@
+"""
+Columnar Fixture Store
+Parquet dataset of normalized fixtures, partitioned by season and league_id
+
+Layout: data/historical/store/season=2015/league_id=39/part-0.parquet
+
+Reading one season or league only opens that partition's files, and column
+types survive the round trip, so downstream steps skip CSV parsing entirely.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.normalizer import RECORD_DTYPES
+
+HISTORICAL_STORE = Path(__file__).parent.parent / 'data' / 'historical' / 'store'
+
+PARTITION_COLS = ['season', 'league_id']
+
+
+def store_exists(root=HISTORICAL_STORE):
+    """True if the store has at least one partition"""
+    root = Path(root)
+    return root.exists() and any(root.glob('season=*'))
+
+
+def conform_to_schema(df):
+    """Cast fixtures to the normalizer's column types so every partition shares one schema"""
+    out = pd.DataFrame(index=df.index)
+
+    for name, dtype in RECORD_DTYPES.items():
+        if dtype is object:
+            out[name] = df[name].astype(str) if name in df.columns else ''
+            continue
+
+        if name in df.columns:
+            values = pd.to_numeric(df[name], errors='coerce')
+        else:
+            values = pd.Series(np.nan, index=df.index)
+
+        # Missing counts become 0 (as in 02's cleaning); float columns keep NaN
+        if np.issubdtype(dtype, np.integer):
+            values = values.fillna(0)
+        out[name] = values.astype(dtype)
+
+    return out
+
+
+def write_partitioned(df, root=HISTORICAL_STORE):
+    """Write fixtures into the store, replacing the partitions they touch"""
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+
+    df.to_parquet(
+        root,
+        engine='pyarrow',
+        partition_cols=PARTITION_COLS,
+        index=False,
+        # Re-processing a season overwrites its partitions instead of duplicating rows
+        existing_data_behavior='delete_matching',
+        basename_template='part-{i}.parquet',
+    )
+
+
+def read_partitioned(root=HISTORICAL_STORE, seasons=None, league_ids=None,
+                     max_season=None, columns=None):
+    """Read fixtures from the store, pruning to the requested partitions"""
+    filters = []
+    if seasons is not None:
+        filters.append(('season', 'in', [int(s) for s in seasons]))
+    if max_season is not None:
+        filters.append(('season', '<=', int(max_season)))
+    if league_ids is not None:
+        filters.append(('league_id', 'in', [int(l) for l in league_ids]))
+
+    df = pd.read_parquet(
+        root,
+        engine='pyarrow',
+        columns=columns,
+        filters=filters or None,
+    )
+
+    # Partition keys come back as categories; restore plain integers
+    for col in PARTITION_COLS:
+        if col in df.columns:
+            df[col] = df[col].astype('int32')
+
+    return df
@@ -0,0 +1,32 @@
+"""
+Training Config
+Loads config/training_config.yaml for the pipeline scripts
+"""
+
+from pathlib import Path
+
+import yaml
+
+CONFIG_FILE = Path(__file__).parent.parent / 'config' / 'training_config.yaml'
+
+_cache = {}
+
+
+def load_training_config(path=CONFIG_FILE):
+    """Parsed training config (read once per process)"""
+    path = Path(path)
+    if path not in _cache:
+        with open(path, 'r') as f:
+            _cache[path] = yaml.safe_load(f) or {}
+    return _cache[path]
+
+
+def feature_settings(path=CONFIG_FILE):
+    """Rolling windows, EWM spans and enabled feature groups from the features section"""
+    features = load_training_config(path).get('features', {})
+    return {
+        'rolling_windows': sorted(set(features.get('rolling_windows', [5]))),
+        'ewm_spans': sorted(set(features.get('ewm_spans', []))),
+        'h2h_lookback': features.get('h2h_lookback', 5),
+        'groups': list(features.get('groups', [])),
+    }
@@ -0,0 +1,262 @@
+"""
+Feature State
+Per-team rolling windows and per-league running sums carried between 02 runs
+
+A full 02 run saves, for every team stat, the team's last max(window) values
+over its home and away matches and its exponentially weighted numerator /
+denominator per span, plus each league's running sum and count per stat. The
+next incremental run pushes only the new fixtures through that state, so its
+cost depends on the number of new fixtures rather than on the whole history.
+
+The ids of every processed fixture live next to the JSON in an append-only
+file of int64s (feature_state_ids.bin): a full run rewrites it, an incremental
+run only appends its new ids.
+"""
+
+import json
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from utils.rolling import ewm_decay, group_layout, grouped_ewm_means, grouped_rolling_means
+
+FEATURE_STATE_FILE = Path(__file__).parent.parent / 'data' / 'processed' / 'feature_state.json'
+
+# Bump when the saved layout changes; older state forces a full rebuild
+STATE_VERSION = 4
+
+
+def _plain(value):
+    """JSON-safe number (NumPy scalars -> int/float, whole floats -> int)"""
+    value = value.item() if hasattr(value, 'item') else value
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def ids_path(path=FEATURE_STATE_FILE):
+    """The processed-id file that goes with a state file"""
+    path = Path(path)
+    return path.with_name(f'{path.stem}_ids.bin')
+
+
+def _team_key(team_id):
+    """State key for a team id, the same whether ids were read as int or float"""
+    return str(_plain(team_id))
+
+
+class FeatureState:
+    """Rolling tails and EWM sums per (stat, team), running sums per (stat, league)"""
+
+    def __init__(self, windows=(5,), ewm_spans=(), rolling=None, ewm=None, league=None,
+                 fixture_ids=None, columns=None, last_date=None):
+        self.windows = list(windows)
+        self.ewm_spans = list(ewm_spans)
+        self.tail = max(self.windows)
+        self.rolling = rolling or {}          # stat -> team_id -> last max(windows) values
+        self.ewm = ewm or {}                  # stat -> team_id -> [[numerator, denominator] per span]
+        self.league = league or {}            # stat -> league_id -> [sum, count]
+        self.fixture_ids = set(fixture_ids or ())
+        self.columns = columns or []          # processed dataset column order
+        self.last_date = last_date
+        # Ids not yet in the id file; None means the file is rewritten from fixture_ids
+        self.new_ids = [] if fixture_ids is not None else None
+
+    @classmethod
+    def from_frame(cls, df, team_matches, stats, league_specs, windows=(5,), ewm_spans=()):
+        """Capture state from a fully processed, date-sorted frame
+
+        team_matches: the frame's team-match table (team_id plus one column per
+        stat, each team's rows in date order) with {stat}_ewm{span} columns
+        league_specs: (stat, value_col) pairs
+        """
+        state = cls(windows=windows, ewm_spans=ewm_spans)
+        groups = team_matches.groupby('team_id', sort=False)
+
+        for stat in stats:
+            tails = groups[stat].apply(lambda x: x.tail(state.tail).tolist())
+            state.rolling[stat] = {
+                _team_key(team_id): [_plain(v) for v in values] for team_id, values in tails.items()
+            }
+
+            if not state.ewm_spans:
+                continue
+
+            # Denominator = sum of decayed weights over the team's valid values; numerator = mean * denominator
+            steps_back = groups[stat].transform('size') - 1 - groups.cumcount()
+            valid = team_matches[stat].notna()
+            per_span = []
+            for span in state.ewm_spans:
+                weights = (ewm_decay(span) ** steps_back) * valid
+                denominator = weights.groupby(team_matches['team_id'], sort=False).sum()
+                last_mean = groups[f'{stat}_ewm{span}'].last().reindex(denominator.index).fillna(0)
+                per_span.append((last_mean * denominator, denominator))
+
+            state.ewm[stat] = {
+                _team_key(team_id): [[float(num[team_id]), float(den[team_id])] for num, den in per_span]
+                for team_id in per_span[0][1].index
+            }
+
+        if 'league_id' in df.columns:
+            for stat, value_col in league_specs:
+                sums = df.groupby('league_id')[value_col].agg(['sum', 'count'])
+                state.league[stat] = {
+                    str(league_id): [_plain(row['sum']), int(row['count'])]
+                    for league_id, row in sums.iterrows()
+                }
+
+        state.fixture_ids = set(int(i) for i in df['fixture_id'])
+        state.columns = list(df.columns)
+        state.last_date = str(df['date'].max()) if len(df) else None
+        return state
+
+    def add_fixtures(self, fixture_ids):
+        """Record newly processed fixtures (appended to the id file on save)"""
+        added = [i for i in dict.fromkeys(int(i) for i in fixture_ids) if i not in self.fixture_ids]
+        self.fixture_ids.update(added)
+        if self.new_ids is not None:
+            self.new_ids.extend(added)
+
+    def matches(self, windows, ewm_spans):
+        """True if the state was built with these windows and spans"""
+        return self.windows == list(windows) and self.ewm_spans == list(ewm_spans)
+
+    def advance(self, stat, team_ids, values):
+        """Add a chunk of team-match values (date order); return per-row rolling and EWM means
+
+        Returns ({window: means}, {span: means}). Both include the current match,
+        like the full-history features. Each team's saved tail is put in front of
+        its rows for the windows, and its saved EWM sums seed the EWM scan.
+        """
+        team_ids = np.asarray(team_ids, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        rolling = self.rolling.setdefault(stat, {})
+        ewm = self.ewm.setdefault(stat, {})
+
+        # Teams in order of first appearance, matching the kernels' group order
+        codes, teams = pd.factorize(team_ids, use_na_sentinel=True)
+        keys = [_team_key(team_id) for team_id in teams]
+
+        tails = [rolling.get(key, []) for key in keys]
+        history_ids = np.repeat(teams, [len(tail) for tail in tails]).astype(np.float64)
+        history = np.array([v for tail in tails for v in tail], dtype=np.float64)
+
+        all_ids = np.concatenate([history_ids, team_ids])
+        all_values = np.concatenate([history, values])
+        layout = group_layout(all_ids)
+        window_means = {
+            window: means[len(history):]
+            for window, means in grouped_rolling_means(all_ids, all_values, self.windows, layout=layout).items()
+        }
+
+        # New tails: each team's last max(window) values, history included
+        order, _, offsets = layout
+        starts = np.flatnonzero(offsets == 0)
+        if len(starts):
+            sizes = np.diff(np.append(starts, len(offsets)))[np.cumsum(offsets == 0) - 1]
+            keep = (offsets >= 0) & (offsets >= sizes - self.tail)
+            sorted_ids = all_ids[order]
+            for team_id, kept in pd.Series(all_values[order][keep]).groupby(sorted_ids[keep], sort=False):
+                rolling[_team_key(team_id)] = [_plain(v) for v in kept]
+
+        ewm_means = {}
+        if self.ewm_spans:
+            empty = [[0.0, 0.0] for _ in self.ewm_spans]
+            sums = np.array([ewm.get(key, empty) for key in keys], dtype=np.float64).reshape(len(keys), -1, 2)
+            ewm_means = grouped_ewm_means(
+                team_ids, values, self.ewm_spans, initial=(sums[:, :, 0], sums[:, :, 1])
+            )
+
+            # Carry the sums forward: older sums decay once per new row, new rows by their distance from the end
+            valid = (codes >= 0) & ~np.isnan(values)
+            sizes = np.bincount(codes[codes >= 0], minlength=len(teams))
+            rank = pd.Series(codes).groupby(codes).cumcount().to_numpy()
+            steps_back = np.where(codes >= 0, sizes[np.maximum(codes, 0)] - 1 - rank, 0)
+            for i, span in enumerate(self.ewm_spans):
+                decay = ewm_decay(span)
+                weights = np.where(valid, decay ** steps_back, 0.0)
+                numerator = decay ** sizes * sums[:, i, 0] + np.bincount(
+                    codes[valid], weights=(weights * np.nan_to_num(values))[valid], minlength=len(teams))
+                denominator = decay ** sizes * sums[:, i, 1] + np.bincount(
+                    codes[valid], weights=weights[valid], minlength=len(teams))
+                sums[:, i, 0], sums[:, i, 1] = numerator, denominator
+            for key, team_sums in zip(keys, sums.tolist()):
+                ewm[key] = team_sums
+
+        return window_means, ewm_means
+
+    def add_league_values(self, stat, league_ids, values):
+        """Fold new fixtures into each league's running sum"""
+        totals = self.league.setdefault(stat, {})
+        sums = pd.Series(values).groupby(np.asarray(league_ids)).agg(['sum', 'count'])
+        for league_id, row in sums.iterrows():
+            total = totals.setdefault(str(league_id), [0, 0])
+            total[0] += _plain(row['sum'])
+            total[1] += int(row['count'])
+
+    def league_mean(self, stat, league_id):
+        """A league's mean over every fixture seen so far"""
+        total, count = self.league.get(stat, {}).get(str(league_id), [0, 0])
+        return total / count if count else float('nan')
+
+    @classmethod
+    def load(cls, path=FEATURE_STATE_FILE):
+        """Load saved state, or None if there is none (or it predates the current layout)"""
+        path = Path(path)
+        if not path.exists():
+            return None
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if data.get('version') != STATE_VERSION:
+            return None
+
+        # A run that died between writing the ids and the JSON leaves them out of step
+        fixture_ids = np.fromfile(ids_path(path), dtype='<i8') if ids_path(path).exists() else np.array([])
+        if len(fixture_ids) != data['fixture_count']:
+            return None
+
+        return cls(
+            windows=data['windows'],
+            ewm_spans=data['ewm_spans'],
+            rolling=data['rolling'],
+            ewm=data['ewm'],
+            league=data['league'],
+            fixture_ids=fixture_ids.tolist(),
+            columns=data['columns'],
+            last_date=data['last_date'],
+        )
+
+    def save(self, path=FEATURE_STATE_FILE):
+        """Write state atomically, appending new ids to the id file (rewriting it after a full run)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.save_ids(path)
+
+        tmp_path = path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'version': STATE_VERSION,
+                'saved_at': datetime.now().isoformat(),
+                'windows': self.windows,
+                'ewm_spans': self.ewm_spans,
+                'rolling': self.rolling,
+                'ewm': self.ewm,
+                'league': self.league,
+                'fixture_count': len(self.fixture_ids),
+                'columns': self.columns,
+                'last_date': self.last_date,
+            }, f)
+        tmp_path.replace(path)
+
+    def save_ids(self, path=FEATURE_STATE_FILE):
+        """Bring the id file up to date with fixture_ids"""
+        target = ids_path(path)
+        if self.new_ids is None:
+            tmp_path = target.with_suffix('.bin.tmp')
+            np.array(sorted(self.fixture_ids), dtype='<i8').tofile(tmp_path)
+            tmp_path.replace(target)
+        elif self.new_ids:
+            with open(target, 'ab') as f:
+                np.array(self.new_ids, dtype='<i8').tofile(f)
+        self.new_ids = []
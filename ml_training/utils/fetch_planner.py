@@ -0,0 +1,288 @@
+"""
+Nightly Fetch Planner
+Fits each night's historical download to an API quota budget
+
+Work items are (league, season) pairs. Leagues come from config/leagues.json
+and are ordered by their priority field, newest season first, with anything
+left unfinished last night at the front of the queue. Each item costs one
+fixture-list call (free if the list is already on disk or in the response
+cache) plus one statistics call per fixture not yet downloaded. Fixture counts
+come from earlier runs, the response cache, the same league's other seasons or
+a conservative default.
+
+State (per-item progress and the carry-over queue) lives in
+data/historical/fetch_state.json; each night's plan and its outcome are
+written to logs/fetch_plans/ so backfill speed can be tracked.
+"""
+
+import os
+import json
+from pathlib import Path
+from datetime import datetime
+
+CONFIG_DIR = Path(__file__).parent.parent / 'config'
+DATA_DIR = Path(__file__).parent.parent / 'data'
+
+LEAGUES_CONFIG = CONFIG_DIR / 'leagues.json'
+STATE_FILE = DATA_DIR / 'historical' / 'fetch_state.json'
+REPORT_DIR = Path(__file__).parent.parent / 'logs' / 'fetch_plans'
+
+DEFAULT_BUDGET = int(os.getenv('API_FOOTBALL_NIGHTLY_BUDGET', 7000))
+DEFAULT_FIXTURES_PER_SEASON = 380  # a 20-team league; overestimates smaller leagues
+# Seasons run newest to oldest
+NEWEST_SEASON = 2018
+OLDEST_SEASON = 2000
+
+
+def item_key(league_id, season):
+    """State key for a league/season work item"""
+    return f'{season}:{league_id}'
+
+
+def load_leagues(path=LEAGUES_CONFIG):
+    """Leagues from config, ordered by priority (config order breaks ties)"""
+    with open(path, 'r') as f:
+        leagues = json.load(f)['leagues']
+
+    ranked = sorted(enumerate(leagues), key=lambda pair: (pair[1].get('priority', 99), pair[0]))
+    return [league for _, league in ranked]
+
+
+def league_ids(path=LEAGUES_CONFIG):
+    """Ids of the configured leagues, in priority order"""
+    return [league['id'] for league in load_leagues(path)]
+
+
+class FetchPlanner:
+    """Orders league/season work by priority and fits it to a nightly call budget"""
+
+    def __init__(self, budget=DEFAULT_BUDGET, leagues=None, seasons=None,
+                 state_file=STATE_FILE, report_dir=REPORT_DIR, cache=None):
+        self.budget = budget
+        self.leagues = leagues if leagues is not None else load_leagues()
+        self.seasons = list(seasons) if seasons is not None else list(range(NEWEST_SEASON, OLDEST_SEASON - 1, -1))
+        self.state_file = Path(state_file)
+        self.report_dir = Path(report_dir)
+        self.cache = cache
+        self.state = self.load_state()
+
+    def load_state(self):
+        """Per-item progress and carry-over queue from previous nights"""
+        if self.state_file.exists():
+            with open(self.state_file, 'r') as f:
+                return json.load(f)
+        return {'items': {}, 'carry_over': [], 'history': []}
+
+    def save_state(self):
+        """Write state atomically"""
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.state_file.with_suffix('.json.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        tmp_file.replace(self.state_file)
+
+    def seed_from_raw(self, raw_dir):
+        """Record fixture counts and finished stats already on disk from earlier downloads"""
+        from utils.json_stream import iter_json_array, iter_jsonl
+
+        raw_dir = Path(raw_dir)
+        for fixtures_file in raw_dir.glob('*_fixtures.json'):
+            season = fixtures_file.name.split('_')[0]
+            if not season.isdigit():
+                continue
+
+            league_of = {}
+            for fixture in iter_json_array(fixtures_file):
+                league_of[fixture['fixture']['id']] = fixture['league']['id']
+
+            done_ids = set()
+            journal_file = raw_dir / f'{season}_stats.jsonl'
+            if journal_file.exists():
+                done_ids = {entry['fixture_id'] for entry in iter_jsonl(journal_file)}
+
+            self.update_items(int(season), league_of, done_ids)
+
+    def update_items(self, season, league_of, done_ids, fetched_leagues=()):
+        """Update item progress from a season's fixture -> league map and fetched stats ids
+
+        fetched_leagues lists leagues whose fixture list was fetched this run, so
+        a league that played no fixtures that season is marked complete too.
+        """
+        counts = {league_id: (0, 0) for league_id in fetched_leagues}
+        for fixture_id, league_id in league_of.items():
+            total, done = counts.get(league_id, (0, 0))
+            counts[league_id] = (total + 1, done + (fixture_id in done_ids))
+
+        for league_id, (total, done) in counts.items():
+            self.state['items'][item_key(league_id, season)] = {
+                'league_id': league_id,
+                'season': season,
+                'fixtures': total,
+                'stats_done': done,
+                'complete': done >= total,
+            }
+
+    def cached_fixture_count(self, league_id, season):
+        """Fixture count from a cached fixture-list response, if there is one"""
+        if self.cache is None:
+            return None
+        body = self.cache.get('fixtures', {'league': league_id, 'season': season, 'status': 'FT'})
+        if body is None:
+            return None
+        return len(body.get('response', []))
+
+    def estimate_cost(self, league_id, season):
+        """Estimated API calls to finish an item, and where the fixture count came from"""
+        item = self.state['items'].get(item_key(league_id, season))
+        if item:
+            return item['fixtures'] - item['stats_done'], 'state'
+
+        cached = self.cached_fixture_count(league_id, season)
+        if cached is not None:
+            # The list call itself will be served from the cache
+            return cached, 'cache'
+
+        # League sizes rarely change much, so other seasons of the same league are a good guess
+        seen = [i['fixtures'] for i in self.state['items'].values()
+                if i['league_id'] == league_id and i['fixtures']]
+        if seen:
+            return 1 + max(seen), 'other_seasons'
+
+        return 1 + DEFAULT_FIXTURES_PER_SEASON, 'default'
+
+    def work_items(self):
+        """All unfinished items: carry-over first, then newest season, then league priority"""
+        items = []
+
+        for season in self.seasons:
+            for league in self.leagues:
+                state = self.state['items'].get(item_key(league['id'], season))
+                if state and state['complete']:
+                    continue
+                items.append({
+                    'key': item_key(league['id'], season),
+                    'league_id': league['id'],
+                    'league': league['name'],
+                    'season': season,
+                    'priority': league.get('priority', 99),
+                })
+
+        carry_over = {key: rank for rank, key in enumerate(self.state.get('carry_over', []))}
+        items.sort(key=lambda item: (item['key'] not in carry_over, carry_over.get(item['key'], 0)))
+        return items
+
+    def build_plan(self, budget=None):
+        """Take items in order until the budget (default: the nightly budget) is spent
+
+        The first item that doesn't fit is still scheduled with whatever budget
+        is left (statistics are fetched per fixture, so it finishes tomorrow);
+        nothing after it runs, so a lower priority league never jumps the queue.
+        """
+        budget = self.budget if budget is None else budget
+        scheduled = []
+        remaining_budget = budget
+        backlog_items = 0
+        backlog_calls = 0
+
+        for item in self.work_items():
+            cost, source = self.estimate_cost(item['league_id'], item['season'])
+
+            if remaining_budget <= 0:
+                backlog_items += 1
+                backlog_calls += cost
+                continue
+
+            allotted = min(cost, remaining_budget)
+            scheduled.append({**item, 'estimated_calls': cost, 'allotted_calls': allotted,
+                              'estimate_source': source, 'partial': allotted < cost})
+            remaining_budget -= allotted
+
+            if allotted < cost:
+                backlog_items += 1
+                backlog_calls += cost - allotted
+
+        return {
+            'created': datetime.now().isoformat(),
+            'budget': budget,
+            'planned_calls': budget - remaining_budget,
+            'items': scheduled,
+            'backlog_items': backlog_items,
+            'backlog_calls': backlog_calls,
+            'nights_remaining': -(-backlog_calls // self.budget) if self.budget else None,
+        }
+
+    def seasons_in_plan(self, plan):
+        """Planned league ids per season, newest season first, in plan order"""
+        by_season = {}
+        for item in plan['items']:
+            by_season.setdefault(item['season'], []).append(item['league_id'])
+        return dict(sorted(by_season.items(), reverse=True))
+
+    def write_plan(self, plan):
+        """Write tonight's plan to logs/fetch_plans/plan_{date}.json"""
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+        plan_file = self.report_dir / f'plan_{datetime.now().strftime("%Y%m%d")}.json'
+        with open(plan_file, 'w') as f:
+            json.dump(plan, f, indent=2)
+        return plan_file
+
+    def merge_plans(self, plans):
+        """Fold top-up rounds into the night's first plan for reporting"""
+        merged = {**plans[0], 'items': [], 'rounds': len(plans), 'planned_calls': 0}
+        for plan in plans:
+            merged['items'].extend(plan['items'])
+            merged['planned_calls'] += plan['planned_calls']
+        merged['backlog_items'] = plans[-1]['backlog_items']
+        merged['backlog_calls'] = plans[-1]['backlog_calls']
+        merged['nights_remaining'] = plans[-1]['nights_remaining']
+        return merged
+
+    def record_run(self, plan, api_summary):
+        """Compare the plan with what ran, update carry-over and write the run report
+
+        Call after update_items() has recorded each planned season's progress.
+        """
+        completed = []
+        carry_over = []
+
+        for key in dict.fromkeys(item['key'] for item in plan['items']):
+            state = self.state['items'].get(key)
+            if state and state['complete']:
+                completed.append(key)
+            else:
+                carry_over.append(key)
+
+        self.state['carry_over'] = carry_over
+
+        items = self.state['items'].values()
+        total_items = len(self.seasons) * len(self.leagues)
+        finished = sum(1 for item in items if item['complete'])
+
+        report = {
+            'date': datetime.now().strftime('%Y-%m-%d'),
+            'finished_at': datetime.now().isoformat(),
+            'budget': plan['budget'],
+            'planned_calls': plan['planned_calls'],
+            'actual_calls': api_summary['requests'],
+            'quota_remaining': api_summary['quota_remaining'],
+            'planned_items': len(plan['items']),
+            'completed_items': completed,
+            'carried_over': carry_over,
+            'stats_downloaded': sum(item['stats_done'] for item in items),
+            'backfill_items_complete': finished,
+            'backfill_items_total': total_items,
+            'backfill_percent': round(100 * finished / total_items, 1) if total_items else 100.0,
+        }
+
+        # Keep a compact per-night history so progress over time is visible in one file
+        self.state.setdefault('history', []).append({
+            key: report[key] for key in ('date', 'actual_calls', 'stats_downloaded', 'backfill_items_complete')
+        })
+        self.save_state()
+
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+        report_file = self.report_dir / f'report_{datetime.now().strftime("%Y%m%d")}.json'
+        with open(report_file, 'w') as f:
+            json.dump({'plan': plan, 'run': report}, f, indent=2)
+
+        return report, report_file
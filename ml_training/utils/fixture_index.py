@@ -0,0 +1,201 @@
+"""
+Known-Fixture Index
+SQLite table of every fixture_id already stored, and where it was stored
+
+Fetchers check it before requesting statistics, so overlapping runs only pay
+for genuinely new fixtures; writers register what they save. If it is ever
+lost or out of sync, rebuild it from the files on disk:
+
+    python -m utils.fixture_index --rebuild
+"""
+
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+INDEX_DB = DATA_DIR / 'fixture_index.sqlite'
+
+# Stay under SQLite's bound-parameter limit
+BATCH_SIZE = 500
+
+# Sources whose locations hold processed fixture rows (journals hold raw API stats)
+ROW_SOURCES = ('raw', 'historical', 'incremental', 'store')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fixtures (
+    fixture_id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    location TEXT,
+    stored_at TEXT NOT NULL
+)
+"""
+
+
+class FixtureIndex:
+    """Persistent set of stored fixture ids, safe to share between worker threads"""
+
+    def __init__(self, path=INDEX_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        # WAL lets 00a/00b/01 read while another process writes
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(SCHEMA)
+        self.conn.commit()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM fixtures').fetchone()[0]
+
+    def __contains__(self, fixture_id):
+        return bool(self.known([fixture_id]))
+
+    def locations(self, fixture_ids, sources=None):
+        """{fixture_id: (source, location)} for the fixture_ids already stored (optionally only in these sources)"""
+        ids = [int(fixture_id) for fixture_id in fixture_ids]
+        found = {}
+
+        with self.lock:
+            for i in range(0, len(ids), BATCH_SIZE):
+                batch = ids[i:i + BATCH_SIZE]
+                placeholders = ','.join('?' * len(batch))
+                rows = self.conn.execute(
+                    f'SELECT fixture_id, source, location FROM fixtures WHERE fixture_id IN ({placeholders})', batch
+                )
+                found.update((row[0], (row[1], row[2])) for row in rows if sources is None or row[1] in sources)
+
+        return found
+
+    def known(self, fixture_ids, sources=None):
+        """The subset of fixture_ids already stored (optionally only in these sources)"""
+        return set(self.locations(fixture_ids, sources))
+
+    def filter_new(self, fixtures, sources=None):
+        """Drop API fixture payloads whose id is already stored (order preserved)"""
+        known = self.known((f['fixture']['id'] for f in fixtures), sources)
+        return [f for f in fixtures if f['fixture']['id'] not in known]
+
+    def read_rows(self, fixture_ids, exclude=()):
+        """Stored rows of these fixtures, read back from wherever the index says they are
+
+        Only ROW_SOURCES locations can be read; locations in exclude (typically
+        the caller's own output, which it merges itself) are left out.
+        """
+        import pandas as pd
+
+        exclude = {str(location) for location in exclude}
+        by_location = {}
+        for fixture_id, (_, location) in self.locations(fixture_ids, ROW_SOURCES).items():
+            if location and location not in exclude:
+                by_location.setdefault(location, []).append(fixture_id)
+
+        frames = []
+        for location, ids in sorted(by_location.items()):
+            path = Path(location)
+            if not path.exists():
+                logger.warning(f"⚠️  {len(ids)} indexed fixtures not read back: {location} is gone "
+                               f"(python -m utils.fixture_index --rebuild)")
+                continue
+            if path.is_dir() or path.suffix == '.parquet':
+                df = pd.read_parquet(path, filters=[('fixture_id', 'in', ids)])
+            else:
+                df = pd.read_csv(path)
+                df = df[df['fixture_id'].isin(ids)]
+            frames.append(df)
+
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True).drop_duplicates('fixture_id', keep='last')
+
+    def add(self, fixture_ids, source, location=None):
+        """Register stored fixtures (a fixture already known moves to its latest location)"""
+        stored_at = datetime.now().isoformat()
+        rows = [(int(fixture_id), source, str(location) if location else None, stored_at)
+                for fixture_id in fixture_ids]
+
+        with self.lock:
+            self.conn.executemany(
+                'INSERT INTO fixtures VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(fixture_id) DO UPDATE SET source = excluded.source, location = excluded.location',
+                rows
+            )
+            self.conn.commit()
+
+        return len(rows)
+
+    def sources(self):
+        """Fixture counts per source, for logs"""
+        with self.lock:
+            return dict(self.conn.execute('SELECT source, COUNT(*) FROM fixtures GROUP BY source'))
+
+    def rebuild(self, data_dir=DATA_DIR):
+        """Replace the index with every fixture found in the data directory"""
+        import pandas as pd
+        from utils.json_stream import iter_jsonl
+
+        data_dir = Path(data_dir)
+        with self.lock:
+            self.conn.execute('DELETE FROM fixtures')
+            self.conn.commit()
+
+        # Journals first, so fixtures 00b has since processed end up under their CSV / store location
+        for journal_file in sorted((data_dir / 'historical' / 'raw').glob('*_stats.jsonl')):
+            self.add((entry['fixture_id'] for entry in iter_jsonl(journal_file)), 'journal', journal_file)
+
+        csv_sources = [
+            ('raw', sorted((data_dir / 'raw').glob('*.csv'))),
+            ('historical', sorted((data_dir / 'historical').glob('fixtures_*.csv'))),
+            ('incremental', sorted((data_dir / 'incremental').glob('*.csv'))),
+        ]
+
+        for source, files in csv_sources:
+            for csv_file in files:
+                try:
+                    ids = pd.read_csv(csv_file, usecols=['fixture_id'])['fixture_id'].dropna()
+                except (ValueError, pd.errors.EmptyDataError):
+                    continue  # no fixture_id column
+                self.add(ids, source, csv_file)
+
+        # Daily CSVs already compacted into monthly partitions
+        for partition in sorted((data_dir / 'incremental' / 'monthly').glob('*.parquet')):
+            self.add(pd.read_parquet(partition, columns=['fixture_id'])['fixture_id'], 'incremental', partition)
+
+        store = data_dir / 'historical' / 'store'
+        if store.exists() and any(store.glob('season=*')):
+            ids = pd.read_parquet(store, columns=['fixture_id'])['fixture_id']
+            self.add(ids, 'store', store)
+
+        return self.sources()
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
+
+
+def main():
+    """Inspect or rebuild the index"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Known-fixture index')
+    parser.add_argument('--rebuild', action='store_true', help='Re-scan data/ and re-register every stored fixture')
+    args = parser.parse_args()
+
+    index = FixtureIndex()
+    if args.rebuild:
+        print(f"🔄 Rebuilding {index.path} from {DATA_DIR}...")
+        index.rebuild()
+
+    print(f"📇 {len(index):,} known fixtures")
+    for source, count in index.sources().items():
+        print(f"   {source}: {count:,}")
+    index.close()
+
+
+if __name__ == '__main__':
+    main()
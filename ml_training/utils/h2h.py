@@ -0,0 +1,173 @@
+"""
+Head-to-Head Index
+Past meetings of every team pair, sorted by date, with prefix sums per stat
+
+Meetings are keyed by the unordered team pair and laid out pair by pair in date
+order, so a pair's last N meetings before any date are one binary search plus
+two prefix-sum lookups away. Whole columns of fixtures are answered at once:
+
+    index = HeadToHeadIndex.from_fixtures(history)
+    features = index.features(home_ids, away_ids, kickoffs, lookback=5)
+
+Only meetings strictly before each date count, so a fixture never sees itself.
+
+On disk the meetings are Parquet parts: an incremental run appends its new
+fixtures as a part, and answers their features from the saved index plus a
+small index of the new meetings (later=) instead of re-indexing everything.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.parquet_parts import append_part, read_parts, replace_parts
+
+H2H_INDEX_FILE = Path(__file__).parent.parent / 'data' / 'processed' / 'h2h_index'
+
+MEETING_COLS = ['fixture_id', 'date', 'home_team_id', 'away_team_id',
+                'home_goals', 'away_goals', 'total_corners', 'total_cards']
+
+# Seconds fit in the low 32 bits of the (pair, time) search key until 2106
+PAIR_SHIFT = np.int64(1) << np.int64(32)
+
+
+def _seconds(dates):
+    """Dates as int64 seconds since the epoch (tz-aware values converted to UTC)"""
+    values = pd.to_datetime(pd.Series(dates).to_numpy(), utc=True).tz_convert(None)
+    return values.to_numpy().astype('datetime64[s]').astype(np.int64)
+
+
+def _team_ids(values):
+    """Team ids as int64, missing ids as -1"""
+    return pd.to_numeric(pd.Series(values), errors='coerce').fillna(-1).to_numpy().astype(np.int64)
+
+
+def pair_keys(home_ids, away_ids):
+    """Order-independent key for each team pair"""
+    low = np.minimum(home_ids, away_ids)
+    high = np.maximum(home_ids, away_ids)
+    return low * PAIR_SHIFT + high
+
+
+class HeadToHeadIndex:
+    """Date-sorted meetings per unordered team pair"""
+
+    def __init__(self, meetings):
+        meetings = meetings[MEETING_COLS].drop_duplicates(subset=['fixture_id'], keep='last')
+        home_ids = _team_ids(meetings['home_team_id'])
+        away_ids = _team_ids(meetings['away_team_id'])
+        seconds = _seconds(meetings['date'])
+
+        # Pair codes in key order, meetings grouped by pair then date
+        self.pairs, codes = np.unique(pair_keys(home_ids, away_ids), return_inverse=True)
+        order = np.lexsort((meetings['fixture_id'].to_numpy(), seconds, codes))
+        self.meetings = meetings.iloc[order].reset_index(drop=True)
+        self.search_keys = codes[order] * PAIR_SHIFT + seconds[order]
+        self.pair_starts = np.searchsorted(codes[order], np.arange(len(self.pairs)))
+
+        # Goals by the lower and the higher team id of the pair, whichever side they played
+        home_ids, away_ids = home_ids[order], away_ids[order]
+        home_goals = self.meetings['home_goals'].to_numpy(dtype=float)
+        away_goals = self.meetings['away_goals'].to_numpy(dtype=float)
+        low_is_home = home_ids <= away_ids
+
+        stats = {
+            'goals': home_goals + away_goals,
+            'btts': ((home_goals > 0) & (away_goals > 0)).astype(float),
+            'corners': self.meetings['total_corners'].to_numpy(dtype=float),
+            'cards': self.meetings['total_cards'].to_numpy(dtype=float),
+            'low_goals': np.where(low_is_home, home_goals, away_goals),
+            'high_goals': np.where(low_is_home, away_goals, home_goals),
+        }
+
+        # Prefix sums with a leading zero: sum(meetings a..b-1) = prefix[b] - prefix[a]
+        self.prefix_sum = {}
+        self.prefix_count = {}
+        for name, values in stats.items():
+            valid = ~np.isnan(values)
+            self.prefix_sum[name] = np.concatenate([[0.0], np.cumsum(np.where(valid, values, 0.0))])
+            self.prefix_count[name] = np.concatenate([[0], np.cumsum(valid)])
+
+    def __len__(self):
+        return len(self.meetings)
+
+    @classmethod
+    def from_fixtures(cls, df):
+        """Index every fixture in a frame with the meeting columns"""
+        meetings = df.reindex(columns=MEETING_COLS)
+        meetings['date'] = pd.to_datetime(meetings['date'])
+        return cls(meetings)
+
+    def extend(self, df):
+        """New index with more fixtures added (re-processed fixtures replace their meetings)"""
+        added = HeadToHeadIndex.from_fixtures(df).meetings
+        return HeadToHeadIndex(pd.concat([self.meetings, added], ignore_index=True))
+
+    @classmethod
+    def load(cls, path=H2H_INDEX_FILE):
+        """Load the saved meetings (every part), or None if there are none"""
+        meetings = read_parts(path)
+        return None if meetings is None else cls(meetings)
+
+    def save(self, path=H2H_INDEX_FILE):
+        """Replace the saved meetings with this index's"""
+        replace_parts(self.meetings, path)
+
+    def window(self, home_ids, away_ids, dates, lookback):
+        """[begin, end) meeting positions: each pair's last `lookback` meetings before each date"""
+        home_ids, away_ids = _team_ids(home_ids), _team_ids(away_ids)
+        keys = pair_keys(home_ids, away_ids)
+
+        if not len(self.pairs):
+            empty = np.zeros(len(keys), dtype=np.int64)
+            return empty, empty.copy(), home_ids <= away_ids
+
+        codes = np.minimum(np.searchsorted(self.pairs, keys), len(self.pairs) - 1)
+        known = (self.pairs[codes] == keys) & (home_ids >= 0) & (away_ids >= 0)
+
+        end = np.searchsorted(self.search_keys, codes * PAIR_SHIFT + _seconds(dates), side='left')
+        begin = np.maximum(end - lookback, self.pair_starts[codes])
+        begin[~known] = 0
+        end[~known] = 0
+        return begin, end, home_ids <= away_ids
+
+    def features(self, home_ids, away_ids, dates, lookback=5, later=None):
+        """h2h_* features for each (home, away, date), from the home team's point of view
+
+        later: an index of meetings that all come after this one's (an
+        incremental run's new fixtures); each pair's most recent meetings are
+        taken from it first, then from this index, up to lookback in total.
+        """
+        matches = np.zeros(len(home_ids), dtype=np.int64)
+        sums, counts = {}, {}
+
+        for index in [self] if later is None else [later, self]:
+            begin, end, home_is_low = index.window(home_ids, away_ids, dates, lookback - matches)
+            matches = matches + (end - begin)
+            for name in index.prefix_sum:
+                sums[name] = sums.get(name, 0) + index.prefix_sum[name][end] - index.prefix_sum[name][begin]
+                counts[name] = counts.get(name, 0) + index.prefix_count[name][end] - index.prefix_count[name][begin]
+
+        def mean(name):
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return np.where(counts[name] > 0, sums[name] / counts[name], np.nan)
+
+        low_goals, high_goals = mean('low_goals'), mean('high_goals')
+
+        return pd.DataFrame({
+            'h2h_matches': matches,
+            'h2h_avg_goals': mean('goals'),
+            'h2h_home_team_goals': np.where(home_is_low, low_goals, high_goals),
+            'h2h_away_team_goals': np.where(home_is_low, high_goals, low_goals),
+            'h2h_btts_rate': mean('btts'),
+            'h2h_avg_corners': mean('corners'),
+            'h2h_avg_cards': mean('cards'),
+        })
+
+
+def append_meetings(df, path=H2H_INDEX_FILE):
+    """Save newly processed fixtures as a new part of the saved index; returns meetings written"""
+    meetings = HeadToHeadIndex.from_fixtures(df).meetings
+    append_part(meetings, path)
+    return len(meetings)
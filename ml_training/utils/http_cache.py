@@ -0,0 +1,163 @@
+"""
+API Response Cache
+Content-addressed on-disk cache for API-Football responses
+
+Entries are keyed by a hash of endpoint + params, so reruns and overlapping
+date ranges are served from disk instead of spending API quota. Each endpoint
+has its own TTL (statistics of finished fixtures never change, so they never
+expire) and the cache is kept under a size budget by evicting the least
+recently used entries.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(os.getenv(
+    'API_FOOTBALL_CACHE_DIR',
+    Path(__file__).parent.parent / 'data' / 'cache' / 'api_football'
+))
+DEFAULT_MAX_BYTES = int(os.getenv('API_FOOTBALL_CACHE_MAX_MB', 2048)) * 1024 * 1024
+
+# Seconds a cached response stays fresh (None = never expires)
+ENDPOINT_TTLS = {
+    'fixtures/statistics': None,  # only ever requested for FT fixtures
+    'fixtures': 24 * 3600,
+}
+DEFAULT_TTL = 3600
+
+
+class ResponseCache:
+    """Disk cache of API response bodies with per-endpoint TTL and LRU eviction"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, ttls=None):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttls = {**ENDPOINT_TTLS, **(ttls or {})}
+
+        self.hits = 0
+        self.misses = 0
+        self.size = None  # measured lazily on the first write
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(endpoint, params):
+        """Stable content hash of an endpoint and its params"""
+        normalised = {
+            'endpoint': endpoint.strip('/'),
+            'params': {str(k): str(v) for k, v in (params or {}).items()},
+        }
+        return hashlib.sha256(json.dumps(normalised, sort_keys=True).encode()).hexdigest()
+
+    def _path(self, key):
+        """Entries are sharded by the first two hex digits of their key"""
+        return self.cache_dir / key[:2] / f'{key}.json'
+
+    def get(self, endpoint, params):
+        """Return the cached body, or None on a miss or an expired entry"""
+        path = self._path(self.key(endpoint, params))
+
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self.lock:
+                self.misses += 1
+            return None
+
+        expires_at = entry.get('expires_at')
+        if expires_at is not None and expires_at < time.time():
+            with self.lock:
+                self.misses += 1
+            return None
+
+        # Touch the entry so eviction treats it as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        with self.lock:
+            self.hits += 1
+        return entry['body']
+
+    def put(self, endpoint, params, body, ttl='default'):
+        """Store a response body; ttl overrides the endpoint's TTL (None = forever)"""
+        if ttl == 'default':
+            ttl = self.ttls.get(endpoint.strip('/'), DEFAULT_TTL)
+
+        key = self.key(endpoint, params)
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+
+        entry = {
+            'endpoint': endpoint,
+            'params': params,
+            'stored_at': time.time(),
+            'expires_at': time.time() + ttl if ttl is not None else None,
+            'body': body,
+        }
+
+        # Write under a unique temp name, then rename, so readers never see partial files
+        tmp_path = path.with_name(f'{key}.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+        written = tmp_path.stat().st_size
+        old_size = path.stat().st_size if path.exists() else 0
+        os.replace(tmp_path, path)
+
+        with self.lock:
+            if self.size is None:
+                self.size = self._measure()
+            else:
+                self.size += written - old_size
+            over_budget = self.size > self.max_bytes
+
+        if over_budget:
+            self.evict()
+
+    def _measure(self):
+        """Total bytes currently on disk"""
+        return sum(p.stat().st_size for p in self.cache_dir.glob('*/*.json'))
+
+    def evict(self):
+        """Delete least recently used entries until the cache is at 90% of its budget"""
+        with self.lock:
+            entries = []
+            for path in self.cache_dir.glob('*/*.json'):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            entries.sort()
+            size = sum(e[1] for e in entries)
+            target = self.max_bytes * 0.9
+            removed = 0
+
+            for _, entry_size, path in entries:
+                if size <= target:
+                    break
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                size -= entry_size
+                removed += 1
+
+            self.size = size
+
+        logger.info(f"🧹 Cache eviction: removed {removed} entries ({size / 1024 / 1024:.0f}MB left)")
+
+    def summary(self):
+        """Hit/miss counts for reports"""
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,237 @@
+"""
+Incremental Store
+Rolls 01's daily CSVs in data/incremental/ into monthly Parquet partitions
+
+Layout:
+    data/incremental/2025-11-29.csv            # written by 01, not yet compacted
+    data/incremental/monthly/2025-11.parquet   # one partition per month
+    data/incremental/manifest.json             # rows, date range and sha256 per partition
+    data/incremental/archive/2025-11/...       # daily CSVs already folded into a partition
+
+Readers open the manifest, then only the partitions they need plus any daily
+files newer than the last compaction. Compaction is idempotent: re-running it
+(or re-running 01 for a compacted day) merges by fixture_id.
+
+    python -m utils.incremental_store --compact
+    python -m utils.incremental_store --verify
+"""
+
+import re
+import json
+import shutil
+import hashlib
+from pathlib import Path
+from datetime import datetime
+
+import pandas as pd
+
+from utils.columnar_store import conform_to_schema
+from utils.fixture_index import FixtureIndex
+from utils.normalizer import RECORD_DTYPES
+from utils.parallel_read import read_files
+from utils.schema import read_csv_table
+
+INCREMENTAL_DIR = Path(__file__).parent.parent / 'data' / 'incremental'
+
+DAILY_FILE = re.compile(r'^(\d{4}-\d{2})-\d{2}\.csv$')
+
+
+def _sha256(path):
+    """Content hash of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def manifest_path(root=INCREMENTAL_DIR):
+    """Location of the manifest for a store root"""
+    return Path(root) / 'manifest.json'
+
+
+def load_manifest(root=INCREMENTAL_DIR):
+    """The manifest, or an empty one before the first compaction"""
+    path = manifest_path(root)
+    if path.exists():
+        with open(path, 'r') as f:
+            return json.load(f)
+    return {'partitions': {}}
+
+
+def save_manifest(manifest, root=INCREMENTAL_DIR):
+    """Write the manifest atomically"""
+    manifest['updated'] = datetime.now().isoformat()
+    path = manifest_path(root)
+    tmp_path = path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    tmp_path.replace(path)
+
+
+def daily_files(root=INCREMENTAL_DIR):
+    """Daily CSVs not yet compacted, grouped by month"""
+    by_month = {}
+    for path in sorted(Path(root).glob('*.csv')):
+        match = DAILY_FILE.match(path.name)
+        if match:
+            by_month.setdefault(match.group(1), []).append(path)
+    return by_month
+
+
+def compact(root=INCREMENTAL_DIR, archive=True, index=None):
+    """Fold daily CSVs into their monthly partitions and update the manifest
+
+    The known-fixture index (index, default the shared one) is re-pointed from
+    each daily file to its partition. Returns the months that changed.
+    """
+    root = Path(root)
+    manifest = load_manifest(root)
+    changed = []
+    if index is None:
+        index = FixtureIndex()
+
+    for month, files in daily_files(root).items():
+        entry = manifest['partitions'].get(month, {'sources': {}})
+        partition = root / 'monthly' / f'{month}.parquet'
+        partition.parent.mkdir(parents=True, exist_ok=True)
+
+        frames = []
+        daily_ids = []
+        if partition.exists():
+            frames.append(pd.read_parquet(partition))
+        for path in files:
+            daily = pd.read_csv(path)
+            frames.append(conform_to_schema(daily))
+            daily_ids.extend(daily['fixture_id'].dropna())
+            entry['sources'][path.name] = {'rows': len(daily), 'sha256': _sha256(path)}
+
+        # Later files win, so a re-fetched fixture replaces its earlier row
+        df = pd.concat(frames, ignore_index=True)
+        df = df.drop_duplicates(subset=['fixture_id'], keep='last')
+        df = df.sort_values(['date', 'fixture_id']).reset_index(drop=True)
+
+        tmp_path = partition.with_suffix('.parquet.tmp')
+        df.to_parquet(tmp_path, engine='pyarrow', index=False)
+        tmp_path.replace(partition)
+
+        entry.update({
+            'file': str(partition.relative_to(root)),
+            'rows': len(df),
+            'sha256': _sha256(partition),
+            'min_date': str(df['date'].min()),
+            'max_date': str(df['date'].max()),
+        })
+        manifest['partitions'][month] = entry
+
+        # Manifest before archiving: a crash in between just re-merges the same files next time
+        save_manifest(manifest, root)
+        index.add(daily_ids, 'incremental', partition)
+
+        if archive:
+            archive_dir = root / 'archive' / month
+            archive_dir.mkdir(parents=True, exist_ok=True)
+            for path in files:
+                shutil.move(str(path), str(archive_dir / path.name))
+
+        changed.append(month)
+
+    return changed
+
+
+def incremental_sources(root=INCREMENTAL_DIR, since=None):
+    """(name, path, sha256) per monthly partition, then per daily CSV not yet compacted
+
+    since ('YYYY-MM') skips older partitions without opening them. Daily files
+    have no recorded hash (None).
+    """
+    root = Path(root)
+    sources = []
+
+    for month, entry in sorted(load_manifest(root)['partitions'].items()):
+        if since and month < since:
+            continue
+        sources.append((month, root / entry['file'], entry['sha256']))
+
+    for month, files in daily_files(root).items():
+        if since and month < since:
+            continue
+        sources.extend((path.name, path, None) for path in files)
+
+    return sources
+
+
+def read_source(path, sha256=None):
+    """Fixtures from one partition or daily CSV; checks the partition hash when given"""
+    path = Path(path)
+    if path.suffix == '.parquet':
+        if sha256 is not None and _sha256(path) != sha256:
+            raise ValueError(f"Partition {path} does not match its manifest hash")
+        return pd.read_parquet(path)
+    return conform_to_schema(read_csv_table(path, columns=RECORD_DTYPES))
+
+
+def iter_incremental(root=INCREMENTAL_DIR, since=None, verify=False):
+    """Yield (name, fixtures) per monthly partition, then per daily CSV not yet compacted
+
+    since ('YYYY-MM') skips older partitions without opening them. With verify,
+    each partition's hash is checked against the manifest first.
+    """
+    for name, path, sha256 in incremental_sources(root, since):
+        yield name, read_source(path, sha256 if verify else None)
+
+
+def read_incremental(root=INCREMENTAL_DIR, since=None, verify=False, workers=None, report=None):
+    """Read incremental fixtures through the manifest, several files at a time
+
+    since ('YYYY-MM') skips older partitions without opening them. Daily CSVs
+    that have not been compacted yet are included too. With verify, each
+    partition's hash is checked against the manifest first. report(name, rows,
+    seconds) is called per file, in read order.
+    """
+    sources = incremental_sources(root, since)
+    names = {path: (name, sha256) for name, path, sha256 in sources}
+
+    def reader(path):
+        return read_source(path, names[path][1] if verify else None)
+
+    frames = []
+    for path, df, error, seconds in read_files(names, reader, workers):
+        if error is not None:
+            raise error
+        if report is not None:
+            report(names[path][0], len(df), seconds)
+        frames.append(df)
+
+    if not frames:
+        return pd.DataFrame()
+
+    df = pd.concat(frames, ignore_index=True)
+    return df.drop_duplicates(subset=['fixture_id'], keep='last').reset_index(drop=True)
+
+
+def main():
+    """Compact or verify the incremental store"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Incremental data compaction')
+    parser.add_argument('--compact', action='store_true', help='Fold daily CSVs into monthly partitions')
+    parser.add_argument('--no-archive', action='store_true', help='Leave compacted daily CSVs in place')
+    parser.add_argument('--verify', action='store_true', help='Check every partition against the manifest')
+    args = parser.parse_args()
+
+    if args.compact:
+        changed = compact(archive=not args.no_archive)
+        print(f"🗜️  Compacted {len(changed)} months: {', '.join(changed) or '-'}")
+
+    manifest = load_manifest()
+    for month, entry in sorted(manifest['partitions'].items()):
+        status = ''
+        if args.verify:
+            ok = _sha256(INCREMENTAL_DIR / entry['file']) == entry['sha256']
+            status = ' ✅' if ok else ' ❌ hash mismatch'
+        print(f"   {month}: {entry['rows']:,} rows from {len(entry['sources'])} daily files{status}")
+
+
+if __name__ == '__main__':
+    main()
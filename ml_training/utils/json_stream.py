@@ -0,0 +1,114 @@
+"""
+Streaming JSON Readers
+Iterate over huge JSON files without materialising them
+
+{year}_fixtures.json is a top-level array and {year}_stats.json a top-level
+object of fixture_id -> stats; both run to hundreds of MB. These readers hold
+one read chunk plus the current item in memory at a time.
+"""
+
+import json
+
+CHUNK_SIZE = 1 << 20  # 1MB reads
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+class _StreamReader:
+    """Incremental JSON tokenizer over a text file"""
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        """Drop consumed text and read the next chunk"""
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+
+    def peek(self):
+        """Next non-whitespace character ('' at end of file)"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos:self.pos + 1]
+            self._fill()
+
+    def expect(self, chars):
+        """Consume one of the given structural characters"""
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Expected one of {chars!r}, found {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self._fill()
+                continue
+
+            # A number that ends exactly at the buffer edge may be cut short
+            if end == len(self.buf) and not self.eof:
+                self._fill()
+                continue
+
+            # Values sit inside an array or object, so one running to the end of
+            # the file was truncated (a number cut short would otherwise pass)
+            if end == len(self.buf):
+                raise ValueError("Unexpected end of file after a value (truncated file?)")
+
+            self.pos = end
+            return value
+
+
+def iter_json_array(path, chunk_size=CHUNK_SIZE):
+    """Yield the items of a top-level JSON array one at a time"""
+    with open(path, 'r') as f:
+        reader = _StreamReader(f, chunk_size)
+        reader.expect('[')
+        if reader.peek() == ']':
+            return
+        while True:
+            yield reader.value()
+            if reader.expect(',]') == ']':
+                return
+
+
+def iter_json_object(path, chunk_size=CHUNK_SIZE):
+    """Yield the (key, value) pairs of a top-level JSON object one at a time"""
+    with open(path, 'r') as f:
+        reader = _StreamReader(f, chunk_size)
+        reader.expect('{')
+        if reader.peek() == '}':
+            return
+        while True:
+            key = reader.value()
+            reader.expect(':')
+            yield key, reader.value()
+            if reader.expect(',}') == '}':
+                return
+
+
+def iter_jsonl(path):
+    """Yield each complete line of a JSON-lines file, skipping a torn last line"""
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
@@ -0,0 +1,28 @@
+"""
+Memory Reporting
+Peak resident memory of the current process and the size of DataFrames, for log lines
+"""
+
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """Peak resident set size in MB, or None where the platform can't report it"""
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    if sys.platform == 'darwin':
+        return peak / 1024 / 1024
+    return peak / 1024
+
+
+def frame_mb(df):
+    """Memory held by a DataFrame, strings and categories included, in MB"""
+    return df.memory_usage(deep=True).sum() / 1024 / 1024
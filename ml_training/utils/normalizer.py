@@ -0,0 +1,194 @@
+"""
+Fixture Normalizer
+Turns an API-Football fixture plus its statistics payload into one flat record
+
+Shared by 00, 00b and 01 so every fetcher produces the same columns. Each
+team's statistics list is scanned exactly once; normalize_batch() goes straight
+from a stream of payloads to columnar NumPy arrays.
+"""
+
+import numpy as np
+
+# API-Football statistic type -> column suffix (prefixed with home_/away_)
+STAT_FIELDS = {
+    'Corner Kicks': 'corners',
+    'Yellow Cards': 'yellow_cards',
+    'Red Cards': 'red_cards',
+    'Total Shots': 'shots',
+    'Shots on Goal': 'shots_on_target',
+    'Ball Possession': 'possession',
+}
+
+# Output columns, in order, with the dtype used by normalize_batch()
+RECORD_DTYPES = {
+    'fixture_id': np.int64,
+    'date': object,
+    'league': object,
+    'league_id': np.int32,
+    'season': np.int16,
+    'home_team': object,
+    'home_team_id': np.int32,
+    'away_team': object,
+    'away_team_id': np.int32,
+    'home_goals': np.int16,
+    'away_goals': np.int16,
+    'total_goals': np.int16,
+    'ht_home_goals': np.float32,  # NaN when the API has no halftime score
+    'ht_away_goals': np.float32,
+
+    # Targets
+    'btts': np.int8,
+    'over_2_5_goals': np.int8,
+    'over_9_5_corners': np.int8,
+    'over_3_5_cards': np.int8,
+
+    # Stats
+    'home_corners': np.int16,
+    'away_corners': np.int16,
+    'total_corners': np.int16,
+    'home_yellow_cards': np.int16,
+    'away_yellow_cards': np.int16,
+    'home_red_cards': np.int16,
+    'away_red_cards': np.int16,
+    'total_cards': np.int16,
+    'home_shots': np.int16,
+    'away_shots': np.int16,
+    'home_shots_on_target': np.int16,
+    'away_shots_on_target': np.int16,
+    'home_possession': np.float32,
+    'away_possession': np.float32,
+}
+
+
+def _to_number(value):
+    """Coerce an API stat value ('55%', None, 7) to a number"""
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        try:
+            return float(value.replace('%', ''))
+        except ValueError:
+            return 0
+    return value
+
+
+def _team_stats(statistics):
+    """Single pass over one team's statistics list"""
+    values = dict.fromkeys(STAT_FIELDS.values(), 0)
+    for stat in statistics:
+        field = STAT_FIELDS.get(stat['type'])
+        if field is not None:
+            values[field] = _to_number(stat['value'])
+    return values
+
+
+def split_home_away(fixture, stats):
+    """Return (home, away) statistics lists, matched by team id when available"""
+    home_id = fixture['teams']['home']['id']
+    by_team = {block.get('team', {}).get('id'): block['statistics'] for block in stats}
+
+    if home_id in by_team and len(by_team) == 2:
+        away_id = fixture['teams']['away']['id']
+        return by_team[home_id], by_team.get(away_id, [])
+
+    return stats[0]['statistics'], stats[1]['statistics']
+
+
+def slim_fixture(fixture):
+    """Keep only the parts of a fixture payload that normalize_fixture() reads"""
+    return {
+        'fixture': {'id': fixture['fixture']['id'], 'date': fixture['fixture']['date']},
+        'league': {k: fixture['league'][k] for k in ('id', 'name', 'season')},
+        'teams': {
+            side: {'id': fixture['teams'][side]['id'], 'name': fixture['teams'][side]['name']}
+            for side in ('home', 'away')
+        },
+        'goals': fixture['goals'],
+        'score': {'halftime': (fixture.get('score') or {}).get('halftime')},
+    }
+
+
+def normalize_fixture(fixture, stats):
+    """Flat record for a fixture and its statistics, or None if stats are incomplete"""
+    if not stats or len(stats) < 2:
+        return None
+
+    home_list, away_list = split_home_away(fixture, stats)
+    home = _team_stats(home_list)
+    away = _team_stats(away_list)
+
+    home_goals = fixture['goals']['home'] or 0
+    away_goals = fixture['goals']['away'] or 0
+    total_goals = home_goals + away_goals
+
+    halftime = (fixture.get('score') or {}).get('halftime') or {}
+    ht_home = halftime.get('home')
+    ht_away = halftime.get('away')
+
+    total_corners = home['corners'] + away['corners']
+    total_cards = (home['yellow_cards'] + away['yellow_cards'] +
+                   home['red_cards'] + away['red_cards'])
+
+    return {
+        'fixture_id': fixture['fixture']['id'],
+        'date': fixture['fixture']['date'],
+        'league': fixture['league']['name'],
+        'league_id': fixture['league']['id'],
+        'season': fixture['league']['season'],
+        'home_team': fixture['teams']['home']['name'],
+        'home_team_id': fixture['teams']['home']['id'],
+        'away_team': fixture['teams']['away']['name'],
+        'away_team_id': fixture['teams']['away']['id'],
+        'home_goals': home_goals,
+        'away_goals': away_goals,
+        'total_goals': total_goals,
+        'ht_home_goals': np.nan if ht_home is None else ht_home,
+        'ht_away_goals': np.nan if ht_away is None else ht_away,
+
+        # Targets
+        'btts': 1 if (home_goals > 0 and away_goals > 0) else 0,
+        'over_2_5_goals': 1 if total_goals > 2.5 else 0,
+        'over_9_5_corners': 1 if total_corners > 9.5 else 0,
+        'over_3_5_cards': 1 if total_cards > 3.5 else 0,
+
+        # Stats
+        'home_corners': home['corners'],
+        'away_corners': away['corners'],
+        'total_corners': total_corners,
+        'home_yellow_cards': home['yellow_cards'],
+        'away_yellow_cards': away['yellow_cards'],
+        'home_red_cards': home['red_cards'],
+        'away_red_cards': away['red_cards'],
+        'total_cards': total_cards,
+        'home_shots': home['shots'],
+        'away_shots': away['shots'],
+        'home_shots_on_target': home['shots_on_target'],
+        'away_shots_on_target': away['shots_on_target'],
+        'home_possession': home['possession'],
+        'away_possession': away['possession'],
+    }
+
+
+def normalize_batch(pairs):
+    """Normalize an iterable of (fixture, stats) pairs into columnar arrays
+
+    Returns (columns, skipped) where columns maps each RECORD_DTYPES field to a
+    NumPy array (ready for pd.DataFrame(columns)) and skipped lists the fixture
+    ids whose stats were missing or incomplete.
+    """
+    buffers = {name: [] for name in RECORD_DTYPES}
+    skipped = []
+
+    for fixture, stats in pairs:
+        record = normalize_fixture(fixture, stats)
+        if record is None:
+            skipped.append(fixture['fixture']['id'])
+            continue
+        for name, buffer in buffers.items():
+            buffer.append(record[name])
+
+    columns = {
+        name: np.asarray(buffer, dtype=RECORD_DTYPES[name])
+        for name, buffer in buffers.items()
+    }
+    return columns, skipped
@@ -0,0 +1,79 @@
+"""
+Parquet Parts
+Append-only directories of Parquet files, for stores that grow with every run
+
+Layout: <store>/part-00000.parquet, part-00001.parquet, ...
+
+A full rebuild replaces the directory with a single part; an incremental run
+adds one part holding only its new rows, so its write cost depends on the new
+rows rather than on everything stored. Readers concatenate the parts in write
+order, so a row re-written by a later part can win when deduplicated.
+"""
+
+import shutil
+from pathlib import Path
+
+import pandas as pd
+
+
+def part_name(number):
+    """File name of the numbered part"""
+    return f'part-{number:05d}.parquet'
+
+
+def part_files(path):
+    """The store's part files in write order (empty if it has not been written)"""
+    path = Path(path)
+    return sorted(path.glob('part-*.parquet')) if path.is_dir() else []
+
+
+def read_parts(path):
+    """Every part concatenated in write order, or None if there are none"""
+    parts = part_files(path)
+    if not parts:
+        return None
+    frames = [pd.read_parquet(part, engine='pyarrow') for part in parts]
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+
+def write_part(frame, path):
+    """Write one part file atomically"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.parquet.tmp')
+    frame.to_parquet(tmp_path, engine='pyarrow', index=False)
+    tmp_path.replace(path)
+
+
+def append_part(frame, path):
+    """Add a frame as the store's next part"""
+    parts = part_files(path)
+    number = int(parts[-1].stem.split('-')[1]) + 1 if parts else 0
+    write_part(frame, Path(path) / part_name(number))
+
+
+def replace_parts(frame, path):
+    """Replace the whole store with a frame as its only part"""
+    tmp_dir = fresh_dir(path)
+    write_part(frame, tmp_dir / part_name(0))
+    swap_in(tmp_dir, path)
+
+
+def fresh_dir(path):
+    """Empty scratch directory next to the store to build a replacement in"""
+    path = Path(path)
+    tmp_dir = path.with_name(path.name + '.tmp')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    return tmp_dir
+
+
+def swap_in(tmp_dir, path):
+    """Replace the store directory with a finished scratch directory"""
+    path = Path(path)
+    old_dir = path.with_name(path.name + '.old')
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if path.exists():
+        path.rename(old_dir)
+    Path(tmp_dir).rename(path)
+    shutil.rmtree(old_dir, ignore_errors=True)
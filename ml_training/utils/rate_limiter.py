@@ -0,0 +1,94 @@
+"""
+API Rate Limiter
+Thread-safe token bucket shared by every API-Football request in a run
+
+The bucket is sized from our plan's per-minute limit and corrected at runtime
+from the x-ratelimit-* headers API-Football returns on every response.
+"""
+
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Requests per minute allowed by our API-Football plan (Pro = 300)
+DEFAULT_RATE_PER_MINUTE = int(os.getenv('API_FOOTBALL_RATE_LIMIT', 300))
+
+
+class TokenBucket:
+    """Blocks callers so that requests never exceed the plan's rate"""
+
+    def __init__(self, rate_per_minute=DEFAULT_RATE_PER_MINUTE, burst=None):
+        self.configured_rate = rate_per_minute / 60.0
+        self.rate = self.configured_rate
+        self.capacity = float(burst or max(1, int(self.rate)))
+        self.tokens = self.capacity
+
+        # Daily quota (from x-ratelimit-requests-* headers)
+        self.daily_limit = None
+        self.daily_remaining = None
+
+        self.acquired = 0
+        self.started_at = time.monotonic()
+        self.last_refill = self.started_at
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        """Add tokens earned since the last refill (caller holds the lock)"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def acquire(self):
+        """Take one token, sleeping until one is available"""
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.acquired += 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def update_from_headers(self, headers):
+        """Correct the bucket from API-Football rate limit response headers"""
+        headers = {k.lower(): v for k, v in headers.items()}
+
+        with self.lock:
+            # Per-minute limit: never go faster than the plan allows
+            minute_limit = headers.get('x-ratelimit-limit')
+            if minute_limit and minute_limit.isdigit() and int(minute_limit) > 0:
+                plan_rate = int(minute_limit) / 60.0
+                new_rate = min(self.configured_rate, plan_rate)
+                if new_rate != self.rate:
+                    logger.info(f"⏱️  Rate limit adjusted to {new_rate * 60:.0f} requests/min")
+                    self.rate = new_rate
+                    self.capacity = float(max(1, int(new_rate)))
+
+            # Per-minute remaining: the server's view wins if it is lower than ours
+            minute_remaining = headers.get('x-ratelimit-remaining')
+            if minute_remaining and minute_remaining.isdigit():
+                self._refill()
+                self.tokens = min(self.tokens, float(minute_remaining))
+
+            # Daily quota
+            daily_limit = headers.get('x-ratelimit-requests-limit')
+            if daily_limit and daily_limit.isdigit():
+                self.daily_limit = int(daily_limit)
+
+            daily_remaining = headers.get('x-ratelimit-requests-remaining')
+            if daily_remaining and daily_remaining.lstrip('-').isdigit():
+                self.daily_remaining = int(daily_remaining)
+
+    @property
+    def quota_exhausted(self):
+        """True once the API reports no daily requests left"""
+        return self.daily_remaining is not None and self.daily_remaining <= 0
+
+    def achieved_rate(self):
+        """Requests per second handed out since the bucket was created"""
+        elapsed = time.monotonic() - self.started_at
+        return self.acquired / elapsed if elapsed > 0 else 0.0
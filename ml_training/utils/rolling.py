@@ -0,0 +1,150 @@
+"""
+Grouped Rolling Kernels
+Per-group rolling statistics over NumPy arrays in one sort + cumsum pass
+
+Equivalent to df.groupby(key)[cols].transform(lambda x: x.rolling(w, min_periods=m).mean())
+but without a Python call per group: rows are stably sorted by key (keeping
+their existing order inside each group), every column is cumulatively summed
+once, and each window is the difference of two prefix sums clipped to the
+start of its group. NaNs are skipped the way pandas skips them.
+
+Several windows share the one sort and the one set of prefix sums, so extra
+windows cost two gathers each. Exponentially weighted means (pandas
+ewm(span=s, adjust=True).mean()) are a recurrence, so they are scanned by
+rank within group: step r updates the r-th row of every group at once, for
+every span and column together.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def group_layout(keys):
+    """Sort order, and each sorted row's offset to the first row of its group
+
+    Rows with a missing key get offset -1 (pandas leaves them out of every group).
+    """
+    codes, _ = pd.factorize(np.asarray(keys), use_na_sentinel=True)
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+
+    n = len(codes)
+    starts = np.ones(n, dtype=bool)
+    starts[1:] = sorted_codes[1:] != sorted_codes[:-1]
+    start_idx = np.flatnonzero(starts)
+    group_first = start_idx[np.cumsum(starts) - 1] if n else np.zeros(0, dtype=np.int64)
+
+    offsets = np.arange(n) - group_first
+    offsets[sorted_codes < 0] = -1
+    return order, group_first, offsets
+
+
+def _as_columns(values):
+    """Float 2-D view of values, and whether the input was 1-D"""
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        return values[:, None], True
+    return values, False
+
+
+def grouped_rolling_means(keys, values, windows, min_periods=1, layout=None):
+    """Rolling means for several windows at once: {window: array}, each in input row order
+
+    values may be 1-D or 2-D (rows x columns); each result has the same shape.
+    Pass layout=group_layout(keys) to reuse one sort across several calls.
+    """
+    values, one_dim = _as_columns(values)
+    order, group_first, offsets = layout if layout is not None else group_layout(keys)
+    n = len(order)
+
+    sorted_values = values[order]
+    valid = ~np.isnan(sorted_values)
+
+    # Prefix sums with a leading zero row: sum(rows a..b-1) = prefix[b] - prefix[a]
+    prefix_sum = np.zeros((n + 1, values.shape[1]))
+    np.cumsum(np.where(valid, sorted_values, 0.0), axis=0, out=prefix_sum[1:])
+    prefix_count = np.zeros((n + 1, values.shape[1]), dtype=np.int64)
+    np.cumsum(valid, axis=0, out=prefix_count[1:])
+
+    end = np.arange(1, n + 1)
+    results = {}
+
+    for window in windows:
+        begin = np.maximum(end - window, group_first)
+
+        sums = prefix_sum[end] - prefix_sum[begin]
+        counts = prefix_count[end] - prefix_count[begin]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = sums / counts
+        means[counts < max(min_periods, 1)] = np.nan
+        means[offsets < 0] = np.nan
+
+        result = np.empty_like(means)
+        result[order] = means
+        results[window] = result[:, 0] if one_dim else result
+
+    return results
+
+
+def grouped_rolling_mean(keys, values, window, min_periods=1, layout=None):
+    """Rolling mean of each column of values within groups of keys, in input row order"""
+    return grouped_rolling_means(keys, values, [window], min_periods, layout)[window]
+
+
+def ewm_decay(span):
+    """Weight kept per step for a pandas span (alpha = 2 / (span + 1))"""
+    return 1.0 - 2.0 / (span + 1.0)
+
+
+def grouped_ewm_means(keys, values, spans, layout=None, initial=None):
+    """Exponentially weighted means for several spans: {span: array}, each in input row order
+
+    Matches groupby(key).transform(lambda x: x.ewm(span=s).mean()) (adjust=True,
+    NaNs keep decaying the older weights and repeat the last mean).
+
+    initial continues earlier history: (numerator, denominator) arrays shaped
+    (groups, spans, columns), groups in order of first appearance in keys.
+    """
+    values, one_dim = _as_columns(values)
+    order, _, offsets = layout if layout is not None else group_layout(keys)
+    n, k = values.shape
+
+    sorted_values = values[order]
+    decay = np.array([ewm_decay(span) for span in spans])[None, :, None]
+
+    # Groups longest first, so the groups still active at rank r are a prefix
+    starts = np.flatnonzero(offsets == 0)
+    lengths = np.diff(np.append(starts, n))
+    by_length = np.argsort(-lengths, kind='stable')
+    starts, lengths = starts[by_length], lengths[by_length]
+    max_length = lengths[0] if len(lengths) else 0
+    active = len(lengths) - np.searchsorted(lengths[::-1], np.arange(max_length), side='right')
+
+    if initial is None:
+        numerator = np.zeros((len(starts), len(spans), k))
+        denominator = np.zeros((len(starts), len(spans), k))
+    else:
+        numerator = np.array(initial[0], dtype=np.float64).reshape(len(starts), len(spans), k)[by_length]
+        denominator = np.array(initial[1], dtype=np.float64).reshape(len(starts), len(spans), k)[by_length]
+    means = np.full((n, len(spans), k), np.nan)
+
+    for rank in range(max_length):
+        m = active[rank]
+        rows = starts[:m] + rank
+        x = sorted_values[rows][:, None, :]
+        valid = ~np.isnan(x)
+
+        numerator[:m] = decay * numerator[:m] + np.where(valid, x, 0.0)
+        denominator[:m] = decay * denominator[:m] + valid
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means[rows] = numerator[:m] / denominator[:m]
+
+    results = {}
+    for i, span in enumerate(spans):
+        result = np.empty((n, k))
+        result[order] = means[:, i, :]
+        results[span] = result[:, 0] if one_dim else result
+
+    return results
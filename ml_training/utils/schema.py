@@ -0,0 +1,218 @@
+"""
+Dataset Schema
+Compact dtypes for fixture datasets, and a registry of every team and league seen
+
+Loaded with pandas defaults, a processed dataset keeps names as Python
+strings, counts as int64 and features as float64. load_dataset() applies one
+schema instead: names become categoricals over the registry's team/league
+lists (so every frame shares the same codes), counts and targets take the
+normalizer's int16/int8 types, rates and engineered features float32. Dates
+stay as read; each script parses them the way it already does.
+
+CSVs are parsed by pyarrow's multithreaded reader, with names dictionary-encoded
+while parsing. Frames loaded separately are combined with concat_datasets(),
+which unifies their categories so names stay categorical.
+
+    python -m utils.schema --rebuild-registry     # from data/processed/training_data.csv
+"""
+
+import json
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from utils.normalizer import RECORD_DTYPES
+
+REGISTRY_FILE = Path(__file__).parent.parent / 'data' / 'processed' / 'registry.json'
+TRAINING_DATA = Path(__file__).parent.parent / 'data' / 'processed' / 'training_data.csv'
+
+# Name column -> (registry kind, id column)
+NAME_COLS = {
+    'league': ('leagues', 'league_id'),
+    'home_team': ('teams', 'home_team_id'),
+    'away_team': ('teams', 'away_team_id'),
+}
+
+# Whole-number columns keep the normalizer's integer types; other numbers become float32
+INTEGER_DTYPES = {
+    name: dtype for name, dtype in RECORD_DTYPES.items()
+    if dtype is not object and np.issubdtype(dtype, np.integer)
+}
+
+# Stats some sources export as '55%'
+PERCENT_COLS = ['home_possession', 'away_possession']
+
+
+class Registry:
+    """Every team and league id seen, with its latest name"""
+
+    def __init__(self, teams=None, leagues=None):
+        self.teams = teams or {}        # str(team_id) -> name
+        self.leagues = leagues or {}    # str(league_id) -> name
+        self.changed = False            # an update added or renamed an id since loading
+
+    def kind(self, name):
+        """The id -> name mapping for 'teams' or 'leagues'"""
+        return getattr(self, name)
+
+    def update(self, df):
+        """Add the ids and names in a fixtures frame; returns self"""
+        for name_col, (kind, id_col) in NAME_COLS.items():
+            if name_col not in df.columns or id_col not in df.columns:
+                continue
+            pairs = df[[id_col, name_col]].dropna().drop_duplicates(subset=[id_col], keep='last')
+            mapping = self.kind(kind)
+            for team_id, name in zip(pairs[id_col], pairs[name_col]):
+                key, name = str(int(team_id)), str(name)
+                if mapping.get(key) != name:
+                    mapping[key] = name
+                    self.changed = True
+        return self
+
+    def categories(self, kind):
+        """Distinct names of one kind, in id order (stable category codes across frames)"""
+        mapping = self.kind(kind)
+        names = (mapping[key] for key in sorted(mapping, key=int))
+        return list(dict.fromkeys(names))
+
+    @classmethod
+    def load(cls, path=REGISTRY_FILE):
+        """Load the registry (empty if it has not been written yet)"""
+        path = Path(path)
+        if not path.exists():
+            return cls()
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return cls(teams=data['teams'], leagues=data['leagues'])
+
+    def save(self, path=REGISTRY_FILE):
+        """Write the registry atomically"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'updated': datetime.now().isoformat(),
+                'teams': self.teams,
+                'leagues': self.leagues,
+            }, f, indent=2, sort_keys=True)
+        tmp_path.replace(path)
+
+
+def _categorical(values, known):
+    """Categorical over the registry's names, plus any names it has not seen yet"""
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype('category')
+    known_set = set(known)
+    unseen = [name for name in values.cat.categories if name not in known_set]
+    return values.cat.set_categories(known + unseen)
+
+
+def apply_schema(df, registry=None):
+    """Cast a fixtures frame to the compact schema in place; returns it"""
+    registry = registry if registry is not None else Registry.load()
+
+    for col in df.columns:
+        values = df[col]
+
+        if col in NAME_COLS:
+            df[col] = _categorical(values, registry.categories(NAME_COLS[col][0]))
+            continue
+
+        if col in PERCENT_COLS and not pd.api.types.is_numeric_dtype(values):
+            values = pd.to_numeric(values.astype(str).str.rstrip('%'), errors='coerce')
+
+        if not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            continue
+
+        dtype = INTEGER_DTYPES.get(col)
+        if dtype is not None and not values.isna().any():
+            df[col] = values.astype(dtype)
+        else:
+            df[col] = values.astype(np.float32)
+
+    return df
+
+
+def read_csv_table(path, columns=None, rows=None):
+    """Parse a CSV with pyarrow's multithreaded reader into a DataFrame
+
+    columns limits which columns are parsed at all (missing ones are skipped),
+    rows to a [start, stop) data row range (stop None = to the end). Names come
+    back categorical and 'date' as text; all-empty columns are float NaN, as
+    pandas' own parser would give.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    include = list(header) if columns is None else [col for col in header if col in set(columns)]
+
+    # Names are dictionary-encoded while parsing, so the full string column never exists
+    column_types = {col: pa.dictionary(pa.int32(), pa.string()) for col in NAME_COLS if col in include}
+    if 'date' in include:
+        column_types['date'] = pa.string()
+
+    start, stop = rows if rows is not None else (0, None)
+    table = pa_csv.read_csv(
+        path,
+        read_options=pa_csv.ReadOptions(skip_rows_after_names=start),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=include,
+            column_types=column_types,
+            strings_can_be_null=True,
+        ),
+    )
+    if stop is not None:
+        table = table.slice(0, max(stop - start, 0))
+    for i, field in enumerate(table.schema):
+        if pa.types.is_null(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.float64()))
+    return table.to_pandas()
+
+
+def load_dataset(path, columns=None, registry=None, rows=None):
+    """Read a fixtures CSV straight into the compact schema
+
+    columns limits which columns are parsed at all, rows to a [start, stop) row range.
+    """
+    return apply_schema(read_csv_table(path, columns, rows), registry)
+
+
+def concat_datasets(frames):
+    """Concatenate loaded frames, keeping names categorical across differing categories"""
+    frames = [df for df in frames if len(df.columns)]
+    if not frames:
+        return pd.DataFrame()
+
+    # pd.concat falls back to object columns unless every piece has the same categories
+    for col in NAME_COLS:
+        pieces = [df[col] for df in frames if col in df.columns]
+        if not pieces or not all(isinstance(piece.dtype, pd.CategoricalDtype) for piece in pieces):
+            continue
+        categories = list(dict.fromkeys(name for piece in pieces for name in piece.cat.categories))
+        for df in frames:
+            if col in df.columns:
+                df[col] = df[col].cat.set_categories(categories)
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def main():
+    """Rebuild the team/league registry"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Dataset schema and team/league registry')
+    parser.add_argument('--rebuild-registry', action='store_true', help='Rebuild from the processed training data')
+    args = parser.parse_args()
+
+    if args.rebuild_registry:
+        columns = list(NAME_COLS) + [id_col for _, id_col in NAME_COLS.values()]
+        registry = Registry().update(load_dataset(TRAINING_DATA, columns=columns, registry=Registry()))
+        registry.save()
+        print(f"🗂️  Registry: {len(registry.teams):,} teams, {len(registry.leagues):,} leagues")
+
+
+if __name__ == '__main__':
+    main()
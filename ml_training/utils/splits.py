@@ -0,0 +1,167 @@
+"""
+Dataset Splits
+Named train/val splits of training_data.csv as row ranges, stored in splits.json
+
+02 writes one processed dataset, sorted by date, and a small split file next
+to it instead of copying rows into train/val CSVs. Each split names a [start,
+stop) row range per part; a stop of None runs to the end of the file, so
+fixtures appended by --incremental fall into the latest validation range
+without rewriting anything.
+
+    holdout          train on the first 80% (data.train_test_split), validate on the rest
+    walk_forward_1   validate on the first of k (data.walk_forward_folds) consecutive
+    ...              blocks of that last 20%, training on everything before the block
+
+03, 03b and 04 load a split with load_split(); only the rows of each part are
+converted to a DataFrame.
+
+    python -m utils.splits                  # list the splits
+    python -m utils.splits --rebuild        # from data/processed/training_data.csv
+"""
+
+import json
+from pathlib import Path
+from datetime import datetime
+
+import pandas as pd
+
+from utils.schema import load_dataset
+
+SPLITS_FILE = Path(__file__).parent.parent / 'data' / 'processed' / 'splits.json'
+TRAINING_DATA = Path(__file__).parent.parent / 'data' / 'processed' / 'training_data.csv'
+
+DEFAULT_SPLIT = 'holdout'
+PARTS = ['train', 'val']
+
+
+def build_splits(dates, train_fraction=0.8, walk_forward_folds=0):
+    """Split definitions for a date-sorted dataset with these dates
+
+    Returns {'rows': n, 'splits': {name: {'train': [start, stop], 'val': [start, stop]}}}
+    with the date range of each part alongside, for reading the file by eye.
+    """
+    dates = pd.Series(dates).astype(str).reset_index(drop=True)
+    total = len(dates)
+    cut = int(total * train_fraction)
+
+    ranges = {DEFAULT_SPLIT: {'train': [0, cut], 'val': [cut, None]}}
+
+    # Walk-forward folds cut the validation period into consecutive blocks
+    folds = min(walk_forward_folds, total - cut)
+    for fold in range(folds):
+        start = cut + (total - cut) * fold // folds
+        stop = cut + (total - cut) * (fold + 1) // folds
+        ranges[f'walk_forward_{fold + 1}'] = {
+            'train': [0, start],
+            'val': [start, None if fold == folds - 1 else stop],
+        }
+
+    splits = {}
+    for name, parts in ranges.items():
+        splits[name] = dict(parts)
+        for part, (start, stop) in parts.items():
+            stop = total if stop is None else stop
+            splits[name][f'{part}_dates'] = [dates[start], dates[stop - 1]] if stop > start else None
+
+    return {'rows': total, 'splits': splits}
+
+
+def splits_from_config(dates):
+    """build_splits() with the data section of the training config"""
+    from utils.config import load_training_config
+
+    data = load_training_config().get('data', {})
+    return build_splits(
+        dates,
+        train_fraction=data.get('train_test_split', 0.8),
+        walk_forward_folds=data.get('walk_forward_folds', 0),
+    )
+
+
+def load_splits(path=SPLITS_FILE):
+    """The split file, or None if it has not been written yet"""
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def save_splits(splits, path=SPLITS_FILE):
+    """Write the split file atomically"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    splits = dict(splits, updated=datetime.now().isoformat())
+    tmp_path = path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(splits, f, indent=2)
+    tmp_path.replace(path)
+
+
+def split_dir(base, name=DEFAULT_SPLIT):
+    """Where models/logs for a split live: base itself for the holdout, base/splits/<name> otherwise
+
+    Walk-forward models are for backtesting and never replace the production ones.
+    """
+    base = Path(base)
+    return base if name == DEFAULT_SPLIT else base / 'splits' / name
+
+
+def split_names(splits):
+    """Split names in file order"""
+    return list(splits['splits']) if splits else []
+
+
+def _ranges(splits, name):
+    """Row ranges of one named split"""
+    if name not in splits['splits']:
+        raise KeyError(f"Unknown split '{name}' (have: {', '.join(split_names(splits))})")
+    return splits['splits'][name]
+
+
+def split_frame(df, name=DEFAULT_SPLIT, parts=PARTS):
+    """Parts of one named split of a date-sorted frame already in memory (e.g. from the Parquet store)"""
+    ranges = _ranges(splits_from_config(df['date']), name)
+    return tuple(df.iloc[slice(*ranges[part])] for part in parts)
+
+
+def load_split(name=DEFAULT_SPLIT, parts=PARTS, path=TRAINING_DATA, splits=None, registry=None):
+    """(train_df, val_df) (or whichever parts are asked for) of one named split
+
+    Without a split file, the splits are worked out from the whole dataset.
+    """
+    splits = splits if splits is not None else load_splits()
+
+    if splits is None:
+        return split_frame(load_dataset(path, registry=registry), name, parts)
+
+    ranges = _ranges(splits, name)
+    return tuple(load_dataset(path, registry=registry, rows=ranges[part]) for part in parts)
+
+
+def main():
+    """List or rebuild the splits"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Train/val split definitions')
+    parser.add_argument('--rebuild', action='store_true', help='Rebuild from the processed training data')
+    args = parser.parse_args()
+
+    if args.rebuild:
+        dates = pd.read_csv(TRAINING_DATA, usecols=['date'])['date']
+        save_splits(splits_from_config(dates))
+
+    splits = load_splits()
+    if splits is None:
+        print(f"❌ No split file: {SPLITS_FILE}")
+        return
+
+    print(f"✂️  {len(splits['splits'])} splits over {splits['rows']:,} fixtures")
+    for name, ranges in splits['splits'].items():
+        train, val = ranges['train'], ranges['val']
+        print(f"   {name}: train rows {train[0]:,}-{train[1]:,}, "
+              f"val rows {val[0]:,}-{'end' if val[1] is None else f'{val[1]:,}'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+"""
+Stage Cache
+Skips pipeline stages whose inputs haven't changed since their last successful run
+
+pipeline.sh runs each stage through this module. A stage's fingerprint is the
+sha256 of every input file it reads, its code (the stage script, utils/ and
+requirements.txt) and its command line. When the fingerprint matches the last
+successful run and the outputs recorded then are still on disk unchanged, the
+stage is skipped and those outputs are reused. Because outputs are hashed too,
+a stage that re-runs and produces identical files doesn't wake up the next one
+(the write timestamps in 02's JSON outputs are left out of their hashes).
+
+File hashes are memoized by (size, mtime) in data/cache/stages.json, so an
+unchanged day costs a few stat() calls rather than re-reading training_data.csv.
+
+    python -m utils.stage_cache                                    # status of every stage
+    python -m utils.stage_cache --run train -- python3 scripts/03_train_models.py
+    python -m utils.stage_cache --run train --force -- ...         # run even if cached
+    python -m utils.stage_cache --clear                            # forget every stage
+"""
+
+import sys
+import glob
+import json
+import time
+import hashlib
+import subprocess
+from pathlib import Path
+from datetime import datetime
+
+ROOT = Path(__file__).parent.parent
+STATE_FILE = ROOT / 'data' / 'cache' / 'stages.json'
+
+# Code every stage depends on besides its own script
+SHARED_CODE = ['utils/*.py', 'requirements.txt']
+
+# Write timestamps left out of a JSON file's hash, so rewriting the same content matches
+VOLATILE_KEYS = {
+    'data/processed/splits.json': ['updated'],
+    'data/processed/registry.json': ['updated'],
+    'data/processed/feature_state.json': ['saved_at'],
+}
+
+# Glob patterns relative to ml_training/; ok_codes are exit codes that count as a completed run
+STAGES = {
+    'process': {
+        'inputs': [
+            'data/raw/*.csv',
+            'data/incremental/*.csv',
+            'data/incremental/monthly/*.parquet',
+            'config/training_config.yaml',
+            'config/leagues.json',
+        ],
+        'code': ['scripts/02_process_data.py'],
+        'outputs': [
+            'data/processed/training_data.csv',
+            'data/processed/splits.json',
+            'data/processed/registry.json',
+            'data/processed/feature_state.json',
+            'data/processed/team_features/*.parquet',
+            'data/processed/feature_state_ids.bin',
+            'data/processed/h2h_index/*.parquet',
+        ],
+    },
+    'train': {
+        'inputs': [
+            'data/processed/training_data.csv',
+            'data/processed/splits.json',
+            'data/processed/registry.json',
+            'data/processed/targets.parquet',
+            'data/processed/team_features/*.parquet',
+            'config/training_config.yaml',
+        ],
+        'code': ['scripts/03_train_models.py'],
+        'outputs': ['models/*_model.pkl', 'models/metadata.json'],
+    },
+    'evaluate': {
+        'inputs': [
+            'data/processed/training_data.csv',
+            'data/processed/splits.json',
+            'data/processed/team_features/*.parquet',
+            'models/*_model.pkl',
+        ],
+        'code': ['scripts/04_evaluate.py'],
+        # 04 exits 1 when a model declined - an evaluation that ran all the same
+        'ok_codes': [0, 1],
+        'outputs': [
+            'logs/*_history.json',
+            '../analytics_hub/metrics/daily_performance.json',
+            '../analytics_hub/metrics/historical_trends.json',
+        ],
+    },
+    'deploy': {
+        'inputs': ['models/*_model.pkl', 'models/metadata.json'],
+        'code': ['scripts/05_deploy.py'],
+        'outputs': ['../shared/ml_outputs/*_model.pkl', '../shared/ml_outputs/metadata.json'],
+    },
+}
+
+
+def load_state(path=STATE_FILE):
+    """Recorded stage runs and the file hash memo"""
+    path = Path(path)
+    if not path.exists():
+        return {'stages': {}, 'hashes': {}}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def save_state(state, path=STATE_FILE):
+    """Write the state file atomically"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    tmp_path.replace(path)
+
+
+def expand(patterns):
+    """Files matching the patterns, as sorted paths relative to ml_training/"""
+    files = set()
+    for pattern in patterns:
+        for match in glob.glob(str(ROOT / pattern)):
+            if Path(match).is_file():
+                files.add(Path(match).relative_to(ROOT).as_posix())
+    return sorted(files)
+
+
+def file_hash(name, memo):
+    """sha256 of a file, reused from the memo while its size and mtime are unchanged"""
+    stat = (ROOT / name).stat()
+    cached = memo.get(name)
+    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        return cached[2]
+
+    digest = hashlib.sha256()
+    if name in VOLATILE_KEYS:
+        with open(ROOT / name, 'r') as f:
+            data = json.load(f)
+        for key in VOLATILE_KEYS[name]:
+            data.pop(key, None)
+        digest.update(json.dumps(data, sort_keys=True).encode())
+    else:
+        with open(ROOT / name, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    memo[name] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+    return memo[name][2]
+
+
+def hash_files(patterns, memo):
+    """{file: sha256} for every file matching the patterns"""
+    return {name: file_hash(name, memo) for name in expand(patterns)}
+
+
+def fingerprint(stage, command, memo):
+    """Fingerprint of a stage's inputs, code and command line"""
+    spec = STAGES[stage]
+    payload = {
+        'inputs': hash_files(spec['inputs'], memo),
+        'code': hash_files(spec['code'] + SHARED_CODE, memo),
+        'command': list(command),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def skip_reason(stage, command, state):
+    """Why the stage must run, or None if its cached outputs can be reused"""
+    record = state['stages'].get(stage)
+    if record is None:
+        return 'never run'
+    if record['fingerprint'] != fingerprint(stage, command, state['hashes']):
+        return 'inputs, code or command changed'
+    if not record['outputs']:
+        return 'no outputs recorded'
+
+    for name, sha256 in record['outputs'].items():
+        if not (ROOT / name).exists():
+            return f'output missing: {name}'
+        if file_hash(name, state['hashes']) != sha256:
+            return f'output changed: {name}'
+    return None
+
+
+def run_stage(stage, command, force=False):
+    """Run a stage's command unless its cached outputs are still valid; returns its exit code"""
+    state = load_state()
+    reason = 'forced' if force else skip_reason(stage, command, state)
+
+    if reason is None:
+        record = state['stages'][stage]
+        print(f"⏭️  {stage}: inputs unchanged since {record['finished']}, reusing {len(record['outputs'])} outputs")
+        save_state(state)
+        return record.get('returncode', 0)
+
+    print(f"▶️  {stage}: running ({reason})", flush=True)
+    start = time.time()
+    returncode = subprocess.run(command, cwd=ROOT).returncode
+    if returncode not in STAGES[stage].get('ok_codes', [0]):
+        # A failed run never counts as cached
+        state['stages'].pop(stage, None)
+        save_state(state)
+        return returncode
+
+    # Fingerprinted after the run: 02 --compact folds daily CSVs into monthly
+    # partitions, and the compacted layout is what tomorrow's run will see
+    state['stages'][stage] = {
+        'fingerprint': fingerprint(stage, command, state['hashes']),
+        'outputs': hash_files(STAGES[stage]['outputs'], state['hashes']),
+        'command': list(command),
+        'finished': datetime.now().isoformat(timespec='seconds'),
+        'seconds': round(time.time() - start, 1),
+        'returncode': returncode,
+    }
+    save_state(state)
+    return returncode
+
+
+def main():
+    """Run a stage through the cache, or show the status of every stage"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Pipeline stage cache')
+    parser.add_argument('--run', choices=list(STAGES), help='Stage to run')
+    parser.add_argument('--force', action='store_true', help='Run even if the inputs are unchanged')
+    parser.add_argument('--clear', action='store_true', help='Forget every recorded stage run')
+    parser.add_argument('command', nargs=argparse.REMAINDER, help='Command of the stage (after --)')
+    args = parser.parse_args()
+
+    command = args.command[1:] if args.command[:1] == ['--'] else args.command
+
+    if args.clear:
+        save_state({'stages': {}, 'hashes': {}})
+        print("🧹 Cleared every recorded stage run")
+        return
+
+    if args.run:
+        if not command:
+            parser.error('--run needs the stage command after --')
+        sys.exit(run_stage(args.run, command, force=args.force))
+
+    state = load_state()
+    for stage in STAGES:
+        record = state['stages'].get(stage)
+        if record is None:
+            print(f"   {stage:<9} never run")
+            continue
+        reason = skip_reason(stage, record['command'], state)
+        status = '✅ cached' if reason is None else f'🔄 will run ({reason})'
+        print(f"   {stage:<9} {status}, last run {record['finished']} ({record['seconds']}s)")
+
+
+if __name__ == '__main__':
+    main()
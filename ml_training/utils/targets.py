@@ -0,0 +1,241 @@
+"""
+Target Registry
+Every training target as a named, vectorized expression over fixture columns
+
+Each target declares the columns it reads and an expression over those
+columns as float arrays; a fixture missing any input gets no label (NA)
+instead of a guessed one. Results are coded as integers, never strings:
+a match result is 0 home win, 1 draw, 2 away win, and HT/FT is one 0-8 code
+(3 * halftime result + fulltime result) worked out once for all nine HT/FT
+targets.
+
+Targets are not written into the processed dataset. 02b saves them as a
+sidecar (data/processed/targets.parquet, keyed by fixture_id) and the trainers
+attach the ones they need at load time; fixtures the sidecar doesn't cover
+yet (e.g. appended by --incremental) are computed on the spot.
+
+    python -m utils.targets                 # list the registry
+    python -m utils.targets --rebuild       # sidecar from data/processed/training_data.csv
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+TARGETS_FILE = Path(__file__).parent.parent / 'data' / 'processed' / 'targets.parquet'
+TRAINING_DATA = Path(__file__).parent.parent / 'data' / 'processed' / 'training_data.csv'
+
+RESULTS = ['home', 'draw', 'away']
+
+# Halftime scores only feed the HT/FT targets: known after kickoff, so never a
+# feature, and a missing one stays missing (NA label) rather than becoming 0-0
+HALFTIME_COLS = ['ht_home_goals', 'ht_away_goals']
+
+
+def result_code(home_goals, away_goals):
+    """0 home win, 1 draw, 2 away win (NaN where a score is missing)"""
+    return 1 - np.sign(home_goals - away_goals)
+
+
+def ht_ft_code(c):
+    """3 * halftime result + fulltime result, 0 (home/home) to 8 (away/away)"""
+    return 3 * result_code(c['ht_home_goals'], c['ht_away_goals']) + result_code(c['home_goals'], c['away_goals'])
+
+
+# Intermediate codes targets can read like columns: name -> (input columns, expression)
+CODES = {
+    'ht_ft_code': (['ht_home_goals', 'ht_away_goals', 'home_goals', 'away_goals'], ht_ft_code),
+}
+
+# name -> (group, label, input columns, expression)
+TARGETS = {
+    # Production (03)
+    'btts': (
+        'production', 'BTTS (Both Teams To Score)', ['home_goals', 'away_goals'],
+        lambda c: (c['home_goals'] > 0) & (c['away_goals'] > 0),
+    ),
+    'over_2_5_goals': (
+        'production', 'Over 2.5 Goals', ['total_goals'],
+        lambda c: c['total_goals'] > 2.5,
+    ),
+    'over_9_5_corners': (
+        'production', 'Over 9.5 Corners', ['total_corners'],
+        lambda c: c['total_corners'] > 9.5,
+    ),
+    'over_3_5_cards': (
+        'production', 'Over 3.5 Cards', ['total_cards'],
+        lambda c: c['total_cards'] > 3.5,
+    ),
+
+    # Experimental (03b)
+    'has_red_card': (
+        'experimental', 'Red Card in Game', ['home_red_cards', 'away_red_cards'],
+        lambda c: (c['home_red_cards'] > 0) | (c['away_red_cards'] > 0),
+    ),
+    'any_player_booked': (
+        'experimental', 'Player Booked', ['home_yellow_cards', 'away_yellow_cards'],
+        lambda c: (c['home_yellow_cards'] > 0) | (c['away_yellow_cards'] > 0),
+    ),
+    'over_3_5_bookings': (
+        'experimental', 'Over 3.5 Bookings', ['home_yellow_cards', 'away_yellow_cards'],
+        lambda c: c['home_yellow_cards'] + c['away_yellow_cards'] > 3.5,
+    ),
+    'home_win_by_2_plus': (
+        'experimental', 'Home Win by 2+', ['home_goals', 'away_goals'],
+        lambda c: c['home_goals'] - c['away_goals'] >= 2,
+    ),
+    'away_win_by_2_plus': (
+        'experimental', 'Away Win by 2+', ['home_goals', 'away_goals'],
+        lambda c: c['away_goals'] - c['home_goals'] >= 2,
+    ),
+    'any_team_win_by_2_plus': (
+        'experimental', 'Either Team Wins by 2+', ['home_goals', 'away_goals'],
+        lambda c: np.abs(c['home_goals'] - c['away_goals']) >= 2,
+    ),
+}
+
+# One binary target per HT/FT code: ht_ft_home_home (0) ... ht_ft_away_away (8)
+for _code in range(9):
+    _ht, _ft = RESULTS[_code // 3], RESULTS[_code % 3]
+    TARGETS[f'ht_ft_{_ht}_{_ft}'] = (
+        'experimental', f'HT/FT {_ht.title()}/{_ft.title()}', ['ht_ft_code'],
+        lambda c, code=_code: c['ht_ft_code'] == code,
+    )
+
+
+def target_names(group=None):
+    """Registered target names, optionally only one group ('production' / 'experimental')"""
+    return [name for name, spec in TARGETS.items() if group is None or spec[0] == group]
+
+
+def target_label(name):
+    """Display name of a target"""
+    return TARGETS[name][1]
+
+
+def source_columns(names=None):
+    """Dataset columns the given targets (default: all) are computed from"""
+    columns = []
+    for name in target_names() if names is None else names:
+        for col in TARGETS[name][2]:
+            for source in CODES[col][0] if col in CODES else [col]:
+                if source not in columns:
+                    columns.append(source)
+    return columns
+
+
+def compute_targets(df, names=None):
+    """Nullable Int8 target columns for a fixtures frame, aligned with its index
+
+    Targets whose inputs the frame doesn't have are left out.
+    """
+    available = {}
+
+    def column(col):
+        # Inputs (and codes) are converted once and shared by every target reading them
+        if col not in available:
+            if col in CODES:
+                inputs, expression = CODES[col]
+                if not all(column(source) is not None for source in inputs):
+                    available[col] = None
+                else:
+                    with np.errstate(invalid='ignore'):
+                        available[col] = np.asarray(expression(available), dtype=float)
+            elif col in df.columns:
+                available[col] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)
+            else:
+                available[col] = None
+        return available[col]
+
+    targets = {}
+    for name in target_names() if names is None else names:
+        _, _, inputs, expression = TARGETS[name]
+        if not all(column(col) is not None for col in inputs):
+            continue
+
+        with np.errstate(invalid='ignore'):
+            values = np.asarray(expression(available), dtype=bool)
+        missing = np.zeros(len(df), dtype=bool)
+        for col in inputs:
+            missing |= np.isnan(available[col])
+
+        targets[name] = pd.arrays.IntegerArray(values.astype(np.int8), missing)
+
+    return pd.DataFrame(targets, index=df.index)
+
+
+def save_targets(fixture_ids, targets, path=TARGETS_FILE):
+    """Write the target sidecar (fixture_id + one column per target) atomically"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    frame = targets.reset_index(drop=True)
+    frame.insert(0, 'fixture_id', np.asarray(fixture_ids, dtype=np.int64))
+
+    tmp_path = path.with_suffix('.parquet.tmp')
+    frame.to_parquet(tmp_path, engine='pyarrow', index=False)
+    tmp_path.replace(path)
+
+
+def load_targets(names=None, path=TARGETS_FILE):
+    """The sidecar's targets indexed by fixture_id, or None if it has not been written"""
+    path = Path(path)
+    if not path.exists():
+        return None
+
+    columns = None
+    if names is not None:
+        stored = set(pq.read_schema(path).names)
+        columns = ['fixture_id'] + [name for name in names if name in stored]
+    return pd.read_parquet(path, engine='pyarrow', columns=columns).set_index('fixture_id')
+
+
+def attach_targets(df, names, path=TARGETS_FILE):
+    """df with the named target columns (replacing any already there)
+
+    Values come from the sidecar where it has the fixture, otherwise they are
+    computed from df's own columns. Targets nothing can provide are left out.
+    """
+    computed = compute_targets(df, names)
+    stored = load_targets(names, path)
+
+    columns = {}
+    for name in names:
+        values = computed[name] if name in computed.columns else None
+        if stored is not None and name in stored.columns:
+            from_store = stored[name].reindex(df['fixture_id'].to_numpy())
+            from_store.index = df.index
+            values = from_store if values is None else from_store.fillna(values)
+        if values is not None:
+            columns[name] = values.astype('Int8')
+
+    df = df.drop(columns=[name for name in names if name in df.columns])
+    return pd.concat([df, pd.DataFrame(columns, index=df.index)], axis=1)
+
+
+def main():
+    """List the registry or rebuild the sidecar"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Training target registry')
+    parser.add_argument('--rebuild', action='store_true', help='Rebuild the sidecar from the processed training data')
+    args = parser.parse_args()
+
+    if args.rebuild:
+        from utils.schema import load_dataset
+
+        df = load_dataset(TRAINING_DATA, columns=['fixture_id'] + source_columns())
+        targets = compute_targets(df)
+        save_targets(df['fixture_id'], targets)
+        print(f"🎯 Saved {len(targets.columns)} targets for {len(df):,} fixtures: {TARGETS_FILE}")
+
+    for group in ['production', 'experimental']:
+        print(f"\n{group.title()} targets:")
+        for name in target_names(group):
+            print(f"   {name:<26} {target_label(name)}  <- {', '.join(TARGETS[name][2])}")
+
+
+if __name__ == '__main__':
+    main()
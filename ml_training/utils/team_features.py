@@ -0,0 +1,342 @@
+"""
+Team Feature Store
+Point-in-time team rolling features, one row per (team, match), in Parquet
+
+02 writes every team's rolling/EWM features (over its home and away matches)
+as they stood after each match, tagged with the side it played.
+An as-of join then answers "what were team X's stats before kickoff T" for
+any number of (team, time) pairs at once: merge_asof picks each team's latest
+row strictly before T, so a fixture never sees its own result. 03, 03b and 04
+attach their team features this way, the same as today's fixtures get them.
+
+The store is a directory of Parquet parts: a full rebuild writes part-00000,
+and each incremental run adds one part with its new snapshots only (a
+re-processed fixture's later row wins).
+
+    python -m utils.team_features --rebuild           # from data/processed/training_data.csv
+    python -m utils.team_features --enrich-today      # fill home_stats/away_stats/h2h_stats in fixtures_today.json
+"""
+
+import re
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.parquet_parts import append_part, fresh_dir, part_files, part_name, read_parts, replace_parts, swap_in
+
+TEAM_FEATURE_STORE = Path(__file__).parent.parent / 'data' / 'processed' / 'team_features'
+TRAINING_DATA = Path(__file__).parent.parent / 'data' / 'processed' / 'training_data.csv'
+FIXTURES_TODAY = Path(__file__).parent.parent.parent / 'shared' / 'ml_inputs' / 'fixtures_today.json'
+
+SIDES = ['home', 'away']
+
+# 02's per-side rolling columns, e.g. home_goals_l5, away_cards_ewm10, home_corners_momentum
+FEATURE_COLUMN = re.compile(r'^(home|away)_((?:goals|conceded|corners|cards)_(?:l\d+|ewm\d+|momentum))$')
+
+# fixtures_today.json stat -> store stat (at the shortest window)
+TODAY_STATS = {
+    'goals_scored_avg': 'goals',
+    'goals_conceded_avg': 'conceded',
+    'corners_avg': 'corners',
+    'cards_avg': 'cards',
+}
+
+KEY_COLS = ['team_id', 'side', 'timestamp', 'fixture_id']
+
+
+def feature_columns(df):
+    """Store feature names (side prefix dropped) present in a processed frame"""
+    names = []
+    for col in df.columns:
+        match = FEATURE_COLUMN.match(col)
+        if match and match.group(2) not in names:
+            names.append(match.group(2))
+    return names
+
+
+def team_snapshots(df):
+    """Long table of each team's features after each match in a processed frame"""
+    names = feature_columns(df)
+    frames = []
+
+    for side in SIDES:
+        team_col = f'{side}_team_id'
+        if team_col not in df.columns:
+            continue
+
+        snapshot = pd.DataFrame({
+            'team_id': pd.to_numeric(df[team_col], errors='coerce').fillna(-1).astype(np.int64),
+            'team': df[f'{side}_team'].astype(str) if f'{side}_team' in df.columns else '',
+            'side': side,
+            'timestamp': _naive_utc(df['date']).to_numpy(),
+            'fixture_id': df['fixture_id'].astype(np.int64),
+        })
+        for name in names:
+            col = f'{side}_{name}'
+            snapshot[name] = df[col].astype(np.float32) if col in df.columns else np.float32(np.nan)
+        frames.append(snapshot)
+
+    if not frames:
+        return pd.DataFrame(columns=KEY_COLS + ['team'])
+
+    return pd.concat(frames, ignore_index=True)
+
+
+class TeamFeatureStore:
+    """As-of lookups of team features by (team_id, timestamp)"""
+
+    def __init__(self, frame):
+        frame = frame.drop_duplicates(subset=['team_id', 'fixture_id'], keep='last')
+        self.frame = frame.sort_values(['timestamp', 'fixture_id'], kind='stable').reset_index(drop=True)
+        self.features = [col for col in self.frame.columns if col not in KEY_COLS + ['team']]
+
+    def __len__(self):
+        return len(self.frame)
+
+    @classmethod
+    def from_processed(cls, df):
+        """Build the store from a processed (feature-engineered) frame"""
+        return cls(team_snapshots(df))
+
+    @classmethod
+    def load(cls, path=TEAM_FEATURE_STORE):
+        """Load the store (every part, oldest first), or None if it has not been built yet"""
+        frame = read_parts(path)
+        return None if frame is None else cls(frame)
+
+    def save(self, path=TEAM_FEATURE_STORE):
+        """Replace the store with this frame as a single part"""
+        replace_parts(_compact(self.frame), path)
+
+    def as_of(self, team_ids, timestamps):
+        """Each team's features from its latest match strictly before each timestamp
+
+        Returns a frame aligned with the inputs; teams with no earlier match get NaN.
+        """
+        query = pd.DataFrame({
+            'team_id': pd.to_numeric(pd.Series(team_ids), errors='coerce').fillna(-1).astype(np.int64).to_numpy(),
+            'timestamp': _naive_utc(timestamps),
+            'row': np.arange(len(team_ids)),
+        })
+
+        history = self.frame[['team_id', 'timestamp'] + self.features]
+        result = pd.merge_asof(
+            query.sort_values('timestamp', kind='stable'),
+            history,
+            on='timestamp',
+            by='team_id',
+            direction='backward',
+            allow_exact_matches=False,
+        )
+        return result.sort_values('row').reset_index(drop=True)[self.features]
+
+    def attach(self, fixtures):
+        """Point-in-time {side}_{feature} columns for a fixtures frame (training, backtests)"""
+        columns = {}
+        for side in SIDES:
+            features = self.as_of(fixtures[f'{side}_team_id'].to_numpy(), fixtures['date'])
+            for name in self.features:
+                columns[f'{side}_{name}'] = features[name].to_numpy()
+
+        # Columns the frame already has are replaced in place, so column order is unchanged
+        fixtures = fixtures.copy()
+        for col in [col for col in columns if col in fixtures.columns]:
+            fixtures[col] = columns.pop(col)
+        return pd.concat([fixtures, pd.DataFrame(columns, index=fixtures.index)], axis=1)
+
+    def team_ids_by_name(self):
+        """Team name -> most recent team_id, for inputs that only carry names"""
+        named = self.frame[self.frame['team'].astype(str) != '']
+        return dict(zip(named['team'].astype(str), named['team_id']))
+
+
+def attach_store_features(frames, path=TEAM_FEATURE_STORE):
+    """Frames with their team features replaced by as-of-kickoff store values (unchanged, None if no store)"""
+    store = TeamFeatureStore.load(path)
+    if store is None:
+        return frames, None
+    return [store.attach(frame) for frame in frames], store
+
+
+def store_parts(path=TEAM_FEATURE_STORE):
+    """The store's part files in write order (empty if it has not been built)"""
+    return part_files(path)
+
+
+def append_snapshots(df, path=TEAM_FEATURE_STORE):
+    """Write the snapshots of newly processed fixtures as a new part; returns rows written"""
+    snapshots = team_snapshots(df)
+    append_part(_compact(snapshots), path)
+    return len(snapshots)
+
+
+def _compact(frame):
+    """Snapshots with the repeated name columns as categoricals, for writing"""
+    frame = frame.copy()
+    frame['team'] = frame['team'].astype('category')
+    frame['side'] = frame['side'].astype('category')
+    return frame
+
+
+class SnapshotWriter:
+    """Streams team snapshots into a fresh store one date-ordered chunk at a time"""
+
+    def __init__(self, path=TEAM_FEATURE_STORE):
+        self.path = Path(path)
+        self.tmp_dir = fresh_dir(self.path)
+        self.tmp_path = self.tmp_dir / part_name(0)
+        self.writer = None
+        self.rows = 0
+
+    def write(self, df):
+        """Append the snapshots of a processed chunk as a new row group"""
+        snapshots = team_snapshots(df)
+        if self.writer is None:
+            table = pa.Table.from_pandas(snapshots, preserve_index=False)
+            self.writer = pq.ParquetWriter(self.tmp_path, table.schema)
+        else:
+            # Later chunks are cast to the first chunk's schema (e.g. timestamp units)
+            table = pa.Table.from_pandas(snapshots, schema=self.writer.schema, preserve_index=False)
+        self.writer.write_table(table)
+        self.rows += len(snapshots)
+
+    def close(self):
+        """Finish the part and swap the new store in"""
+        if self.writer is None:
+            shutil.rmtree(self.tmp_dir, ignore_errors=True)
+            return
+        self.writer.close()
+        swap_in(self.tmp_dir, self.path)
+
+
+def _naive_utc(timestamps):
+    """Timestamps as tz-naive UTC (store dates are naive)"""
+    values = pd.to_datetime(pd.Series(timestamps).to_numpy(), utc=True)
+    return values.tz_convert(None)
+
+
+def _rounded(value):
+    """JSON value for a feature: None when missing, else 2 decimals"""
+    return None if pd.isna(value) else round(float(value), 2)
+
+
+def fixture_team_ids(store, fixtures):
+    """home/away team ids for fixtures_today entries, looked up by name when the id is missing"""
+    ids_by_name = store.team_ids_by_name()
+    return {
+        side: [
+            fixture.get(f'{side}_team_id') or ids_by_name.get(fixture.get(f'{side}_team'), -1)
+            for fixture in fixtures
+        ]
+        for side in SIDES
+    }
+
+
+def fixture_stats(store, fixtures, window, team_ids=None):
+    """home_stats/away_stats dicts for fixtures_today entries, as of each kickoff"""
+    team_ids = team_ids or fixture_team_ids(store, fixtures)
+    kickoffs = [fixture.get('kickoff') or fixture.get('date') for fixture in fixtures]
+    stats = {}
+
+    for side in SIDES:
+        features = store.as_of(team_ids[side], kickoffs)
+
+        rows = []
+        for _, row in features.iterrows():
+            rows.append({
+                name: _rounded(row.get(f'{stat}_l{window}', np.nan)) for name, stat in TODAY_STATS.items()
+            })
+        stats[side] = rows
+
+    return stats
+
+
+def fixture_h2h(index, fixtures, team_ids, lookback):
+    """h2h_stats dicts for fixtures_today entries (None for pairs that never met)"""
+    kickoffs = [fixture.get('kickoff') or fixture.get('date') for fixture in fixtures]
+    features = index.features(team_ids['home'], team_ids['away'], kickoffs, lookback)
+
+    rows = []
+    for _, row in features.iterrows():
+        if not row['h2h_matches']:
+            rows.append(None)
+            continue
+        rows.append({
+            name.replace('h2h_', '', 1): int(value) if name == 'h2h_matches' else _rounded(value)
+            for name, value in row.items()
+        })
+    return rows
+
+
+def enrich_fixtures_today(path=FIXTURES_TODAY, store_path=TEAM_FEATURE_STORE, window=None):
+    """Fill home_stats/away_stats (and h2h_stats) in fixtures_today.json; returns fixtures enriched"""
+    from utils.config import feature_settings
+    from utils.h2h import HeadToHeadIndex
+
+    store = TeamFeatureStore.load(store_path)
+    if store is None:
+        raise FileNotFoundError(f"Team feature store not found: {store_path} (run 02_process_data.py)")
+
+    path = Path(path)
+    with open(path, 'r') as f:
+        fixtures = json.load(f)
+    if not fixtures:
+        return 0
+
+    settings = feature_settings()
+    window = window or settings['rolling_windows'][0]
+    team_ids = fixture_team_ids(store, fixtures)
+    stats = fixture_stats(store, fixtures, window, team_ids)
+
+    h2h = [None] * len(fixtures)
+    h2h_index = HeadToHeadIndex.load()
+    if h2h_index is not None:
+        h2h = fixture_h2h(h2h_index, fixtures, team_ids, settings['h2h_lookback'])
+
+    enriched = 0
+    for i, fixture in enumerate(fixtures):
+        found = False
+        for side in SIDES:
+            values = stats[side][i]
+            # Keep whatever the backend exported for teams the store has never seen
+            if any(value is not None for value in values.values()):
+                fixture[f'{side}_stats'] = values
+                found = True
+        if h2h[i] is not None:
+            fixture['h2h_stats'] = h2h[i]
+        enriched += found
+
+    tmp_path = path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(fixtures, f, indent=2)
+    tmp_path.replace(path)
+    return enriched
+
+
+def main():
+    """Rebuild the store or enrich today's fixtures"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Point-in-time team feature store')
+    parser.add_argument('--rebuild', action='store_true', help='Rebuild from the processed training data')
+    parser.add_argument('--enrich-today', action='store_true', help='Fill home_stats/away_stats in fixtures_today.json')
+    parser.add_argument('--fixtures', default=str(FIXTURES_TODAY), help='Fixtures JSON to enrich')
+    args = parser.parse_args()
+
+    if args.rebuild:
+        store = TeamFeatureStore.from_processed(pd.read_csv(TRAINING_DATA))
+        store.save()
+        print(f"🗃️  Rebuilt team feature store: {len(store):,} rows, {len(store.features)} features")
+
+    if args.enrich_today:
+        enriched = enrich_fixtures_today(args.fixtures)
+        print(f"📋 Added team stats to {enriched} fixtures in {args.fixtures}")
+
+
+if __name__ == '__main__':
+    main()